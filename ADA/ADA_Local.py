@@ -1,13 +1,11 @@
 import ollama
 import asyncio
 import pyaudio
-from RealtimeSTT import AudioToTextRecorder
-from RealtimeTTS import TextToAudioStream, SystemEngine, CoquiEngine
-import torch  # Import the torch library
 import re
 import time
 import os
 from .WIDGETS import system, timer, project, camera
+from .realtime_audio import LazyRealtimeAudio
 
 ELEVENLABS_API_KEY = os.getenv("ELEVENLABS_API_KEY")
 VOICE_ID = 'pFZP5JQG7iQjIQuC4Bku'
@@ -18,18 +16,9 @@ SEND_SAMPLE_RATE = 16000
 RECEIVE_SAMPLE_RATE = 24000
 CHUNK_SIZE = 1024
 
-class ADA:
+class ADA(LazyRealtimeAudio):
     def __init__(self):
         print("initializing...")
-
-        # Check for CUDA availability
-        if torch.cuda.is_available():
-            self.device = "cuda"
-            print("CUDA is available. Using GPU.")
-        else:
-            self.device = "cpu"
-            print("CUDA is not available. Using CPU.")
-
         self.model = "gemma3:4b-it-q4_K_M" #This is the smallest version of gemma3 for consistent function calling use gemma3:4b-it-q4_K_M  or higher if your computer is not strong enough use ada_online
         self.system_behavior = """
             Your name is ADA (Advanced Design Assistant) you are a helpful AI assistant.  You are an expert in All STEM Fields providing concise and accurate information. When asked to perform a task, respond with the code to perform that task wrapped in ```tool_code```.  If the task does not require a function call, provide a direct answer without using ```tool_code```.  Always respond in a helpful and informative manner."
@@ -96,11 +85,7 @@ class ADA:
             #'on_realtime_transcription_update': self.clear_queues,
         }
 
-        try:
-            self.recorder = AudioToTextRecorder(**self.recorder_config)
-        except Exception as e:
-            print(f"Error initializing AudioToTextRecorder: {e}")
-            self.recorder = None  # Or handle this appropriately
+        self.recorder = None # Built on first use in stt()
 
         try:
             self.pya = pyaudio.PyAudio()
@@ -110,9 +95,8 @@ class ADA:
         
         self.response_start_time = None
         self.audio_start_time = None
-        #self.engine = CoquiEngine()
-        self.engine = SystemEngine()
-        self.stream = TextToAudioStream(self.engine)
+        self.engine = None # RealtimeTTS engine and stream are built on first use in tts()
+        self.stream = None
         self.first_audio_byte_time = None
         self.speech_to_text_time = None
 
@@ -216,6 +200,9 @@ class ADA:
         return None
 
     async def tts(self):
+        if not await asyncio.to_thread(self._get_tts_stream):
+            print("RealtimeTTS stream not initialized. Cannot perform TTS.")
+            return
         while True:
             chunk = await self.response_queue.get()
             if chunk == None:
@@ -228,7 +215,7 @@ class ADA:
             self.stream.play_async()
 
     async def stt(self):
-        if self.recorder is None:
+        if await asyncio.to_thread(self._get_recorder) is None:
             print("Audio recorder is not initialized.")
             return
 
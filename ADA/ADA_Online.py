@@ -3,17 +3,17 @@ import asyncio
 import json # Still used by Gemini responses/tools potentially
 # import base64 # Removed
 import pyaudio
-from RealtimeSTT import AudioToTextRecorder
-import torch  # Import the torch library
 import re
 from google.genai import types
 import asyncio
 from google import genai
 import os
 from google.genai.types import Tool, GoogleSearch, Part, Blob, Content
-import python_weather
-import googlemaps # Added for travel duration
 from datetime import datetime # Added for travel duration
+import shared_clients # ada_app/server/shared_clients.py, on sys.path via main_online*.py
+import tool_registry # ada_app/server/tool_registry.py, on sys.path via main_online*.py
+from tool_registry import ToolRegistry
+from .realtime_audio import LazyRealtimeAudio # RealtimeSTT is imported on first use
 from dotenv import load_dotenv # Added for API key loading
 
 # --- Load Environment Variables ---
@@ -45,18 +45,9 @@ CHANNELS = 1
 RECEIVE_SAMPLE_RATE = 24000 # For Gemini TTS output (24kHz)
 CHUNK_SIZE = 1024
 
-class ADA:
+class ADA(LazyRealtimeAudio):
     def __init__(self):
         print("initializing...")
-
-        # Check for CUDA availability
-        if torch.cuda.is_available():
-            self.device = "cuda"
-            print("CUDA is available. Using GPU.")
-        else:
-            self.device = "cpu"
-            print("CUDA is not available. Using CPU.")
-
         # --- Initialize Google GenAI Client ---
         self.client = genai.Client(api_key=GOOGLE_API_KEY, http_options={'api_version': 'v1beta'})
         self.model = GEMINI_LLM_MODEL # Use the loaded environment variable
@@ -70,32 +61,8 @@ class ADA:
             Any prompts that need current or recent data always use the search tool.
             """
         
-        # --- Function Declarations (Added get_travel_duration_func) ---
-        self.get_weather_func = types.FunctionDeclaration(
-            name="get_weather",
-            description="Get the current weather conditions (temperature, precipitation, description) for a specified city and state/country (e.g., 'Vinings, GA', 'London, UK').",
-            parameters=types.Schema(
-                type=types.Type.OBJECT, properties={"location": types.Schema(type=types.Type.STRING, description="The city and state, e.g., San Francisco, CA or Vinings, GA")}, required=["location"]
-            )
-        )
-        self.get_travel_duration_func = types.FunctionDeclaration(
-            name="get_travel_duration",
-            description="Calculates the estimated travel duration between a specified origin and destination using Google Maps. Considers current traffic for driving mode.",
-            parameters=types.Schema(
-                type=types.Type.OBJECT, properties={
-                    "origin": types.Schema(type=types.Type.STRING, description="The starting address or place name."),
-                    "destination": types.Schema(type=types.Type.STRING, description="The destination address or place name."),
-                    "mode": types.Schema(type=types.Type.STRING, description="Optional: Mode of transport ('driving', 'walking', etc.). Defaults to 'driving'.")
-                }, required=["origin", "destination"]
-            )
-        )
-        # --- End Function Declarations ---
-
-        # --- Map function names to actual methods (Added get_travel_duration) ---
-        self.available_functions = {
-            "get_weather": self.get_weather,
-            "get_travel_duration": self.get_travel_duration # Added mapping
-        }
+        # --- Tools: declarations are generated from the @tool methods (get_weather, get_travel_duration) ---
+        self.tools = ToolRegistry.for_instance(self)
 
         # --- Google Search Tool (Grounding) ---
         self.google_search_tool = Tool(
@@ -109,10 +76,7 @@ class ADA:
             ),
             response_modalities=["TEXT"],
             # ---> Updated tools list <---
-            tools=[self.google_search_tool, types.Tool(code_execution=types.ToolCodeExecution,function_declarations=[
-                self.get_weather_func,
-                self.get_travel_duration_func # Add the new function here
-                ])]
+            tools=[self.google_search_tool, types.Tool(code_execution=types.ToolCodeExecution,function_declarations=self.tools.declarations())]
         )
         # --- End Configuration ---
 
@@ -133,12 +97,8 @@ class ADA:
             'min_gap_between_recordings': 0,
         }
 
-        # --- Initialize Recorder and PyAudio (Kept original) ---
-        try:
-            self.recorder = AudioToTextRecorder(**self.recorder_config)
-        except Exception as e:
-            print(f"Error initializing AudioToTextRecorder: {e}")
-            self.recorder = None
+        # --- Recorder is built on first use in stt(); initialize PyAudio ---
+        self.recorder = None
 
         try:
             self.pya = pyaudio.PyAudio()
@@ -149,24 +109,25 @@ class ADA:
 
     # --- Function Implementations ---
 
+    @tool_registry.weather_tool
     async def get_weather(self, location: str) -> dict | None:
         """ Fetches current weather. (Removed SocketIO emit) """
-        async with python_weather.Client(unit=python_weather.IMPERIAL) as client:
-            try:
-                weather = await client.get(location)
-                weather_data = {
-                    'location': location,
-                    'current_temp_f': weather.temperature,
-                    'precipitation': weather.precipitation,
-                    'description': weather.description,
-                }
-                print(f"Weather data fetched: {weather_data}")
-                # --- SocketIO Emit Removed ---
-                return weather_data # Return data for Gemini
+        client = await shared_clients.get_weather_client() # Long-lived, shared by every session
+        try:
+            weather = await client.get(location)
+            weather_data = {
+                'location': location,
+                'current_temp_f': weather.temperature,
+                'precipitation': weather.precipitation,
+                'description': weather.description,
+            }
+            print(f"Weather data fetched: {weather_data}")
+            # --- SocketIO Emit Removed ---
+            return weather_data # Return data for Gemini
 
-            except Exception as e:
-                print(f"Error fetching weather for {location}: {e}")
-                return {"error": f"Could not fetch weather for {location}."} # Return error info
+        except Exception as e:
+            print(f"Error fetching weather for {location}: {e}")
+            return {"error": f"Could not fetch weather for {location}."} # Return error info
 
     # --- Added Travel Duration Functions (from reference, removed SocketIO emit) ---
     def _sync_get_travel_duration(self, origin: str, destination: str, mode: str = "driving") -> str:
@@ -174,8 +135,9 @@ class ADA:
         if not MAPS_API_KEY or MAPS_API_KEY == "YOUR_PROVIDED_KEY": # Check the actual key
             print("Error: Google Maps API Key is missing or invalid.")
             return "Error: Missing or invalid Google Maps API Key configuration."
+        import googlemaps # Deferred: only loaded on the first directions request (needed for googlemaps.exceptions)
         try:
-            gmaps = googlemaps.Client(key=MAPS_API_KEY) # Use the loaded key
+            gmaps = shared_clients.get_maps_client(MAPS_API_KEY) # Use the loaded key
             now = datetime.now()
             print(f"Requesting directions: From='{origin}', To='{destination}', Mode='{mode}'")
             directions_result = gmaps.directions(origin, destination, mode=mode, departure_time=now)
@@ -202,6 +164,7 @@ class ADA:
             print(f"An unexpected error occurred during travel duration lookup: {e}")
             return f"An unexpected error occurred: {e}"
 
+    @tool_registry.travel_duration_tool
     async def get_travel_duration(self, origin: str, destination: str, mode: str = "driving") -> dict:
         """ Async wrapper to get travel duration. (Removed SocketIO emit) """
         print(f"Received request for travel duration from: {origin} to: {destination}, Mode: {mode}")
@@ -209,14 +172,14 @@ class ADA:
             mode = "driving"
 
         try:
-            result_string = await asyncio.to_thread(
+            result_string = await tool_registry.run_blocking(
                 self._sync_get_travel_duration, origin, destination, mode
             )
             # --- SocketIO Emit Removed ---
             return {"duration_result": result_string} # Return result for Gemini
 
         except Exception as e:
-            print(f"Error calling _sync_get_travel_duration via to_thread: {e}")
+            print(f"Error calling _sync_get_travel_duration on the tool executor: {e}")
             return {"duration_result": f"Failed to execute travel duration request: {e}"}
     # --- End Travel Duration Functions ---
 
@@ -277,36 +240,7 @@ class ADA:
                         try:
                             # --- Handle Tool Calls (Function Calling) ---
                             if response.tool_call:
-                                function_call_details = response.tool_call.function_calls[0]
-                                tool_call_id = function_call_details.id
-                                tool_call_name = function_call_details.name
-                                tool_call_args = dict(function_call_details.args)
-
-                                print(f"--- Received Tool Call: {tool_call_name} with args: {tool_call_args} (ID: {tool_call_id}) ---")
-
-                                if tool_call_name in self.available_functions:
-                                    function_to_call = self.available_functions[tool_call_name]
-                                    try:
-                                        # Execute the corresponding async function
-                                        function_result = await function_to_call(**tool_call_args)
-
-                                        # Construct the response to send back to Gemini
-                                        func_resp = types.FunctionResponse(
-                                            id=tool_call_id,
-                                            name=tool_call_name,
-                                            response={"content": function_result} # Send back the result dictionary
-                                        )
-                                        print(f"--- Sending Tool Response for {tool_call_name} (ID: {tool_call_id}) ---")
-                                        # Send the function result back, don't end the turn yet
-                                        await session.send(input=func_resp, end_of_turn=False)
-
-                                    except Exception as e:
-                                        print(f"Error executing function {tool_call_name}: {e}")
-                                        # Decide how to handle function execution errors (e.g., send error back?)
-                                        # For now, just print and continue waiting for Gemini's next step
-                                else:
-                                    print(f"Error: Unknown function called by Gemini: {tool_call_name}")
-                                    # Decide how to handle unknown function calls
+                                await self.tools.answer_tool_call(session, response.tool_call)
                                 continue # Move to next response chunk after handling tool call
 
                             # --- Handle Text Responses ---
@@ -477,7 +411,7 @@ class ADA:
 
     async def stt(self):
         """ Listens via microphone and puts transcribed text onto input_queue. (Kept Original Logic) """
-        if self.recorder is None:
+        if await asyncio.to_thread(self._get_recorder) is None:
             print("Audio recorder (RealtimeSTT) is not initialized.")
             return
 
@@ -497,46 +431,13 @@ class ADA:
                 print(f"Error in STT loop: {e}")
                 # Add a small delay to prevent high CPU usage on continuous errors
                 await asyncio.sleep(0.5)
-# --- End of ADA Class ---
 
-# --- Main Execution Block (Example) ---
-async def main():
-    print("Starting Ada Assistant...")
-    ada = ADA()
-
-    if ada.pya is None or ada.recorder is None:
-         print("Failed to initialize audio components. Exiting.")
-         return
-
-    # Create tasks for each concurrent operation
-    tasks = [
-        asyncio.create_task(ada.stt()),          # Speech to Text -> input_queue
-        asyncio.create_task(ada.send_prompt()),  # input_queue -> Gemini (handles tools) -> response_queue
-        asyncio.create_task(ada.tts()),          # response_queue -> Gemini TTS -> audio_queue
-        asyncio.create_task(ada.play_audio()),   # audio_queue -> Speaker
-        # asyncio.create_task(ada.input_message()) # Optional: Uncomment for text input instead of STT
-    ]
-
-    # Run tasks concurrently
-    try:
-        await asyncio.gather(*tasks)
-    except asyncio.CancelledError:
-        print("Main tasks cancelled.")
-    finally:
-         print("Cleaning up...")
-         # Gracefully stop tasks if needed (though gather handles cancellation)
-         for task in tasks:
-              if not task.done():
-                   task.cancel()
-         await asyncio.gather(*tasks, return_exceptions=True) # Wait for cleanup
-         if ada.pya:
-              print("Terminating PyAudio.")
-              await asyncio.to_thread(ada.pya.terminate) # Clean up PyAudio resources
-
-if __name__ == "__main__":
-    try:
-        asyncio.run(main())
-    except KeyboardInterrupt:
-        print("\nExiting Ada Assistant...")
-    except Exception as e:
-         print(f"\nAn unexpected error occurred in main: {e}")
\ No newline at end of file
+    async def shutdown(self):
+        """ Releases what the session holds: pooled weather/HTTP clients and PyAudio. Called by the entry points on exit. """
+        for name, (calls, mean_seconds) in tool_registry.latency_summary().items():
+            print(f"Tool {name}: {calls} call(s), mean {mean_seconds * 1000:.0f} ms")
+        await shared_clients.close()
+        if self.pya:
+            print("Terminating PyAudio.")
+            await asyncio.to_thread(self.pya.terminate)
+# --- End of ADA Class ---
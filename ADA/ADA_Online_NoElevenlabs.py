@@ -1,21 +1,19 @@
 # --- Keep necessary imports ---
 import asyncio
 import pyaudio # Still needed for RealtimeSTT
-from RealtimeSTT import AudioToTextRecorder
-import torch
 import re
 from google.genai import types
 from google import genai
 import os
 from google.genai.types import Tool, GoogleSearch, Part, Blob, Content
-import python_weather
-import googlemaps
 from datetime import datetime
+import shared_clients # ada_app/server/shared_clients.py, on sys.path via main_online*.py
+import tool_registry # ada_app/server/tool_registry.py, on sys.path via main_online*.py
+from tool_registry import ToolRegistry
+from .realtime_audio import LazyRealtimeAudio
 from dotenv import load_dotenv
 
-# --- Add RealtimeTTS imports ---
-from RealtimeTTS import TextToAudioStream, SystemEngine # Using SystemEngine as per reference example
-# from RealtimeTTS import CoquiEngine # Uncomment if you want to use CoquiTTS (requires installation)
+# --- RealtimeSTT / RealtimeTTS are imported lazily on first use (see realtime_audio.LazyRealtimeAudio) ---
 
 # --- Load Environment Variables (Remove ElevenLabs key) ---
 load_dotenv()
@@ -37,18 +35,9 @@ CHANNELS = 1
 # RECEIVE_SAMPLE_RATE = 24000 # RealtimeTTS handles its own output rate
 # CHUNK_SIZE = 1024 # Less relevant for RealtimeTTS feed/play approach
 
-class ADA:
+class ADA(LazyRealtimeAudio):
     def __init__(self):
         print("initializing...")
-
-        # Check for CUDA availability
-        if torch.cuda.is_available():
-            self.device = "cuda"
-            print("CUDA is available. Using GPU.")
-        else:
-            self.device = "cpu"
-            print("CUDA is not available. Using CPU.")
-
         # --- Initialize Google GenAI Client (Keep) ---
         self.client = genai.Client(api_key=GOOGLE_API_KEY, http_options={'api_version': 'v1beta'})
         self.model = "gemini-2.0-flash-live-001"
@@ -62,32 +51,8 @@ class ADA:
             Any prompts that need current or recent data always use the search tool.
             """
 
-        # --- Function Declarations (Keep) ---
-        self.get_weather_func = types.FunctionDeclaration(
-            name="get_weather",
-            description="Get the current weather conditions (temperature, precipitation, description) for a specified city and state/country (e.g., 'Vinings, GA', 'London, UK').",
-            parameters=types.Schema(
-                type=types.Type.OBJECT, properties={"location": types.Schema(type=types.Type.STRING, description="The city and state, e.g., San Francisco, CA or Vinings, GA")}, required=["location"]
-            )
-        )
-        self.get_travel_duration_func = types.FunctionDeclaration(
-            name="get_travel_duration",
-            description="Calculates the estimated travel duration between a specified origin and destination using Google Maps. Considers current traffic for driving mode.",
-            parameters=types.Schema(
-                type=types.Type.OBJECT, properties={
-                    "origin": types.Schema(type=types.Type.STRING, description="The starting address or place name."),
-                    "destination": types.Schema(type=types.Type.STRING, description="The destination address or place name."),
-                    "mode": types.Schema(type=types.Type.STRING, description="Optional: Mode of transport ('driving', 'walking', etc.). Defaults to 'driving'.")
-                }, required=["origin", "destination"]
-            )
-        )
-        # --- End Function Declarations ---
-
-        # --- Map function names to actual methods (Keep) ---
-        self.available_functions = {
-            "get_weather": self.get_weather,
-            "get_travel_duration": self.get_travel_duration
-        }
+        # --- Tools: declarations are generated from the @tool methods (get_weather, get_travel_duration) ---
+        self.tools = ToolRegistry.for_instance(self)
 
         # --- Google Search Tool (Grounding) ---
         self.google_search_tool = Tool(
@@ -101,10 +66,7 @@ class ADA:
             ),
             response_modalities=["TEXT"],
             # ---> Updated tools list <---
-            tools=[self.google_search_tool, types.Tool(code_execution=types.ToolCodeExecution,function_declarations=[
-                self.get_weather_func,
-                self.get_travel_duration_func # Add the new function here
-                ])]
+            tools=[self.google_search_tool, types.Tool(code_execution=types.ToolCodeExecution,function_declarations=self.tools.declarations())]
         )
         # --- End Configuration ---
 
@@ -125,12 +87,8 @@ class ADA:
             'min_gap_between_recordings': 0,
         }
 
-        # --- Initialize Recorder and PyAudio (Keep) ---
-        try:
-            self.recorder = AudioToTextRecorder(**self.recorder_config)
-        except Exception as e:
-            print(f"Error initializing AudioToTextRecorder: {e}")
-            self.recorder = None
+        # --- Recorder is built on first use in stt(); initialize PyAudio ---
+        self.recorder = None
 
         try:
             # PyAudio might still be needed by RealtimeSTT or underlying STT engine
@@ -139,48 +97,39 @@ class ADA:
             print(f"Error initializing PyAudio: {e}")
             self.pya = None
 
-        # --- Initialize RealtimeTTS Engine and Stream ---
-        print("Initializing TTS Engine...")
-        try:
-            # Use SystemEngine for default OS TTS. Replace with CoquiEngine if preferred.
-            # self.engine = CoquiEngine(device=self.device) # Requires CoquiTTS installation
-            self.engine = SystemEngine()
-            self.stream = TextToAudioStream(self.engine)
-            print("TTS Engine Initialized.")
-        except Exception as e:
-            print(f"Error initializing RealtimeTTS: {e}")
-            self.engine = None
-            self.stream = None
-        # --- End TTS Initialization ---
+        # --- RealtimeTTS Engine and Stream are built on first use in tts() ---
+        self.engine = None
+        self.stream = None
 
         # --- End Initialization ---
 
-
     # --- Function Implementations (Keep get_weather, get_travel_duration) ---
+    @tool_registry.weather_tool
     async def get_weather(self, location: str) -> dict | None:
         """ Fetches current weather. """
-        async with python_weather.Client(unit=python_weather.IMPERIAL) as client:
-            try:
-                weather = await client.get(location)
-                weather_data = {
-                    'location': location,
-                    'current_temp_f': weather.temperature,
-                    'precipitation': weather.precipitation,
-                    'description': weather.description,
-                }
-                print(f"Weather data fetched: {weather_data}")
-                return weather_data
-            except Exception as e:
-                print(f"Error fetching weather for {location}: {e}")
-                return {"error": f"Could not fetch weather for {location}."}
+        client = await shared_clients.get_weather_client() # Long-lived, shared by every session
+        try:
+            weather = await client.get(location)
+            weather_data = {
+                'location': location,
+                'current_temp_f': weather.temperature,
+                'precipitation': weather.precipitation,
+                'description': weather.description,
+            }
+            print(f"Weather data fetched: {weather_data}")
+            return weather_data
+        except Exception as e:
+            print(f"Error fetching weather for {location}: {e}")
+            return {"error": f"Could not fetch weather for {location}."}
 
     def _sync_get_travel_duration(self, origin: str, destination: str, mode: str = "driving") -> str:
         """ Synchronous helper for Google Maps API call """
         if not MAPS_API_KEY or MAPS_API_KEY == "YOUR_PROVIDED_KEY":
             print("Error: Google Maps API Key is missing or invalid.")
             return "Error: Missing or invalid Google Maps API Key configuration."
+        import googlemaps # Deferred: only loaded on the first directions request (needed for googlemaps.exceptions)
         try:
-            gmaps = googlemaps.Client(key=MAPS_API_KEY)
+            gmaps = shared_clients.get_maps_client(MAPS_API_KEY)
             now = datetime.now()
             print(f"Requesting directions: From='{origin}', To='{destination}', Mode='{mode}'")
             directions_result = gmaps.directions(origin, destination, mode=mode, departure_time=now)
@@ -205,15 +154,16 @@ class ADA:
             print(f"An unexpected error occurred during travel duration lookup: {e}")
             return f"An unexpected error occurred: {e}"
 
+    @tool_registry.travel_duration_tool
     async def get_travel_duration(self, origin: str, destination: str, mode: str = "driving") -> dict:
         """ Async wrapper to get travel duration. """
         print(f"Received request for travel duration from: {origin} to: {destination}, Mode: {mode}")
         if not mode: mode = "driving"
         try:
-            result_string = await asyncio.to_thread(self._sync_get_travel_duration, origin, destination, mode)
+            result_string = await tool_registry.run_blocking(self._sync_get_travel_duration, origin, destination, mode)
             return {"duration_result": result_string}
         except Exception as e:
-            print(f"Error calling _sync_get_travel_duration via to_thread: {e}")
+            print(f"Error calling _sync_get_travel_duration on the tool executor: {e}")
             return {"duration_result": f"Failed to execute travel duration request: {e}"}
     # --- End Function Implementations ---
 
@@ -269,23 +219,7 @@ class ADA:
                         try:
                             # --- Handle Tool Calls (Function Calling) ---
                             if response.tool_call:
-                                function_call_details = response.tool_call.function_calls[0]
-                                tool_call_id = function_call_details.id
-                                tool_call_name = function_call_details.name
-                                tool_call_args = dict(function_call_details.args)
-                                print(f"--- Received Tool Call: {tool_call_name} with args: {tool_call_args} (ID: {tool_call_id}) ---")
-
-                                if tool_call_name in self.available_functions:
-                                    function_to_call = self.available_functions[tool_call_name]
-                                    try:
-                                        function_result = await function_to_call(**tool_call_args)
-                                        func_resp = types.FunctionResponse(
-                                            id=tool_call_id, name=tool_call_name, response={"content": function_result}
-                                        )
-                                        print(f"--- Sending Tool Response for {tool_call_name} (ID: {tool_call_id}) ---")
-                                        await session.send(input=func_resp, end_of_turn=False)
-                                    except Exception as e: print(f"Error executing function {tool_call_name}: {e}")
-                                else: print(f"Error: Unknown function called by Gemini: {tool_call_name}")
+                                await self.tools.answer_tool_call(session, response.tool_call)
                                 continue # Move to next response chunk
 
                             # --- Handle Text Responses ---
@@ -321,7 +255,7 @@ class ADA:
     # --- tts: Replaced with RealtimeTTS logic ---
     async def tts(self):
         """ Feeds text chunks to RealtimeTTS stream for synthesis and playback. """
-        if not self.stream:
+        if not await asyncio.to_thread(self._get_tts_stream):
             print("RealtimeTTS stream not initialized. Cannot perform TTS.")
             return
 
@@ -363,7 +297,7 @@ class ADA:
 
     async def stt(self):
         """ Listens via microphone and puts transcribed text onto input_queue. (Keep) """
-        if self.recorder is None:
+        if await asyncio.to_thread(self._get_recorder) is None:
             print("Audio recorder (RealtimeSTT) is not initialized.")
             return
 
@@ -381,47 +315,16 @@ class ADA:
             except Exception as e:
                 print(f"Error in STT loop: {e}")
                 await asyncio.sleep(0.5)
-# --- End of ADA Class ---
 
-# --- Main Execution Block (Updated for RealtimeTTS) ---
-async def main():
-    print("Starting Ada Assistant...")
-    ada = ADA()
-
-    if ada.pya is None or ada.recorder is None or ada.stream is None:
-         print("Failed to initialize audio/TTS components. Exiting.")
-         return
-
-    # Create tasks for each concurrent operation (Removed play_audio)
-    tasks = [
-        asyncio.create_task(ada.stt()),          # Speech to Text -> input_queue
-        asyncio.create_task(ada.send_prompt()),  # input_queue -> Gemini (handles tools) -> response_queue
-        asyncio.create_task(ada.tts()),          # response_queue -> RealtimeTTS (feed + play_async)
-        # asyncio.create_task(ada.input_message()) # Optional: Uncomment for text input instead of STT
-    ]
-
-    # Run tasks concurrently
-    try:
-        await asyncio.gather(*tasks)
-    except asyncio.CancelledError:
-        print("Main tasks cancelled.")
-    finally:
-         print("Cleaning up...")
-         if ada.stream:
-             print("Stopping TTS Stream...")
-             ada.stream.stop() # Ensure TTS stream is stopped
-         for task in tasks:
-              if not task.done(): task.cancel()
-         await asyncio.gather(*tasks, return_exceptions=True)
-         if ada.pya:
-              print("Terminating PyAudio.")
-              # Use run_in_executor for thread safety if needed, or simple to_thread
-              await asyncio.to_thread(ada.pya.terminate)
-
-if __name__ == "__main__":
-    try:
-        asyncio.run(main())
-    except KeyboardInterrupt:
-        print("\nExiting Ada Assistant...")
-    except Exception as e:
-         print(f"\nAn unexpected error occurred in main: {e}")
\ No newline at end of file
+    async def shutdown(self):
+        """ Releases what the session holds: pooled weather/HTTP clients and PyAudio. Called by the entry points on exit. """
+        for name, (calls, mean_seconds) in tool_registry.latency_summary().items():
+            print(f"Tool {name}: {calls} call(s), mean {mean_seconds * 1000:.0f} ms")
+        if self.stream:
+            print("Stopping TTS Stream...")
+            self.stream.stop() # Ensure TTS stream is stopped
+        await shared_clients.close()
+        if self.pya:
+            print("Terminating PyAudio.")
+            await asyncio.to_thread(self.pya.terminate)
+# --- End of ADA Class ---
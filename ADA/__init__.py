@@ -0,0 +1,6 @@
+# ADA/__init__.py (CLI assistants; shares its support modules with the web server)
+#
+# shared_clients and tool_registry live once, in ada_app/server, where the web server
+# imports them flat. The entry points in the project root (main_online.py,
+# main_online_noelevenlabs.py) put that directory on sys.path before importing this
+# package; importing it has no side effects of its own.
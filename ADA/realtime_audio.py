@@ -0,0 +1,36 @@
+# ADA/realtime_audio.py (RealtimeSTT / RealtimeTTS built on first use, shared by the CLI assistants)
+#
+# Importing RealtimeSTT loads Whisper and torch, which takes seconds, so nothing is
+# imported until an assistant actually listens or speaks.
+
+
+class LazyRealtimeAudio:
+    """
+    Mixin for the CLI ADA classes. Expects self.recorder_config and initializes
+    self.recorder, self.engine and self.stream to None in __init__.
+    """
+    def _get_recorder(self):
+        """ Builds the RealtimeSTT recorder on first use (imports RealtimeSTT and loads the Whisper model). """
+        if self.recorder is None:
+            from RealtimeSTT import AudioToTextRecorder
+            try:
+                self.recorder = AudioToTextRecorder(**self.recorder_config)
+            except Exception as e:
+                print(f"Error initializing AudioToTextRecorder: {e}")
+        return self.recorder
+
+    def _get_tts_stream(self):
+        """ Builds the RealtimeTTS engine and stream on first use (imports RealtimeTTS). Returns None on failure. """
+        if self.stream is None:
+            print("Initializing TTS Engine...")
+            try:
+                from RealtimeTTS import TextToAudioStream, SystemEngine
+                # from RealtimeTTS import CoquiEngine # Uncomment if you want to use CoquiTTS (requires installation)
+                self.engine = SystemEngine() # Default OS TTS; CoquiEngine() is an alternative
+                self.stream = TextToAudioStream(self.engine)
+                print("TTS Engine Initialized.")
+            except Exception as e:
+                print(f"Error initializing RealtimeTTS: {e}")
+                self.engine = None
+                self.stream = None
+        return self.stream
@@ -57,6 +57,7 @@ function App() {
   const audioContext = useRef(null);
   const audioQueue = useRef([]);
   const isPlaying = useRef(false);
+  const currentSource = useRef(null); // Chunk being played, so stop_audio can cut it off
   const userRequestedStop = useRef(false);
   const restartTimer = useRef(null);
   const adaMessageIndex = useRef(-1);
@@ -158,17 +159,28 @@ function App() {
     isPlaying.current = true;
     setVisualizerStatus(VISUALIZER_STATUS.SPEAKING);
     setStatusText("Ada is speaking...");
-    const base64Chunk = audioQueue.current.shift();
+    const audioChunk = audioQueue.current.shift();
 
     try {
-      const binaryString = window.atob(base64Chunk);
-      const len = binaryString.length;
-      const bytes = new Uint8Array(len);
-      for (let i = 0; i < len; i++) {
-        bytes[i] = binaryString.charCodeAt(i);
+      let bytes;
+      if (typeof audioChunk === "string") {
+        // Legacy servers send base64 text
+        const binaryString = window.atob(audioChunk);
+        const len = binaryString.length;
+        bytes = new Uint8Array(len);
+        for (let i = 0; i < len; i++) {
+          bytes[i] = binaryString.charCodeAt(i);
+        }
+      } else {
+        // Binary attachment (ArrayBuffer), negotiated via `binary_audio` on connect
+        bytes = new Uint8Array(audioChunk);
       }
       // Assuming PCM 16-bit signed little-endian (common from ElevenLabs pcm_24000)
-      const pcmData = new Int16Array(bytes.buffer);
+      const pcmData = new Int16Array(
+        bytes.buffer,
+        bytes.byteOffset,
+        Math.floor(bytes.byteLength / 2)
+      );
       const floatData = new Float32Array(pcmData.length);
       for (let i = 0; i < pcmData.length; i++) {
         floatData[i] = pcmData[i] / 32768.0; // Convert to [-1.0, 1.0] range
@@ -184,6 +196,7 @@ function App() {
       source.buffer = audioBuffer;
       source.connect(audioContext.current.destination);
       source.onended = () => {
+        currentSource.current = null;
         isPlaying.current = false;
         if (audioQueue.current.length === 0) {
           // Only set idle if not actively listening
@@ -204,6 +217,7 @@ function App() {
           playNextAudioChunkRef.current();
         }
       };
+      currentSource.current = source;
       source.start(); // Play the sound now
     } catch (error) {
       console.error("Error processing or playing audio chunk:", error);
@@ -495,6 +509,7 @@ function App() {
     socket.current = io(SERVER_URL, {
       reconnectionAttempts: 5, // Try to reconnect a few times
       transports: ["websocket"], // Prefer WebSocket
+      auth: { binary_audio: true }, // Ask for raw PCM attachments instead of base64 text
     });
 
     // --- Socket Event Handlers ---
@@ -592,6 +607,18 @@ function App() {
       }
     };
 
+    // Barge-in: the server cancelled the answer, drop queued audio and stop the current chunk
+    const handleStopAudio = () => {
+      audioQueue.current = [];
+      if (currentSource.current) {
+        try {
+          currentSource.current.stop(); // onended resets isPlaying and the status
+        } catch (e) {
+          console.warn("Error stopping audio source:", e);
+        }
+      }
+    };
+
     // **** ADD WEATHER UPDATE HANDLER ****
     const handleWeatherUpdate = (data) => {
       console.log("Received weather update:", data);
@@ -657,6 +684,7 @@ function App() {
     socket.current.on("error", handleErrorEvent);
     socket.current.on("receive_text_chunk", handleTextChunk);
     socket.current.on("receive_audio_chunk", handleAudioChunk);
+    socket.current.on("stop_audio", handleStopAudio);
     socket.current.on("weather_update", handleWeatherUpdate); // Listen for weather
     socket.current.on("map_update", handleMapUpdate); // Listen for map
     socket.current.on("executable_code_received", handleExecutableCode); // Listen for code
@@ -674,6 +702,7 @@ function App() {
         socket.current.off("error", handleErrorEvent);
         socket.current.off("receive_text_chunk", handleTextChunk);
         socket.current.off("receive_audio_chunk", handleAudioChunk);
+        socket.current.off("stop_audio", handleStopAudio);
         socket.current.off("weather_update", handleWeatherUpdate);
         socket.current.off("map_update", handleMapUpdate);
         socket.current.off("executable_code_received", handleExecutableCode);
@@ -8,6 +8,7 @@ function VideoFeed({ isVisible, onClose, socket }) {
   const streamRef = useRef(null);
   const canvasRef = useRef(null);
   const intervalRef = useRef(null);
+  const captureIntervalMsRef = useRef(1000); // Adjusted by the server via 'video_capture_rate'
   const [hasError, setHasError] = useState(false);
   const [errorMessage, setErrorMessage] = useState("");
   const [videoSource, setVideoSource] = useState("webcam"); // 'webcam' or 'screen'
@@ -33,16 +34,37 @@ function VideoFeed({ isVisible, onClose, socket }) {
     const context = canvas.getContext("2d");
     context.drawImage(video, 0, 0, canvas.width, canvas.height);
 
-    try {
-      const frameDataUrl = canvas.toDataURL("image/jpeg", 0.7);
+    // Send the JPEG as a binary attachment: no data URL string, no base64 on either side
+    canvas.toBlob(
+      async (blob) => {
+        if (!blob) return;
+        try {
+          const frameBuffer = await blob.arrayBuffer();
+          if (socket.current?.connected) {
+            socket.current.emit("send_video_frame_binary", frameBuffer);
+          }
+        } catch (e) {
+          console.error("Error converting canvas to JPEG bytes:", e);
+        }
+      },
+      "image/jpeg",
+      0.7
+    );
+  }, [socket]);
 
-      if (socket.current.connected) {
-        socket.current.emit("send_video_frame", { frame: frameDataUrl });
+  // Server-side rate control: capture only as often as frames will actually be sent
+  const handleCaptureRate = useCallback(
+    (data) => {
+      const intervalMs = data?.interval_ms;
+      if (!intervalMs || intervalMs === captureIntervalMsRef.current) return;
+      captureIntervalMsRef.current = intervalMs;
+      if (intervalRef.current) {
+        clearInterval(intervalRef.current);
+        intervalRef.current = setInterval(captureAndSendFrame, intervalMs);
       }
-    } catch (e) {
-      console.error("Error converting canvas to data URL:", e);
-    }
-  }, [socket]);
+    },
+    [captureAndSendFrame]
+  );
 
   const stopVideoStream = useCallback(() => {
     if (streamRef.current) {
@@ -58,9 +80,10 @@ function VideoFeed({ isVisible, onClose, socket }) {
       intervalRef.current = null;
       console.log("Frame capture interval cleared.");
     }
+    socket?.current?.off("video_capture_rate", handleCaptureRate);
     setHasError(false);
     setErrorMessage("");
-  }, []);
+  }, [socket, handleCaptureRate]);
 
   const startVideoStream = useCallback(async () => {
     if (streamRef.current) return;
@@ -93,7 +116,11 @@ function VideoFeed({ isVisible, onClose, socket }) {
             await videoRef.current.play();
             console.log(`${videoSource} stream started and playing.`);
             if (intervalRef.current) clearInterval(intervalRef.current);
-            intervalRef.current = setInterval(captureAndSendFrame, 1000);
+            intervalRef.current = setInterval(
+              captureAndSendFrame,
+              captureIntervalMsRef.current
+            );
+            socket?.current?.on("video_capture_rate", handleCaptureRate);
             console.log("Frame capture interval started.");
           } catch (playError) {
             console.error(`Error playing ${videoSource} stream:`, playError);
@@ -126,7 +153,7 @@ function VideoFeed({ isVisible, onClose, socket }) {
       }
       stopVideoStream();
     }
-  }, [videoSource, captureAndSendFrame, stopVideoStream]);
+  }, [videoSource, captureAndSendFrame, stopVideoStream, socket, handleCaptureRate]);
 
   useEffect(() => {
     if (!isVisible) {
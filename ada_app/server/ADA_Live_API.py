@@ -1,19 +1,25 @@
 # server/ADA_Online.py (Revised: Emits moved into functions)
 import asyncio
-import websockets
-import json
 import base64
-import torch
-import python_weather
 import asyncio
 from google.genai import types
 from google.genai.types import Tool, GoogleSearch, Part, Blob, Content
 import asyncio
 from google import genai 
-import googlemaps
 from datetime import datetime 
 import os
+import time
 from dotenv import load_dotenv
+from text_coalescer import TextCoalescer
+from frame_preprocess import FramePreprocessor
+import tool_registry
+from tool_registry import ToolRegistry
+from video_rate import AdaptiveFrameRate
+import shared_clients
+import tool_cache
+from elevenlabs_stream import ElevenLabsConnection, multi_stream_uri
+from playback import PlaybackTracker
+import metrics
 
 load_dotenv()
 
@@ -30,51 +36,22 @@ CHANNELS = 1
 RECEIVE_SAMPLE_RATE = 24000
 CHUNK_SIZE = 1024
 MAX_QUEUE_SIZE = 10
+LIVE_DRAIN_TIMEOUT_SECONDS = 5.0 # Max wait for an interrupted answer's turn_complete before the next answer is read
 
 class ADA:
-    def __init__(self, socketio_instance=None, client_sid=None):
+    def __init__(self, socketio_instance=None, client_sid=None, client=None):
         # --- Initialization ---
         print("initializing ADA for web...")
         self.socketio = socketio_instance
         self.client_sid = client_sid
         self.Maps_api_key = MAPS_API_KEY
 
-        if torch.cuda.is_available():
-            self.device = "cuda"
-            print("CUDA is available. Using GPU.")
-        else:
-            self.device = "cpu"
-            print("CUDA is not available. Using CPU.")
-
-        self.client = genai.Client(api_key=GOOGLE_API_KEY, http_options={'api_version': 'v1beta'})
+        # A stand-in client (e.g. test/fake_services.py) can be passed in to run without the live service
+        self.client = client or genai.Client(api_key=GOOGLE_API_KEY, http_options={'api_version': 'v1beta'})
         self.model = "gemini-2.0-flash-live-001" # Or your chosen model
 
-        # --- Function Declarations (Keep as before) ---
-        self.get_weather_func = types.FunctionDeclaration(
-            name="get_weather",
-            description="Get the current weather conditions (temperature, precipitation, description) for a specified city and state/country (e.g., 'Vinings, GA', 'London, UK').",
-            parameters=types.Schema(
-                type=types.Type.OBJECT, properties={"location": types.Schema(type=types.Type.STRING, description="The city and state, e.g., San Francisco, CA or Vinings, GA")}, required=["location"]
-            )
-        )
-        self.get_travel_duration_func = types.FunctionDeclaration(
-            name="get_travel_duration",
-            description="Calculates the estimated travel duration between a specified origin and destination using Google Maps. Considers current traffic for driving mode.",
-            parameters=types.Schema(
-                type=types.Type.OBJECT, properties={
-                    "origin": types.Schema(type=types.Type.STRING, description="The starting address or place name."),
-                    "destination": types.Schema(type=types.Type.STRING, description="The destination address or place name."),
-                    "mode": types.Schema(type=types.Type.STRING, description="Optional: Mode of transport ('driving', 'walking', etc.). Defaults to 'driving'.")
-                }, required=["origin", "destination"]
-            )
-        )
-        # --- End Function Declarations ---
-
-        # Map function names to actual methods
-        self.available_functions = {
-            "get_weather": self.get_weather,
-            "get_travel_duration": self.get_travel_duration
-        }
+        # --- Tools: declarations are generated from the @tool methods (get_weather, get_travel_duration) ---
+        self.tools = ToolRegistry.for_instance(self)
 
         # System behavior prompt (Keep as before)
         self.system_behavior = """
@@ -98,10 +75,7 @@ class ADA:
             ),
             response_modalities=["TEXT"],
             # ---> ADD the new function declaration to the tools list <---
-            tools=[self.google_search_tool, types.Tool(code_execution=types.ToolCodeExecution,function_declarations=[
-                self.get_weather_func,
-                self.get_travel_duration_func # Add the new function here
-                ])]
+            tools=[self.google_search_tool, types.Tool(code_execution=types.ToolCodeExecution,function_declarations=self.tools.declarations())]
         )
         # --- End Configuration ---
 
@@ -113,34 +87,64 @@ class ADA:
         self.audio_output_queue = asyncio.Queue()
 
         self.gemini_session = None
-        self.tts_websocket = None
+        self.tts_connection = None # Persistent ElevenLabs connection, opened by run_tts_and_audio_out
         self.tasks = []
+        self._uses_shared_clients = False
+        self.binary_audio = False # Set per client on connect: send PCM as binary attachments instead of base64 text
+        self.text_coalescer = TextCoalescer(self._emit_text_chunk) # Batches receive_text_chunk emits per session
+        self.frame_preprocessor = FramePreprocessor() # Resizes frames and spots near-duplicates
+        self.video_rate = AdaptiveFrameRate(self._emit_capture_rate) # Paces frames sent to the Live session
+        self.turn_task = None # The turn being answered; cancelled on barge-in
+        self._unfinished_turn = False # An answer's remaining messages are still in the Live session
+        self.playback = PlaybackTracker(sample_rate=RECEIVE_SAMPLE_RATE) # Estimates whether the client is still playing audio
         # --- End of __init__ ---
 
+    def _emit_text_chunk(self, text):
+        if self.socketio and self.client_sid:
+            self.socketio.emit('receive_text_chunk', {'text': text}, room=self.client_sid)
+
+    def _emit_capture_rate(self, fps):
+        """ Tells the client how often to capture webcam frames, matching what will actually be sent. """
+        if self.socketio and self.client_sid:
+            self.socketio.emit('video_capture_rate', {'fps': fps, 'interval_ms': int(1000 / fps) if fps > 0 else 0}, room=self.client_sid)
+
+    def _audio_payload(self, audio_bytes):
+        """ Builds the receive_audio_chunk payload in the format this client negotiated. """
+        if self.binary_audio:
+            return {'audio': audio_bytes}
+        return {'audio': base64.b64encode(audio_bytes).decode('utf-8')}
+
+    async def _fetch_weather(self, location: str) -> dict:
+        client = await shared_clients.get_weather_client() # Long-lived, shared by every session
+        weather = await client.get(location)
+        weather_data = {
+            'location': location,
+            'current_temp_f': weather.temperature,
+            'precipitation': weather.precipitation, # Added precipitation
+            'description': weather.description,
+        }
+        print(f"Weather data fetched: {weather_data}")
+        return weather_data
+
+    @tool_registry.weather_tool
     async def get_weather(self, location: str) -> dict | None:
-        """ Fetches current weather and emits update via SocketIO. """
-        async with python_weather.Client(unit=python_weather.IMPERIAL) as client:
-            try:
-                weather = await client.get(location)
-                weather_data = {
-                    'location': location,
-                    'current_temp_f': weather.temperature,
-                    'precipitation': weather.precipitation, # Added precipitation
-                    'description': weather.description,
-                }
-                print(f"Weather data fetched: {weather_data}")
+        """ Fetches current weather (cached per location for a few minutes) and emits update via SocketIO. """
+        try:
+            weather_data = await tool_cache.weather_cache.get_or_fetch(
+                tool_cache.normalize(location), lambda: self._fetch_weather(location)
+            )
 
-                # --- Emit weather_update from here ---
-                if self.socketio and self.client_sid:
-                    print(f"--- Emitting weather_update event for SID: {self.client_sid} ---")
-                    self.socketio.emit('weather_update', weather_data, room=self.client_sid)
-                # --- End Emit ---
+            # --- Emit weather_update from here ---
+            if self.socketio and self.client_sid:
+                print(f"--- Emitting weather_update event for SID: {self.client_sid} ---")
+                self.socketio.emit('weather_update', weather_data, room=self.client_sid)
+            # --- End Emit ---
 
-                return weather_data # Still return data for Gemini
+            return weather_data # Still return data for Gemini
 
-            except Exception as e:
-                print(f"Error fetching weather for {location}: {e}")
-                return {"error": f"Could not fetch weather for {location}."} # Return error info
+        except Exception as e:
+            print(f"Error fetching weather for {location}: {e}")
+            return {"error": f"Could not fetch weather for {location}."} # Return error info
 
     def _sync_get_travel_duration(self, origin: str, destination: str, mode: str = "driving") -> str:
         # ... (Keep the full implementation of this synchronous helper function) ...
@@ -148,7 +152,7 @@ class ADA:
             print("Error: Google Maps API Key is missing or invalid.")
             return "Error: Missing or invalid Google Maps API Key configuration."
          try:
-            gmaps = googlemaps.Client(key=self.Maps_api_key)
+            gmaps = shared_clients.get_maps_client(self.Maps_api_key)
             now = datetime.now()
             print(f"Requesting directions: From='{origin}', To='{destination}', Mode='{mode}'")
             directions_result = gmaps.directions(origin, destination, mode=mode, departure_time=now)
@@ -172,6 +176,7 @@ class ADA:
             print(f"An unexpected error occurred during travel duration lookup: {e}")
             return f"An unexpected error occurred: {e}"
 
+    @tool_registry.travel_duration_tool
     async def get_travel_duration(self, origin: str, destination: str, mode: str = "driving") -> dict:
         """ Async wrapper to get travel duration and emit map update via SocketIO. """
         print(f"Received request for travel duration from: {origin} to: {destination}, Mode: {mode}")
@@ -179,8 +184,10 @@ class ADA:
             mode = "driving"
 
         try:
-            result_string = await asyncio.to_thread(
-                self._sync_get_travel_duration, origin, destination, mode
+            result_string = await tool_cache.travel_cache.get_or_fetch(
+                tool_cache.normalize(origin, destination, mode),
+                lambda: tool_registry.run_blocking(self._sync_get_travel_duration, origin, destination, mode),
+                cacheable=lambda result: result.startswith("Estimated travel duration"),
             )
 
             # --- Emit map_update from here ---
@@ -196,7 +203,7 @@ class ADA:
             return {"duration_result": result_string} # Still return result for Gemini
 
         except Exception as e:
-            print(f"Error calling _sync_get_travel_duration via to_thread: {e}")
+            print(f"Error calling _sync_get_travel_duration on the tool executor: {e}")
             return {"duration_result": f"Failed to execute travel duration request: {e}"}
 
     async def clear_queues(self, text=""):
@@ -208,22 +215,64 @@ class ADA:
                 try: q.get_nowait()
                 except asyncio.QueueEmpty: break
 
+    async def interrupt(self, received_at):
+        """
+        Barge-in: cancels the turn being answered (receive loop and running tools), closes its
+        TTS context so no more audio is generated for it, then tells the client to stop
+        playing. Returns True if ADA was actually interrupted.
+        """
+        turn_running = self.turn_task is not None and not self.turn_task.done()
+        if not (turn_running or self.playback.is_playing() or not self.response_queue.empty()):
+            return False
+        print("--- Barge-in: interrupting the current answer ---")
+        if self.tts_connection and self.tts_connection.active_context:
+            # First, so no more of the old answer's audio is forwarded while the turn winds down
+            await self.tts_connection.cancel_context(self.tts_connection.active_context)
+        if turn_running:
+            self.turn_task.cancel()
+            await asyncio.wait({self.turn_task})
+            self.text_coalescer.end_turn() # Keep what was already shown in the chat box
+            self.video_rate.on_turn_finished()
+        await self.clear_queues()
+        self.playback.reset()
+        if self.socketio and self.client_sid:
+            self.socketio.emit('stop_audio', {}, room=self.client_sid)
+        metrics.BARGE_IN_TO_SILENCE.observe(time.perf_counter() - received_at)
+        return True
+
     async def process_input(self, message, is_final_turn_input=False):
-        """ Puts message and flag into the input queue. """
+        """ Puts message and flag into the input queue, interrupting ADA if it is still answering. """
+        received_at = time.perf_counter()
         print(f"Processing input: '{message}', Final Turn: {is_final_turn_input}")
+        self.video_rate.on_user_activity()
         if is_final_turn_input:
+             if message.strip():
+                 await self.interrupt(received_at)
              await self.clear_queues() # Clear only before final input
         await self.input_queue.put((message, is_final_turn_input))
 
     async def process_video_frame(self, frame_data_url):
-        """ Processes incoming video frame data URL """
+        """ Processes incoming video frame data URL (legacy base64 event) """
+        try:
+            header, encoded = frame_data_url.split(",", 1)
+            frame_bytes = base64.b64decode(encoded)
+        except ValueError:
+            print(f"Error splitting frame data URL: {frame_data_url[:100]}...") # Log prefix
+            return
+        except base64.binascii.Error as b64_error:
+            print(f"Error decoding base64 frame: {b64_error}")
+            return
+        await self.process_video_frame_bytes(frame_bytes)
+
+    async def process_video_frame_bytes(self, frame_bytes):
+        """ Queues raw JPEG bytes from the binary frame event, no string handling. """
         if self.video_frame_queue.full():
             try:
                 self.video_frame_queue.get_nowait() # Discard oldest
-                print("video")
+                self.video_frame_queue.task_done()
             except asyncio.QueueEmpty:
                 pass
-        await self.video_frame_queue.put(frame_data_url)
+        await self.video_frame_queue.put(bytes(frame_bytes))
 
     async def clear_video_queue(self):
         """ Clears any remaining frames from the video queue. """
@@ -243,7 +292,11 @@ class ADA:
             print("Video frame queue cleared.")
 
     async def run_video_sender(self):
-        """ Sends video frames from the queue to the Gemini session using dictionary format. """
+        """
+        Sends webcam frames to the Gemini session under adaptive rate control: only the newest
+        queued frame is considered, at most at the current target fps, downscaled, and
+        skipped if the scene hasn't changed since the last frame sent.
+        """
         print("Video frame sender task running...")
         while True:
             try:
@@ -251,46 +304,111 @@ class ADA:
                      await asyncio.sleep(0.1) # Short wait if session not ready
                      continue
 
-                frame_data_url = await self.video_frame_queue.get()
+                frame_bytes = await self.video_frame_queue.get()
+                while not self.video_frame_queue.empty(): # Older frames are stale: keep only the newest
+                    self.video_frame_queue.task_done()
+                    frame_bytes = self.video_frame_queue.get_nowait()
 
                 try:
-                    header, encoded = frame_data_url.split(",", 1)
-                    frame_bytes = base64.b64decode(encoded)
+                    if not self.video_rate.allow():
+                        continue
+                    prepared = await self.frame_preprocessor.prepare(frame_bytes, force=self.video_rate.is_keyframe_due())
+                    if prepared is None:
+                        self.video_rate.mark_duplicate()
+                        continue
                     frame_input = {
-                        "data": frame_bytes,      # Send raw bytes
-                        "mime_type": "image/jpeg" # Assuming JPEG from frontend
+                        "data": prepared[0],      # Send raw bytes
+                        "mime_type": prepared[1]
                     }
                     # Send frame dictionary WITHOUT marking end of turn
                     await self.gemini_session.send(input=frame_input, end_of_turn=False)
-                    print("Frame sent to Gemini.") # Verbose
-                except ValueError:
-                    print(f"Error splitting frame data URL: {frame_data_url[:100]}...") # Log prefix
-                except base64.binascii.Error as b64_error:
-                    print(f"Error decoding base64 frame: {b64_error}")
+                    self.video_rate.mark_sent()
                 except Exception as send_err:
                      print(f"Error sending frame dictionary to Gemini: {send_err}")
-
-                self.video_frame_queue.task_done()
+                finally:
+                    self.video_frame_queue.task_done()
 
             except asyncio.CancelledError:
-                print("Video frame sender task cancelled.")
+                print(f"Video frame sender task cancelled ({self.video_rate.sent} sent, {self.video_rate.dropped_rate} rate-limited, {self.video_rate.dropped_duplicate} duplicate).")
                 break
             except Exception as e:
                 print(f"Error in video frame sender loop: {e}")
                 await asyncio.sleep(1) # Avoid tight loop on errors
 
+    async def _drain_unfinished_turn(self):
+        """
+        The Live session keeps streaming an answer whose turn was interrupted. Reads and
+        discards it up to its turn_complete so it isn't mistaken for the new answer.
+        """
+        async def drain():
+            async for _ in self.gemini_session.receive():
+                pass
+        try:
+            await asyncio.wait_for(drain(), timeout=LIVE_DRAIN_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            print(f"Interrupted turn did not complete within {LIVE_DRAIN_TIMEOUT_SECONDS}s; continuing.")
+        self._unfinished_turn = False
+
+    async def _answer_turn(self, message):
+        """ Sends one final input and streams the answer (text, code, tool calls). Cancelled on barge-in. """
+        print(f"Sending FINAL text input to Gemini: {message}")
+        self.video_rate.on_turn_started() # Fewer frames while the model is answering
+        await self.gemini_session.send(input=message, end_of_turn=True)
+        print("Final text message sent to Gemini, waiting for response...")
+        if self._unfinished_turn:
+            await self._drain_unfinished_turn()
+        self._unfinished_turn = True # Until this turn's turn_complete has been read
+
+        full_response_text = ""
+        async for response in self.gemini_session.receive():
+            try:
+                if (response.server_content and
+                    response.server_content.model_turn and
+                    response.server_content.model_turn.parts and
+                    response.server_content.model_turn.parts[0].executable_code):
+
+                    executable_code = response.server_content.model_turn.parts[0].executable_code
+                    code_string = executable_code.code
+                    language = str(executable_code.language) # Get language as string
+                    print(f"--- Received Executable Code ({language}) ---")
+                    print(code_string)
+                    print("------------------------------------------")
+
+                    if self.socketio and self.client_sid:
+                        code_payload = {
+                            'code': code_string,
+                            'language': language
+                        }
+                        print(f"--- Emitting executable_code_received event for SID: {self.client_sid} ---")
+                        self.socketio.emit('executable_code_received', code_payload, room=self.client_sid)
+                    continue
+            except (AttributeError, IndexError, TypeError) as e:
+                pass
+
+            if response.tool_call:
+                # Every call in the batch runs concurrently; the responses go back in one message
+                await self.tools.answer_tool_call(self.gemini_session, response.tool_call)
+
+            elif response.text: # Handle text response
+                text_chunk = response.text
+                self.text_coalescer.add(text_chunk)
+                await self.response_queue.put(text_chunk)
+                full_response_text += text_chunk
+
+        self._unfinished_turn = False # receive() stops after turn_complete
+
+        self.text_coalescer.end_turn() # Emit any text still buffered for the chat box
+        self.video_rate.on_turn_finished()
+        await self.response_queue.put(None) # Signal TTS end
+        #print("\nEnd of Gemini response stream for this turn.")
+
     async def run_gemini_session(self):
         """Manages the Gemini conversation session, handling text, video, and tool calls."""
         print("Starting Gemini session manager...")
         try:
             async with self.client.aio.live.connect(model=self.model, config=self.config) as session:
                 self.gemini_session = session
-                print("Gemini session connected.")
-
-                video_sender_task = asyncio.create_task(self.run_video_sender())
-                # Add task immediately to ensure it's managed if session setup fails later
-                self.tasks.append(video_sender_task)
-                print("Video sender task started.")
+                print("Gemini session connected.") # run_video_sender (started in start_all_tasks) picks the session up
 
                 while True: # Loop to process text inputs
                     message, is_final_turn_input = await self.input_queue.get()
@@ -300,142 +418,74 @@ class ADA:
                         self.input_queue.task_done(); continue
 
                     if message.strip() and is_final_turn_input:
-                        print(f"Sending FINAL text input to Gemini: {message}")
-                        await self.gemini_session.send(input=message, end_of_turn=True)
-                        print("Final text message sent to Gemini, waiting for response...")
-
-                        full_response_text = ""
-                        async for response in self.gemini_session.receive():
-                            try:
-                                if (response.server_content and
-                                    response.server_content.model_turn and
-                                    response.server_content.model_turn.parts and
-                                    response.server_content.model_turn.parts[0].executable_code):
-
-                                    executable_code = response.server_content.model_turn.parts[0].executable_code
-                                    code_string = executable_code.code
-                                    language = str(executable_code.language) # Get language as string
-                                    print(f"--- Received Executable Code ({language}) ---")
-                                    print(code_string)
-                                    print("------------------------------------------")
-
-                                    if self.socketio and self.client_sid:
-                                        code_payload = {
-                                            'code': code_string,
-                                            'language': language
-                                        }
-                                        print(f"--- Emitting executable_code_received event for SID: {self.client_sid} ---")
-                                        self.socketio.emit('executable_code_received', code_payload, room=self.client_sid)
-                                    continue
-                            except (AttributeError, IndexError, TypeError) as e:
-                                pass
-
-                            if response.tool_call:
-                                function_call_details = response.tool_call.function_calls[0]
-                                tool_call_id = function_call_details.id
-                                tool_call_name = function_call_details.name
-                                tool_call_args = dict(function_call_details.args)
-
-                                #print(f"--- Received Tool Call ID: {tool_call_id} ---")
-                                #print(f"--- Received Tool Call: {tool_call_name} with args: {tool_call_args} ---")
-
-                                if tool_call_name in self.available_functions:
-                                    function_to_call = self.available_functions[tool_call_name]
-                                    try:
-                                        function_result = await function_to_call(**tool_call_args)
-
-                                        func_resp = types.FunctionResponse(
-                                            id=tool_call_id,
-                                            name=tool_call_name,
-                                            response={"content": function_result} # Send back the result
-                                        )
-                                        #print(f"--- Sending Tool Response for {tool_call_name} (ID: {tool_call_id}) ---")
-                                        await self.gemini_session.send(input=func_resp, end_of_turn=False)
-
-                                    except Exception as e:
-                                        print(f"Error executing function {tool_call_name}: {e}")
-                                        break # Exit inner loop on error
-                                else:
-                                    print(f"Error: Unknown function called: {tool_call_name}")
-                                    break # Exit inner loop
-
-                            elif response.text: # Handle text response
-                                text_chunk = response.text
-                                if self.socketio and self.client_sid:
-                                    self.socketio.emit('receive_text_chunk', {'text': text_chunk}, room=self.client_sid)
-                                await self.response_queue.put(text_chunk)
-                                full_response_text += text_chunk
-
-                        await self.response_queue.put(None) # Signal TTS end
-                        #print("\nEnd of Gemini response stream for this turn.")
+                        # Each turn runs as its own task so a new input can cancel it (see interrupt)
+                        self.turn_task = asyncio.create_task(self._answer_turn(message))
+                        await asyncio.wait({self.turn_task})
+                        if self.turn_task.cancelled():
+                            print("--- Turn interrupted by new input. ---")
+                        elif self.turn_task.exception() is not None:
+                            raise self.turn_task.exception()
+                        self.turn_task = None
 
                     self.input_queue.task_done() # Mark input processed
 
         except asyncio.CancelledError:
             print("Gemini session task cancelled.")
         except Exception as e:
+            self.text_coalescer.end_turn()
             print(f"Error in Gemini session manager: {e}")
             if self.socketio and self.client_sid:
                 self.socketio.emit('error', {'message': f'Gemini session error: {e}'}, room=self.client_sid)
         finally:
             print("Gemini session manager finished.")
+            if self.turn_task and not self.turn_task.done():
+                self.turn_task.cancel()
             video_task = next((t for t in self.tasks if hasattr(t, 'get_coro') and t.get_coro().__name__ == 'run_video_sender'), None)
             if video_task and not video_task.done():
                  print("Cancelling video sender task from Gemini session finally block.")
                  video_task.cancel()
             self.gemini_session = None # Mark session as inactive
 
+    def _on_tts_audio(self, audio_b64):
+        if self.socketio and self.client_sid:
+            # ElevenLabs already sends base64: decode only for binary clients, pass it through otherwise
+            payload = self._audio_payload(base64.b64decode(audio_b64)) if self.binary_audio else {'audio': audio_b64}
+            self.socketio.emit('receive_audio_chunk', payload, room=self.client_sid)
+            self.playback.on_audio(len(audio_b64) * 3 // 4)
+
     async def run_tts_and_audio_out(self):
+        """
+        Streams each turn's text into its own context on one persistent ElevenLabs connection.
+        The connection is opened before the first turn and reconnects by itself with backoff.
+        """
         print("Starting TTS and Audio Output manager...")
-        uri = f"wss://api.elevenlabs.io/v1/text-to-speech/{VOICE_ID}/stream-input?model_id=eleven_flash_v2_5&output_format=pcm_24000"
-        while True:
-            try:
-                async with websockets.connect(uri) as websocket:
-                    self.tts_websocket = websocket
-                    print("ElevenLabs WebSocket Connected.")
-                    await websocket.send(json.dumps({"text": " ", "voice_settings": {"stability": 0.4, "similarity_boost": 0.8, "speed": 1.1}, "xi_api_key": ELEVENLABS_API_KEY,}))
-                    async def tts_listener():
-                        try:
-                            while True:
-                                message = await websocket.recv()
-                                data = json.loads(message)
-                                if data.get("audio"):
-                                    audio_chunk = base64.b64decode(data["audio"])
-                                    if self.socketio and self.client_sid:
-                                        self.socketio.emit('receive_audio_chunk', {'audio': base64.b64encode(audio_chunk).decode('utf-8')}, room=self.client_sid)
-                                elif data.get('isFinal'): pass
-                        except websockets.exceptions.ConnectionClosedOK: print("TTS WebSocket listener closed normally.")
-                        except websockets.exceptions.ConnectionClosedError as e: print(f"TTS WebSocket listener closed error: {e}")
-                        except asyncio.CancelledError: print("TTS listener task cancelled.")
-                        except Exception as e: print(f"Error in TTS listener: {e}")
-                        finally: self.tts_websocket = None
-                    listener_task = asyncio.create_task(tts_listener())
-                    try:
-                        while True:
-                            text_chunk = await self.response_queue.get()
-                            if text_chunk is None:
-                                print("End of text stream signal received for TTS.")
-                                await websocket.send(json.dumps({"text": ""}))
-                                break
-                            if text_chunk:
-                                await websocket.send(json.dumps({"text": text_chunk + " ", "generation_config": { "chunk_length_schedule": [120, 160, 250, 290] }}))
-                            self.response_queue.task_done()
-                    except asyncio.CancelledError: print("TTS sender task cancelled.")
-                    except Exception as e: print(f"Error sending text to TTS: {e}")
-                    finally:
-                        if listener_task and not listener_task.done():
-                            try:
-                                if not listener_task.cancelled(): await asyncio.wait_for(listener_task, timeout=5.0)
-                            except asyncio.TimeoutError: print("Timeout waiting for TTS listener.")
-                            except asyncio.CancelledError: print("TTS listener task already cancelled.")
-            except websockets.exceptions.ConnectionClosedError as e: print(f"ElevenLabs WebSocket connection error: {e}. Reconnecting..."); await asyncio.sleep(5)
-            except asyncio.CancelledError: print("TTS main task cancelled."); break
-            except Exception as e: print(f"Error in TTS main loop: {e}"); await asyncio.sleep(5)
-            finally:
-                 if self.tts_websocket:
-                     try: await self.tts_websocket.close()
-                     except Exception: pass
-                 self.tts_websocket = None
+        self.tts_connection = ElevenLabsConnection(multi_stream_uri(VOICE_ID), ELEVENLABS_API_KEY, self._on_tts_audio)
+        context_id = None
+        try:
+            await self.tts_connection.start() # Pre-open: the first turn doesn't wait for a handshake
+            while True:
+                text_chunk = await self.response_queue.get()
+                self.response_queue.task_done()
+                if text_chunk is None:
+                    print("End of text stream signal received for TTS.")
+                    if context_id:
+                        await self.tts_connection.flush(context_id)
+                    context_id = None
+                    continue
+                if not text_chunk:
+                    continue
+                try:
+                    if context_id is None or context_id != self.tts_connection.active_context: # New turn, or the last one was interrupted
+                        context_id = await self.tts_connection.new_context()
+                    await self.tts_connection.send_text(context_id, text_chunk + " ")
+                except Exception as e: # One lost chunk must not end speech for the rest of the session
+                    print(f"Error sending text to TTS, dropping chunk: {e}")
+        except asyncio.CancelledError:
+            print("TTS main task cancelled.")
+        except Exception as e:
+            print(f"Error in TTS main loop: {e}")
+        finally:
+            await self.tts_connection.close()
 
     async def start_all_tasks(self):
         print("Starting ADA background tasks...")
@@ -444,6 +494,8 @@ class ADA:
             gemini_task = loop.create_task(self.run_gemini_session())
             tts_task = loop.create_task(self.run_tts_and_audio_out())
             self.tasks = [gemini_task, tts_task]
+            shared_clients.acquire()
+            self._uses_shared_clients = True
             # Add video sender task here if using streaming logic
             if hasattr(self, 'video_frame_queue'):
                video_sender_task = loop.create_task(self.run_video_sender())
@@ -459,9 +511,11 @@ class ADA:
             if task and not task.done(): task.cancel()
         await asyncio.gather(*[t for t in tasks_to_cancel if t], return_exceptions=True)
         self.tasks = []
-        if self.tts_websocket:
-            try: await self.tts_websocket.close(code=1000)
-            except Exception as e: print(f"Error closing TTS websocket during stop: {e}")
-            finally: self.tts_websocket = None
+        if self._uses_shared_clients:
+            self._uses_shared_clients = False
+            await shared_clients.release() # Last session on this loop closes the pooled clients
+        if self.tts_connection:
+            try: await self.tts_connection.close()
+            except Exception as e: print(f"Error closing TTS connection during stop: {e}")
         self.gemini_session = None
         print("ADA tasks stopped.")
\ No newline at end of file
@@ -1,21 +1,30 @@
 # server/ADA_Online.py (Revised: Emits moved into functions)
 import asyncio
 import base64
-import torch
-import python_weather
 import asyncio
 from google.genai import types
 import asyncio
 from google import genai 
-import googlemaps
 from datetime import datetime 
 import os
+import time
 from dotenv import load_dotenv
+from text_coalescer import TextCoalescer
+from sentence_segmenter import SentenceSegmenter
+import shared_clients
+import metrics
+from playback import PlaybackTracker
+import tool_cache
+from page_cache import page_cache
+import html_extract
+from chat_context import ChatContextManager
+from frame_preprocess import FramePreprocessor
+import tool_registry
+from tool_registry import ToolRegistry
 # import websockets # Removed, no longer used for TTS
 import json # Keep for potential Gemini tool/response usage
 from googlesearch import search as Google_Search_sync
 import aiohttp # For async HTTP requests
-from bs4 import BeautifulSoup # For HTML parsing
 
 load_dotenv()
 
@@ -42,6 +51,9 @@ CHANNELS = 1
 RECEIVE_SAMPLE_RATE = 24000 # Gemini TTS typically outputs at 24kHz
 CHUNK_SIZE = 1024 # Keep for other audio processing if any, not directly for Gemini non-streaming
 MAX_QUEUE_SIZE = 1 # Relates to response_queue or audio_output_queue, not directly Gemini
+SEARCH_DEADLINE_SECONDS = float(os.getenv("SEARCH_DEADLINE_SECONDS", "2.5")) # Whole search incl. page fetches
+SEARCH_MIN_FETCH_SECONDS = float(os.getenv("SEARCH_MIN_FETCH_SECONDS", "1.0")) # Page fetch budget left after a slow Google search
+TTS_MAX_CONCURRENT_REQUESTS = int(os.getenv("TTS_MAX_CONCURRENT_REQUESTS", "3")) # Sentences synthesized ahead of playback
 
 class ADA:
     def __init__(self, socketio_instance=None, client_sid=None):
@@ -51,52 +63,8 @@ class ADA:
         self.client_sid = client_sid
         self.Maps_api_key = MAPS_API_KEY
 
-        if torch.cuda.is_available():
-            self.device = "cuda"
-            print("CUDA is available. Using GPU.")
-        else:
-            self.device = "cpu"
-            print("CUDA is not available. Using CPU.")
-
-        # --- Function Declarations (Keep as before) ---
-        self.get_weather_func = types.FunctionDeclaration(
-            name="get_weather",
-            description="Get the current weather conditions (temperature, precipitation, description) for a specified city and state/country (e.g., 'Vinings, GA', 'London, UK').",
-            parameters=types.Schema(
-                type=types.Type.OBJECT, properties={"location": types.Schema(type=types.Type.STRING, description="The city and state, e.g., San Francisco, CA or Vinings, GA")}, required=["location"]
-            )
-        )
-        self.get_travel_duration_func = types.FunctionDeclaration(
-            name="get_travel_duration",
-            description="Calculates the estimated travel duration between a specified origin and destination using Google Maps. Considers current traffic for driving mode.",
-            parameters=types.Schema(
-                type=types.Type.OBJECT, properties={
-                    "origin": types.Schema(type=types.Type.STRING, description="The starting address or place name."),
-                    "destination": types.Schema(type=types.Type.STRING, description="The destination address or place name."),
-                    "mode": types.Schema(type=types.Type.STRING, description="Optional: Mode of transport ('driving', 'walking', etc.). Defaults to 'driving'.")
-                }, required=["origin", "destination"]
-            )
-        )
-        self.get_search_results_func = types.FunctionDeclaration(
-            name="get_search_results",
-            description="Performs a Google search for the given query and returns a list of top result URLs.",
-            parameters=types.Schema(
-                type=types.Type.OBJECT,
-                properties={
-                    "query": types.Schema(type=types.Type.STRING, description="The search term or question to search Google for.")
-                },
-                required=["query"]
-            )
-        )        
-        
-        # --- End Function Declarations ---
-
-        # Map function names to actual methods
-        self.available_functions = {
-            "get_weather": self.get_weather,
-            "get_travel_duration": self.get_travel_duration,
-            "get_search_results": self.get_search_results
-        }
+        # --- Tools: declarations are generated from the @tool methods below ---
+        self.tools = ToolRegistry.for_instance(self)
 
         # System behavior prompt (Keep as before)
         self.system_behavior = """
@@ -111,20 +79,18 @@ class ADA:
         self.config = types.GenerateContentConfig(
             system_instruction=self.system_behavior,
             tools=[  # <--- Start a list here
-                types.Tool(function_declarations=[
-                    self.get_weather_func,
-                    self.get_travel_duration_func,
-                    self.get_search_results_func
-                ])
+                types.Tool(function_declarations=self.tools.declarations())
             ]  # <--- End the list here
         )
 
         self.client = genai.Client(api_key=GOOGLE_API_KEY)
         self.model = GEMINI_LLM_MODEL # Use the loaded environment variable
         self.chat = self.client.aio.chats.create(model=self.model, config=self.config)
+        self.context_manager = ChatContextManager(self.client, self.model, self.config) # Keeps self.chat's history bounded
 
         # Queues and tasks
-        self.latest_video_frame_data_url = None # If using single-frame logic
+        self.latest_video_frame = None # (jpeg_bytes, mime_type) of the newest webcam frame, single-frame logic
+        self.frame_preprocessor = FramePreprocessor() # Resizes frames and skips ones the model has already seen
         self.input_queue = asyncio.Queue()
         self.response_queue = asyncio.Queue()
         self.audio_output_queue = asyncio.Queue()
@@ -132,39 +98,66 @@ class ADA:
         self.gemini_session = None
         self.tts_websocket = None
         self.tasks = []
+        self._tts_semaphore = None # Created on the session loop by run_tts_and_audio_out
+        self.turn_started_at = None # perf_counter() when the turn being answered was received (for latency metrics)
+        self.turn_task = None # The turn being answered; cancelled on barge-in
+        self.generating = False # True while the turn task is still producing the answer
+        self.tts_turn_task = None # The turn being spoken; cancelled on barge-in
+        self._tts_busy = False
+        self.playback = PlaybackTracker() # Estimates whether the client is still playing audio
+        self._uses_shared_clients = False
+        self.binary_audio = False # Set per client on connect: send PCM as binary attachments instead of base64 text
+        self.text_coalescer = TextCoalescer(self._emit_text_chunk) # Batches receive_text_chunk emits per session
         # --- End of __init__ ---
 
+    def _emit_text_chunk(self, text):
+        if self.socketio and self.client_sid:
+            self.socketio.emit('receive_text_chunk', {'text': text}, room=self.client_sid)
+
+    def _audio_payload(self, audio_bytes):
+        """ Builds the receive_audio_chunk payload in the format this client negotiated. """
+        if self.binary_audio:
+            return {'audio': audio_bytes}
+        return {'audio': base64.b64encode(audio_bytes).decode('utf-8')}
+
+    async def _fetch_weather(self, location: str) -> dict:
+        client = await shared_clients.get_weather_client() # Long-lived, shared by every session
+        weather = await client.get(location)
+        weather_data = {
+            'location': location,
+            'current_temp_f': weather.temperature,
+            'precipitation': weather.precipitation, # Added precipitation
+            'description': weather.description,
+        }
+        print(f"Weather data fetched: {weather_data}")
+        return weather_data
+
+    @tool_registry.weather_tool
     async def get_weather(self, location: str) -> dict | None:
-        """ Fetches current weather and emits update via SocketIO. """
-        async with python_weather.Client(unit=python_weather.IMPERIAL) as client:
-            try:
-                weather = await client.get(location)
-                weather_data = {
-                    'location': location,
-                    'current_temp_f': weather.temperature,
-                    'precipitation': weather.precipitation, # Added precipitation
-                    'description': weather.description,
-                }
-                print(f"Weather data fetched: {weather_data}")
+        """ Fetches current weather (cached per location for a few minutes) and emits update via SocketIO. """
+        try:
+            weather_data = await tool_cache.weather_cache.get_or_fetch(
+                tool_cache.normalize(location), lambda: self._fetch_weather(location)
+            )
 
-                # --- Emit weather_update from here ---
-                if self.socketio and self.client_sid:
-                    print(f"--- Emitting weather_update event for SID: {self.client_sid} ---")
-                    self.socketio.emit('weather_update', weather_data, room=self.client_sid)
-                # --- End Emit ---
+            # --- Emit weather_update from here ---
+            if self.socketio and self.client_sid:
+                print(f"--- Emitting weather_update event for SID: {self.client_sid} ---")
+                self.socketio.emit('weather_update', weather_data, room=self.client_sid)
+            # --- End Emit ---
 
-                return weather_data # Still return data for Gemini
+            return weather_data # Still return data for Gemini
 
-            except Exception as e:
-                print(f"Error fetching weather for {location}: {e}")
-                return {"error": f"Could not fetch weather for {location}."} # Return error info
+        except Exception as e:
+            print(f"Error fetching weather for {location}: {e}")
+            return {"error": f"Could not fetch weather for {location}."} # Return error info
 
     def _sync_get_travel_duration(self, origin: str, destination: str, mode: str = "driving") -> str:
          if not self.Maps_api_key or self.Maps_api_key == "YOUR_PROVIDED_KEY": # Check the actual key
             print("Error: Google Maps API Key is missing or invalid.")
             return "Error: Missing or invalid Google Maps API Key configuration."
          try:
-            gmaps = googlemaps.Client(key=self.Maps_api_key)
+            gmaps = shared_clients.get_maps_client(self.Maps_api_key)
             now = datetime.now()
             print(f"Requesting directions: From='{origin}', To='{destination}', Mode='{mode}'")
             directions_result = gmaps.directions(origin, destination, mode=mode, departure_time=now)
@@ -188,6 +181,7 @@ class ADA:
             print(f"An unexpected error occurred during travel duration lookup: {e}")
             return f"An unexpected error occurred: {e}"
 
+    @tool_registry.travel_duration_tool
     async def get_travel_duration(self, origin: str, destination: str, mode: str = "driving") -> dict:
         """ Async wrapper to get travel duration and emit map update via SocketIO. """
         print(f"Received request for travel duration from: {origin} to: {destination}, Mode: {mode}")
@@ -195,8 +189,10 @@ class ADA:
             mode = "driving"
 
         try:
-            result_string = await asyncio.to_thread(
-                self._sync_get_travel_duration, origin, destination, mode
+            result_string = await tool_cache.travel_cache.get_or_fetch(
+                tool_cache.normalize(origin, destination, mode),
+                lambda: tool_registry.run_blocking(self._sync_get_travel_duration, origin, destination, mode),
+                cacheable=lambda result: result.startswith("Estimated travel duration"),
             )
 
             # --- Emit map_update from here ---
@@ -212,70 +208,44 @@ class ADA:
             return {"duration_result": result_string} # Still return result for Gemini
 
         except Exception as e:
-            print(f"Error calling _sync_get_travel_duration via to_thread: {e}")
+            print(f"Error calling _sync_get_travel_duration on the tool executor: {e}")
             return {"duration_result": f"Failed to execute travel duration request: {e}"}
 
     async def _fetch_and_extract_snippet(self, session, url: str) -> dict | None:
         """
-        Fetches HTML from a URL, extracts title, meta description,
-        and concatenates text from paragraph tags.
-        Returns a dictionary or None on failure.
+        Returns title, meta description and paragraph summary for a URL, or None on failure.
+        Served from the on-disk page cache while fresh; stale entries are revalidated with
+        ETag/Last-Modified so an unchanged page is neither downloaded nor parsed again.
         """
+        cached = await page_cache.get(url)
+        if cached and cached["fresh"]:
+            page_cache.record("fresh")
+            return cached["result"]
+        return await self._download_snippet(session, url, cached)
+
+    async def _download_snippet(self, session, url: str, cached) -> dict | None:
+        """ Network half of _fetch_and_extract_snippet; cached is the stale page_cache entry or None. """
         headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
-        title = "No Title Found"
-        snippet = "No Description Found"
-        page_text_summary = "Could not extract page text." # Default value
+        headers.update(page_cache.conditional_headers(cached))
 
         try:
             async with session.get(url, headers=headers, timeout=15, ssl=False) as response: # Increased timeout slightly
+                if response.status == 304 and cached:
+                    page_cache.record("revalidated")
+                    await page_cache.touch(url)
+                    return cached["result"]
+                page_cache.record("stale" if cached else "miss")
                 if response.status == 200:
-                    html_content = await response.text()
-                    soup = BeautifulSoup(html_content, 'lxml')
-
-                    # --- Extract Title (as before) ---
-                    title_tag = soup.find('title')
-                    if title_tag and title_tag.string:
-                        title = title_tag.string.strip()
-
-                    # --- Extract Meta Description (as before) ---
-                    description_tag = soup.find('meta', attrs={'name': 'description'})
-                    if description_tag and description_tag.get('content'):
-                        snippet = description_tag['content'].strip()
-
-                    # --- NEW: Extract Text from Paragraphs ---
-                    try:
-                        paragraphs = soup.find_all('p') # Find all <p> tags
-                        # Join the text content of all paragraphs, stripping whitespace
-                        full_page_text = ' '.join(p.get_text(strip=True) for p in paragraphs if p.get_text(strip=True))
-
-                        # Basic Processing/Summarization (CRUCIAL for large text)
-                        # Option 1: Simple Truncation
-                        max_len = 1500 # Limit the amount of text returned
-                        if len(full_page_text) > max_len:
-                             page_text_summary = full_page_text[:max_len] + "..."
-                        else:
-                             page_text_summary = full_page_text
-
-                        # Option 2 (More Advanced - Requires ML library like transformers):
-                        # Implement summarization logic here if needed.
-
-                        if not page_text_summary: # Handle case where no paragraph text was found
-                             page_text_summary = "No paragraph text found on page."
-
-                    except Exception as text_ex:
-                        print(f"  Error extracting paragraph text from {url}: {text_ex}")
-                        # Keep default "Could not extract..." message
-
-                    print(f"  Extracted: Title='{title}', Snippet='{snippet[:50]}...', Text='{page_text_summary[:50]}...' from {url}")
-                    # --- Return enriched dictionary ---
-                    return {
-                        "url": url,
-                        "title": title,
-                        "meta_snippet": snippet, # Renamed for clarity
-                        "page_content_summary": page_text_summary # Added page text
-                    }
+                    if not html_extract.is_html(response.headers.get('Content-Type')):
+                        print(f"  Skipping {url}: not HTML ({response.content_type})")
+                        return None
+                    # Streamed: stops reading once title, description and the paragraph budget are in
+                    result, bytes_read = await html_extract.extract_from_response(response, url)
+                    print(f"  Extracted: Title='{result['title']}', Text='{result['page_content_summary'][:50]}...' from {url} ({bytes_read} bytes read)")
+                    await page_cache.put(result, response.headers.get('ETag'), response.headers.get('Last-Modified'))
+                    return result
                 else:
                     print(f"  Failed to fetch {url}: Status {response.status}")
                     return None # Return None on non-200 status
@@ -304,53 +274,112 @@ class ADA:
 
 # Inside the ADA class in server/ADA_Online.py
 
+    async def _search_and_fetch(self, query: str, on_result=None) -> dict:
+        """
+        Google search, then title, meta snippet and paragraph summary for each result URL,
+        all within SEARCH_DEADLINE_SECONDS: pages still loading at the deadline are cancelled.
+        Fresh page cache hits are served before any timeout applies, and the downloads always
+        get at least SEARCH_MIN_FETCH_SECONDS, however long the Google search itself took.
+        on_result(results_so_far) is called (in search rank order) each time a page finishes.
+        Returns {"results": [...], "complete": bool}; complete is False if the deadline hit.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + SEARCH_DEADLINE_SECONDS
+        # Step 1: Get URLs
+        search_urls = await tool_registry.run_blocking(
+            self._sync_Google_Search, query, num_results=5
+        )
+        if not search_urls:
+            print("No URLs found by Google Search.")
+            return {"results": [], "complete": True}
+
+        # Step 2: Fresh page cache hits first; they cost no network and must not be dropped by the deadline
+        results_by_rank = {}
+        complete = True
+
+        def ranked():
+            return [results_by_rank[rank] for rank in sorted(results_by_rank)]
+
+        stale = {}
+        for rank, cached in enumerate(await asyncio.gather(*(page_cache.get(url) for url in search_urls))):
+            if cached and cached["fresh"]:
+                page_cache.record("fresh")
+                results_by_rank[rank] = cached["result"]
+            else:
+                stale[rank] = cached
+        if results_by_rank and on_result:
+            on_result(ranked())
+        if not stale:
+            print(f"All {len(search_urls)} pages served from the page cache.")
+            return {"results": ranked(), "complete": True}
+
+        # Step 3: Fetch the rest concurrently, keeping whatever finishes before the deadline
+        print(f"Fetching content for {len(stale)} of {len(search_urls)} URLs...")
+        session = await shared_clients.get_http_session() # Pooled keep-alive session, shared by every ADA session
+        tasks = {rank: asyncio.create_task(self._download_snippet(session, search_urls[rank], cached))
+                 for rank, cached in stale.items()}
+        fetch_budget = max(SEARCH_MIN_FETCH_SECONDS, deadline - loop.time())
+
+        async def fetch_ranked(rank, task):
+            return rank, await task
+
+        try:
+            for next_done in asyncio.as_completed([fetch_ranked(rank, t) for rank, t in tasks.items()],
+                                                  timeout=fetch_budget):
+                try:
+                    rank, result = await next_done
+                except asyncio.TimeoutError:
+                    raise
+                except Exception as e:
+                    print(f"   An error occurred during content fetching task: {e}")
+                    continue
+                if isinstance(result, dict): # Successfully fetched data; None means fetch/parse failed (already logged)
+                    results_by_rank[rank] = result
+                    if on_result:
+                        on_result(ranked())
+        except asyncio.TimeoutError:
+            complete = False
+            stragglers = sum(1 for t in tasks.values() if not t.done())
+            print(f"Search deadline ({SEARCH_DEADLINE_SECONDS}s) reached, cancelling {stragglers} slow page fetch(es).")
+        finally:
+            for task in tasks.values():
+                if not task.done():
+                    task.cancel()
+
+        fetched_results = ranked()
+        print(f"Finished fetching content. Got {len(fetched_results)} results.")
+        return {"results": fetched_results, "complete": complete}
+
+    @tool_registry.search_tool
     async def get_search_results(self, query: str) -> dict:
         """
         Async wrapper for Google search. Fetches URLs, then retrieves
         title, meta snippet, and a summary of page paragraph text for each.
-        Emits results via SocketIO.
+        Each page is emitted via SocketIO as soon as it is ready (partial updates),
+        followed by the final list. Complete, non-empty results are cached per query.
         Returns a dictionary containing a list of result objects.
         """
         print(f"Received request for Google search with page content fetch: '{query}'")
-        fetched_results = [] # This will store dicts: {"url":..., "title":..., "meta_snippet":..., "page_content_summary":...}
+
+        def emit_partial(results_so_far):
+            if self.socketio and self.client_sid:
+                self.socketio.emit('search_results_update', {"query": query, "results": results_so_far, "partial": True}, room=self.client_sid)
+
         try:
-            # Step 1: Get URLs (no change)
-            search_urls = await asyncio.to_thread(
-                self._sync_Google_Search, query, num_results=5
+            search = await tool_cache.search_cache.get_or_fetch(
+                tool_cache.normalize(query),
+                lambda: self._search_and_fetch(query, on_result=emit_partial),
+                cacheable=lambda search: bool(search["results"]) and search["complete"],
             )
-            if not search_urls:
-                print("No URLs found by Google Search.")
-                # --- EMIT EMPTY RESULTS TO FRONTEND ---
-                if self.socketio and self.client_sid:
-                    print(f"--- Emitting empty search_results_update event for SID: {self.client_sid} ---")
-                    self.socketio.emit('search_results_update', {"results": [], "query": query}, room=self.client_sid)
-                # --- END EMIT ---
-                return {"results": []} # Return for Gemini
-
-            # Step 2: Fetch content concurrently (no change in logic)
-            print(f"Fetching content for {len(search_urls)} URLs...")
-            async with aiohttp.ClientSession() as session:
-                tasks = [self._fetch_and_extract_snippet(session, url) for url in search_urls]
-                results_from_gather = await asyncio.gather(*tasks, return_exceptions=True)
-
-            # Step 3: Process results (filter Nones and Exceptions)
-            for result in results_from_gather:
-                if isinstance(result, dict): # Successfully fetched data
-                    fetched_results.append(result)
-                elif isinstance(result, Exception):
-                    print(f"   An error occurred during content fetching task: {result}")
-                # else: result is None (fetch/parse failed, already logged in helper)
-
-            print(f"Finished fetching content. Got {len(fetched_results)} results.")
-
-            # --- **** NEW: EMIT RESULTS TO FRONTEND **** ---
+            fetched_results = search["results"]
+
+            # --- EMIT FINAL RESULTS TO FRONTEND ---
             if self.socketio and self.client_sid:
                  print(f"--- Emitting search_results_update event with {len(fetched_results)} results for SID: {self.client_sid} ---")
                  # Send the query along with the results for context
-                 emit_payload = {"query": query, "results": fetched_results}
+                 emit_payload = {"query": query, "results": fetched_results, "partial": False}
                  self.socketio.emit('search_results_update', emit_payload, room=self.client_sid)
-            # --- **** END EMIT **** ---
-
+            # --- END EMIT ---
 
         except Exception as e:
             print(f"Error running get_search_results for '{query}': {e}")
@@ -359,7 +388,7 @@ class ADA:
                  self.socketio.emit('search_results_error', {"query": query, "error": str(e)}, room=self.client_sid)
             return {"error": f"Failed to execute Google search with page content: {str(e)}"} # Return for Gemini
 
-        # Format the final result for Gemini (no change here)
+        # Format the final result for Gemini
         response_payload = {
             "results": fetched_results
         }
@@ -375,141 +404,184 @@ class ADA:
                 try: q.get_nowait()
                 except asyncio.QueueEmpty: break
 
+    async def interrupt(self, received_at):
+        """
+        Barge-in: cancels the turn being answered (Gemini stream and running tools) and the
+        TTS synthesis for it, then tells the client to stop playing. Returns True if ADA
+        was actually interrupted.
+        """
+        if not (self.generating or self._tts_busy or self.playback.is_playing()):
+            return False
+        print("--- Barge-in: interrupting the current answer ---")
+        cancelled = []
+        if self.tts_turn_task is not None and not self.tts_turn_task.done():
+            self.tts_turn_task.cancel() # Stops emitting audio and aborts synthesis requests
+            cancelled.append(self.tts_turn_task)
+        if self.generating and self.turn_task is not None and not self.turn_task.done():
+            self.turn_task.cancel()
+            cancelled.append(self.turn_task)
+        if cancelled:
+            await asyncio.wait(cancelled)
+        await self.clear_queues()
+        self.playback.reset()
+        if self.socketio and self.client_sid:
+            self.socketio.emit('stop_audio', {}, room=self.client_sid)
+        metrics.BARGE_IN_TO_SILENCE.observe(time.perf_counter() - received_at)
+        return True
+
     async def process_input(self, message, is_final_turn_input=False):
-        """ Puts message and flag into the input queue. """
+        """ Puts message and flag into the input queue, interrupting ADA if it is still answering. """
+        received_at = time.perf_counter()
         print(f"Processing input: '{message}', Final Turn: {is_final_turn_input}")
         if is_final_turn_input:
+             if message.strip():
+                 await self.interrupt(received_at)
              await self.clear_queues() # Clear only before final input
-        await self.input_queue.put((message, is_final_turn_input))
+        await self.input_queue.put((message, is_final_turn_input, received_at))
 
     async def process_video_frame(self, frame_data_url):
-        """ Processes incoming video frame data URL """
-        self.latest_video_frame_data_url = frame_data_url
-        frame_data_url = None
+        """ Processes incoming video frame data URL (legacy base64 event) """
+        try:
+            header, encoded = frame_data_url.split(",", 1)
+            # Determine mime type from header (e.g., "data:image/jpeg;base64")
+            mime_type = header.split(':')[1].split(';')[0] if ':' in header and ';' in header else "image/jpeg"
+            await self.process_video_frame_bytes(base64.b64decode(encoded), mime_type)
+        except Exception as e:
+            print(f"Error processing video frame data URL: {e}")
+
+    async def process_video_frame_bytes(self, frame_bytes, mime_type="image/jpeg"):
+        """ Stores raw JPEG bytes from the binary frame event as the latest frame, no string handling. """
+        self.latest_video_frame = (bytes(frame_bytes), mime_type)
+
+    async def clear_video_queue(self):
+        """ Drops the stored frame once the client stops its video feed. """
+        self.latest_video_frame = None
+
+    async def _answer_turn(self, message, received_at):
+        """ One user turn: Gemini request, tool calls, follow-up response, then history compaction. Cancelled on barge-in. """
+        try:
+            print(f"Sending FINAL input to Gemini: {message}")
+            self.turn_started_at = received_at
+            self.generating = True
+
+            # --- Prepare Content for Gemini ---
+            request_content = [message]
+            if self.latest_video_frame:
+                try:
+                    frame_bytes, mime_type = self.latest_video_frame
+                    # Downscaled and re-encoded; None if the model already saw this scene
+                    prepared = await self.frame_preprocessor.prepare(frame_bytes, mime_type)
+                    if prepared is None:
+                        print("Skipping image frame: scene unchanged since the last frame sent.")
+                    else:
+                        frame_bytes, mime_type = prepared
+                        request_content.append(types.Part.from_bytes(data=frame_bytes, mime_type=mime_type))
+                        print(f"Included image frame ({len(frame_bytes)} bytes) with mime_type: {mime_type}")
+                except Exception as e:
+                    print(f"Error attaching video frame: {e}")
+                finally:
+                     self.latest_video_frame = None # Clear after use/attempt
+
+            # --- 1. Send Initial Request and Process First Response Stream ---
+            print("--- Sending request to Gemini ---")
+            response_stream = await self.chat.send_message_stream(request_content)
+
+            collected_function_calls = [] # Store detected function calls for later processing
+            processed_text_in_turn = False # Flag to see if we sent any text
+            first_chunk_seen = False
+
+            async for chunk in response_stream:
+                if not first_chunk_seen:
+                    first_chunk_seen = True
+                    metrics.INPUT_TO_FIRST_CHUNK.observe(time.perf_counter() - received_at)
+                # Safety check for empty chunks or structure issues
+                if not chunk.candidates or not chunk.candidates[0].content or not chunk.candidates[0].content.parts:
+                    # print("Skipping empty or malformed chunk") # Optional debug log
+                    continue
+
+                for part in chunk.candidates[0].content.parts:
+                    if part.function_call:
+                        print(f"--- Detected Function Call: {part.function_call.name} ---")
+                        collected_function_calls.append(part.function_call) # Store the call details
+                    elif part.text:
+                        # Stream text parts immediately for TTS
+                        await self.response_queue.put(part.text)
+                        self.text_coalescer.add(part.text)
+                        processed_text_in_turn = True
+
+            # --- 2. Handle Function Calls (if any were detected) ---
+            if collected_function_calls:
+                print(f"--- Processing {len(collected_function_calls)} detected function call(s) ---")
+                # Independent calls run concurrently; gather keeps the responses in call order.
+                payloads = await asyncio.gather(
+                    *(self.tools.execute(function_call) for function_call in collected_function_calls)
+                )
+                function_response_parts = [
+                    types.Part.from_function_response(name=function_call.name, response=payload)
+                    for function_call, payload in zip(collected_function_calls, payloads)
+                ]
+
+                # --- 3. Send Function Response(s) Back to Gemini ---
+                if function_response_parts:
+                    print(f"--- Sending {len(function_response_parts)} function response(s) back to Gemini ---")
+                    response_stream_after_func = await self.chat.send_message_stream(function_response_parts) # Send ONLY the response parts
+
+                    # --- 4. Process Final Text Response from Gemini ---
+                    async for final_chunk in response_stream_after_func:
+                         if final_chunk.candidates and final_chunk.candidates[0].content and final_chunk.candidates[0].content.parts:
+                            for part in final_chunk.candidates[0].content.parts:
+                                 if part.text:
+                                    await self.response_queue.put(part.text)
+                                    self.text_coalescer.add(part.text)
+                                    processed_text_in_turn = True
+
+            # --- 5. Signal End of Response to TTS ---
+            self.text_coalescer.end_turn() # Emit any text still buffered for the chat box
+            print("--- Finished processing response for this turn. Signaling TTS end. ---")
+            await self.response_queue.put(None) # Use None as a sentinel for the TTS loop
+            self.generating = False # Compaction below is not worth interrupting
+
+            # --- 6. Trim history (stale images, old tool payloads, summary) while TTS plays ---
+            try:
+                self.chat = await self.context_manager.compact(self.chat)
+                if not self.context_manager.image_in_history:
+                    self.frame_preprocessor.forget() # Last frame was summarized away: next one must be sent
+                metrics.CHAT_CONTEXT_TOKENS.observe(self.context_manager.last_token_estimate)
+            except Exception as e:
+                print(f"Error compacting chat context: {e}")
+        except asyncio.CancelledError:
+            self.text_coalescer.end_turn() # Keep what was already shown in the chat box
+            raise
+        finally:
+            self.generating = False
 
     async def run_gemini_session(self):
         """Manages the Gemini conversation session, handling text, video, and tool calls."""
         print("Starting Gemini session manager...")
         try:
             while True: # Loop to process text inputs from the input_queue
-                message, is_final_turn_input = await self.input_queue.get()
+                message, is_final_turn_input, received_at = await self.input_queue.get()
 
                 if not (message.strip() and is_final_turn_input):
                     self.input_queue.task_done() # Mark non-final/empty messages as done
                     continue # Skip processing if not final input
 
-                print(f"Sending FINAL input to Gemini: {message}")
-
-                # --- Prepare Content for Gemini ---
-                request_content = [message]
-                if self.latest_video_frame_data_url:
-                    try:
-                        header, encoded = self.latest_video_frame_data_url.split(",", 1)
-                        # Determine mime type from header (e.g., "data:image/jpeg;base64")
-                        mime_type = header.split(':')[1].split(';')[0] if ':' in header and ';' in header else "image/jpeg" # Default or parse
-                        frame_bytes = base64.b64decode(encoded)
-                        request_content.append(types.Part.from_bytes(data=frame_bytes, mime_type=mime_type))
-                        print(f"Included image frame with mime_type: {mime_type}")
-                    except Exception as e:
-                        print(f"Error processing video frame data URL: {e}")
-                    finally:
-                         self.latest_video_frame_data_url = None # Clear after use/attempt
-
-                # --- 1. Send Initial Request and Process First Response Stream ---
-                print("--- Sending request to Gemini ---")
-                response_stream = await self.chat.send_message_stream(request_content)
-
-                collected_function_calls = [] # Store detected function calls for later processing
-                processed_text_in_turn = False # Flag to see if we sent any text
-
-                async for chunk in response_stream:
-                    # Safety check for empty chunks or structure issues
-                    if not chunk.candidates or not chunk.candidates[0].content or not chunk.candidates[0].content.parts:
-                        # print("Skipping empty or malformed chunk") # Optional debug log
-                        continue
-
-                    for part in chunk.candidates[0].content.parts:
-                        if part.function_call:
-                            print(f"--- Detected Function Call: {part.function_call.name} ---")
-                            collected_function_calls.append(part.function_call) # Store the call details
-                        elif part.text:
-                            # Stream text parts immediately for TTS
-                            await self.response_queue.put(part.text)
-                            if self.socketio and self.client_sid:
-                                self.socketio.emit('receive_text_chunk', {'text': part.text}, room=self.client_sid)
-                            processed_text_in_turn = True
-
-                # --- 2. Handle Function Calls (if any were detected) ---
-                if collected_function_calls:
-                    print(f"--- Processing {len(collected_function_calls)} detected function call(s) ---")
-                    function_response_parts = []
-
-                    # Note: Currently handles multiple calls sequentially. Could be parallelized.
-                    for function_call in collected_function_calls:
-                        tool_call_name = function_call.name
-                        tool_call_args = dict(function_call.args) # Convert Struct to dict
-
-                        if tool_call_name in self.available_functions:
-                            function_to_call = self.available_functions[tool_call_name]
-                            print(f"Executing function: {tool_call_name} with args: {tool_call_args}")
-                            try:
-                                # Execute the function
-                                function_result = await function_to_call(**tool_call_args)
-                                print(f"Function {tool_call_name} returned: {function_result}")
-
-                                response_payload = function_result 
-
-                                function_response_parts.append(
-                                    types.Part.from_function_response(
-                                        name=tool_call_name,
-                                        response=response_payload # Pass the result dict directly
-                                    )
-                                )
-                            except Exception as e:
-                                print(f"!!! Error calling function {tool_call_name}: {e} !!!")
-                                # Handle error - maybe send an error response back?
-                                # For now, we might skip adding a response part or add an error part
-                                function_response_parts.append(
-                                     types.Part.from_function_response(
-                                        name=tool_call_name,
-                                        response={"error": f"Failed to execute function {tool_call_name}: {str(e)}"}
-                                    )
-                                )
-                        else:
-                            print(f"!!! Error: Function '{tool_call_name}' is not available. !!!")
-                            # Handle missing function - inform Gemini
-                            function_response_parts.append(
-                                types.Part.from_function_response(
-                                    name=tool_call_name,
-                                    response={"error": f"Function {tool_call_name} not found or implemented."}
-                                )
-                            )
-
-                    # --- 3. Send Function Response(s) Back to Gemini ---
-                    if function_response_parts:
-                        print(f"--- Sending {len(function_response_parts)} function response(s) back to Gemini ---")
-                        response_stream_after_func = await self.chat.send_message_stream(function_response_parts) # Send ONLY the response parts
-
-                        # --- 4. Process Final Text Response from Gemini ---
-                        async for final_chunk in response_stream_after_func:
-                             if final_chunk.candidates and final_chunk.candidates[0].content and final_chunk.candidates[0].content.parts:
-                                for part in final_chunk.candidates[0].content.parts:
-                                     if part.text:
-                                        await self.response_queue.put(part.text)
-                                        if self.socketio and self.client_sid:
-                                            self.socketio.emit('receive_text_chunk', {'text': part.text}, room=self.client_sid)
-                                        processed_text_in_turn = True
-                        self.response_queue.put("")
-
-                # --- 5. Signal End of Response to TTS ---
-                print("--- Finished processing response for this turn. Signaling TTS end. ---")
-                await self.response_queue.put(None) # Use None as a sentinel for the TTS loop
+                # Each turn runs as its own task so a new input can cancel it (see interrupt)
+                self.turn_task = asyncio.create_task(self._answer_turn(message, received_at))
+                await asyncio.wait({self.turn_task})
+                if self.turn_task.cancelled():
+                    print("--- Turn interrupted by new input. ---")
+                    self.chat = self.context_manager.discard_unanswered_call(self.chat)
+                elif self.turn_task.exception() is not None:
+                    raise self.turn_task.exception()
+                self.turn_task = None
 
                 self.input_queue.task_done() # Mark input processed
 
         except asyncio.CancelledError:
             print("Gemini session task cancelled.")
         except Exception as e:
+            self.text_coalescer.end_turn()
             print(f"!!! Error in Gemini session manager: {e} !!!")
             # Log the full traceback for debugging
             import traceback
@@ -523,6 +595,8 @@ class ADA:
                  pass # Ignore errors during error handling cleanup
         finally:
             print("Gemini session manager finished.")
+            if self.turn_task and not self.turn_task.done():
+                self.turn_task.cancel()
             # Clean up video task if necessary (keep existing finally block logic)
             video_task = next((t for t in self.tasks if hasattr(t, 'get_coro') and t.get_coro().__name__ == 'run_video_sender'), None)
             if video_task and not video_task.done():
@@ -530,77 +604,133 @@ class ADA:
                  video_task.cancel()
             self.gemini_session = None # Assuming this was meant to be self.chat? Or track session state elsewhere.
 
-    async def run_tts_and_audio_out(self):
-        print("Starting Gemini TTS and Audio Output manager...")
-        while True:
+    def _tts_config(self):
+        return types.GenerateContentConfig(
+            response_modalities=["AUDIO"],
+            speech_config=types.SpeechConfig(
+                voice_config=types.VoiceConfig(
+                    prebuilt_voice_config=types.PrebuiltVoiceConfig(voice_name=GEMINI_TTS_VOICE)
+                )
+            )
+        )
+
+    async def _synthesize_segment(self, text):
+        """ One Gemini TTS request for one sentence. Returns PCM bytes, or None on failure (client is notified). """
+        async with self._tts_semaphore:
+            requested_at = time.perf_counter()
             try:
-                accumulated_text = ""
-                while True:
-                    text_chunk = await self.response_queue.get()
-                    if text_chunk is None: # Sentinel for end of a complete response
-                        self.response_queue.task_done()
-                        break
-                    accumulated_text += text_chunk
-                    self.response_queue.task_done()
-
-                if not accumulated_text.strip():
-                    print("TTS: No text to speak for this turn.")
-                    continue
+                response = await self.client.aio.models.generate_content(
+                    model=GEMINI_TTS_MODEL,
+                    contents=[text],
+                    config=self._tts_config(),
+                )
+            except Exception as e:
+                print(f"Error during Gemini TTS API call: {e}")
+                if self.socketio and self.client_sid:
+                    self.socketio.emit('tts_error', {'message': f'TTS API Error: {str(e)}'}, room=self.client_sid)
+                return None
+            finally:
+                metrics.TTS_REQUEST_DURATION.observe(time.perf_counter() - requested_at)
 
-                print(f"TTS: Generating audio for: '{accumulated_text[:60]}...'")
-                try:
-                    tts_generation_config = types.GenerateContentConfig(
-                        response_modalities=["AUDIO"],
-                        speech_config=types.SpeechConfig(
-                            voice_config=types.VoiceConfig(
-                                prebuilt_voice_config=types.PrebuiltVoiceConfig(voice_name=GEMINI_TTS_VOICE)
-                            )
-                        )
-                    )
-
-                    # Use asyncio.to_thread for the synchronous SDK call
-                    # Assuming self.client is the synchronous genai.Client
-                    response = await asyncio.to_thread(
-                        self.client.generate_content, # Synchronous client method
-                        model=GEMINI_TTS_MODEL,
-                        contents=[accumulated_text], # Contents should be an iterable
-                        generation_config=tts_generation_config,
-                        # stream=False is implied for generate_content unless stream=True
-                    )
-
-                    if response.candidates and response.candidates[0].content.parts:
-                        audio_chunk_bytes = response.candidates[0].content.parts[0].inline_data.data
-                        if audio_chunk_bytes:
-                            print(f"TTS: Received audio data ({len(audio_chunk_bytes)} bytes). Emitting via SocketIO.")
-                            if self.socketio and self.client_sid:
-                                self.socketio.emit('receive_audio_chunk',
-                                                   {'audio': base64.b64encode(audio_chunk_bytes).decode('utf-8')},
-                                                   room=self.client_sid)
-                        else:
-                            print("TTS: No audio data in response part.")
-                    else:
-                        print("TTS: Invalid response structure or no audio data from Gemini.")
-                        # Potentially emit an error or a silent chunk to the client
-                        if self.socketio and self.client_sid:
-                            self.socketio.emit('tts_error', {'message': 'TTS generation failed or no audio data.'}, room=self.client_sid)
+        if response.candidates and response.candidates[0].content and response.candidates[0].content.parts:
+            audio_chunk_bytes = response.candidates[0].content.parts[0].inline_data.data
+            if audio_chunk_bytes:
+                return audio_chunk_bytes
+            print("TTS: No audio data in response part.")
+        else:
+            print("TTS: Invalid response structure or no audio data from Gemini.")
+            if self.socketio and self.client_sid:
+                self.socketio.emit('tts_error', {'message': 'TTS generation failed or no audio data.'}, room=self.client_sid)
+        return None
 
-                except Exception as e:
-                    print(f"Error during Gemini TTS API call: {e}")
-                    if self.socketio and self.client_sid:
-                        self.socketio.emit('tts_error', {'message': f'TTS API Error: {str(e)}'}, room=self.client_sid)
+    async def _emit_segments_in_order(self, segment_tasks, turn_started_at):
+        """ Awaits synthesis tasks in the order their sentences were spoken and emits each one's audio. """
+        first_audio = True
+        while True:
+            task = await segment_tasks.get()
+            if task is None:
+                break
+            audio_chunk_bytes = await task
+            if audio_chunk_bytes and self.socketio and self.client_sid:
+                print(f"TTS: Emitting audio segment ({len(audio_chunk_bytes)} bytes).")
+                self.socketio.emit('receive_audio_chunk', self._audio_payload(audio_chunk_bytes), room=self.client_sid)
+                self.playback.on_audio(len(audio_chunk_bytes))
+                if first_audio and turn_started_at is not None:
+                    metrics.INPUT_TO_FIRST_AUDIO.observe(time.perf_counter() - turn_started_at)
+                first_audio = False
+
+    async def _speak_turn(self, segmenter):
+        """
+        Speaks one turn: each complete sentence is sent to Gemini TTS as soon as it has streamed
+        in, up to TTS_MAX_CONCURRENT_REQUESTS at once, while later sentences are still being
+        generated. Audio is emitted strictly in sentence order. Cancelled on barge-in.
+        """
+        segment_tasks = asyncio.Queue()
+        pending = []
+        emit_task = None
+        turn_started_at = None
+
+        def start_segment(text):
+            nonlocal emit_task
+            if emit_task is None:
+                if turn_started_at is not None:
+                    metrics.INPUT_TO_TTS_REQUEST.observe(time.perf_counter() - turn_started_at)
+                emit_task = asyncio.create_task(self._emit_segments_in_order(segment_tasks, turn_started_at))
+            print(f"TTS: Generating audio for: '{text[:60]}...'")
+            task = asyncio.create_task(self._synthesize_segment(text))
+            pending.append(task)
+            segment_tasks.put_nowait(task)
+
+        try:
+            while True:
+                text_chunk = await self.response_queue.get()
+                self.response_queue.task_done()
+                self._tts_busy = True
+                if turn_started_at is None:
+                    turn_started_at = self.turn_started_at
+                if text_chunk is None: # Sentinel for end of a complete response
+                    break
+                for sentence in segmenter.feed(text_chunk):
+                    start_segment(sentence)
+
+            remainder = segmenter.flush()
+            if remainder:
+                start_segment(remainder)
+            if emit_task is None:
+                print("TTS: No text to speak for this turn.")
+                return
+            segment_tasks.put_nowait(None)
+            await emit_task
+        except BaseException:
+            for task in pending + ([emit_task] if emit_task else []):
+                task.cancel() # Abort synthesis requests still in flight
+            segmenter.flush()
+            raise
+        finally:
+            self._tts_busy = False
 
+    async def run_tts_and_audio_out(self):
+        """ Runs one _speak_turn task per response; interrupt() may cancel the current one. """
+        print("Starting Gemini TTS and Audio Output manager...")
+        self._tts_semaphore = asyncio.Semaphore(TTS_MAX_CONCURRENT_REQUESTS)
+        segmenter = SentenceSegmenter()
+        while True:
+            self.tts_turn_task = asyncio.create_task(self._speak_turn(segmenter))
+            try:
+                await asyncio.wait({self.tts_turn_task})
             except asyncio.CancelledError:
                 print("TTS and Audio Output manager task cancelled.")
+                self.tts_turn_task.cancel()
+                await asyncio.gather(self.tts_turn_task, return_exceptions=True)
                 break
-            except Exception as e:
+            if self.tts_turn_task.cancelled():
+                continue # Interrupted: start listening for the next response
+            e = self.tts_turn_task.exception()
+            if e is not None:
                 print(f"Error in TTS and Audio Output manager: {e}")
                 if self.socketio and self.client_sid: # Notify client of an unexpected error
                     self.socketio.emit('tts_error', {'message': f'Unexpected error in TTS: {str(e)}'}, room=self.client_sid)
                 await asyncio.sleep(1) # Avoid busy-looping on unexpected errors
-            finally:
-                # Ensure any pending SocketIO operations are flushed if possible, though usually handled by emit.
-                # No websocket to close here anymore.
-                pass
 
     async def start_all_tasks(self):
         print("Starting ADA background tasks...")
@@ -609,6 +739,8 @@ class ADA:
             gemini_task = loop.create_task(self.run_gemini_session())
             tts_task = loop.create_task(self.run_tts_and_audio_out())
             self.tasks = [gemini_task, tts_task]
+            shared_clients.acquire()
+            self._uses_shared_clients = True
             # Add video sender task here if using streaming logic
             if hasattr(self, 'video_frame_queue'):
                video_sender_task = loop.create_task(self.run_video_sender())
@@ -624,6 +756,9 @@ class ADA:
             if task and not task.done(): task.cancel()
         await asyncio.gather(*[t for t in tasks_to_cancel if t], return_exceptions=True)
         self.tasks = []
+        if self._uses_shared_clients:
+            self._uses_shared_clients = False
+            await shared_clients.release() # Last session on this loop closes the pooled clients
         # Removed tts_websocket cleanup as it's no longer used
         self.gemini_session = None # This was self.chat in __init__, ensure consistency if it's meant to clear the chat session object
         print("ADA tasks stopped.")
\ No newline at end of file
@@ -0,0 +1,76 @@
+# server/ada_pool.py (Pre-warmed, unbound ADA instances that connect handlers can claim immediately)
+import collections
+import os
+import threading
+import time
+
+import metrics
+
+ADA_POOL_SIZE = int(os.getenv("ADA_POOL_SIZE", "2"))
+ADA_POOL_RETRY_SECONDS = 5
+
+class ADAPool:
+    """
+    Keeps `size` ADA instances built ahead of time (CUDA probe, genai.Client, function
+    declarations, chat) and refills itself in a background thread. claim() binds an idle
+    instance to a client; it only builds inline when the pool has run dry.
+    """
+    def __init__(self, ada_factory, size=ADA_POOL_SIZE):
+        self.ada_factory = ada_factory
+        self.size = max(0, size)
+        self._idle = collections.deque()
+        self._lock = threading.Lock()
+        self._refill_needed = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self.size == 0 or (self._thread and self._thread.is_alive()):
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._refill_loop, daemon=True, name="ada-pool-refill")
+        self._thread.start()
+        self._refill_needed.set()
+        metrics.ADA_POOL_IDLE.set_callback(self.idle_count)
+        print(f"ADA pool started (target size {self.size}).")
+
+    def _refill_loop(self):
+        while not self._stopped.is_set():
+            self._refill_needed.wait()
+            self._refill_needed.clear()
+            while not self._stopped.is_set() and self.idle_count() < self.size:
+                try:
+                    started = time.perf_counter()
+                    ada = self.ada_factory(socketio_instance=None, client_sid=None)
+                    with self._lock:
+                        self._idle.append(ada)
+                    print(f"ADA pool: pre-built instance in {(time.perf_counter() - started) * 1000:.0f} ms ({self.idle_count()}/{self.size} idle).")
+                except Exception as e:
+                    print(f"ADA pool: error pre-building instance: {e}. Retrying in {ADA_POOL_RETRY_SECONDS}s.")
+                    self._stopped.wait(ADA_POOL_RETRY_SECONDS)
+
+    def idle_count(self):
+        with self._lock:
+            return len(self._idle)
+
+    def claim(self, socketio_instance=None, client_sid=None):
+        """ Returns an ADA bound to client_sid. Same signature as the ADA constructor. """
+        with self._lock:
+            ada = self._idle.popleft() if self._idle else None
+        metrics.ADA_POOL_CLAIMS.inc(result="miss" if ada is None else "hit")
+        if ada is None:
+            print(f"ADA pool empty, building instance inline for SID: {client_sid}")
+            ada = self.ada_factory(socketio_instance=socketio_instance, client_sid=client_sid)
+        else:
+            ada.socketio = socketio_instance
+            ada.client_sid = client_sid
+        self._refill_needed.set()
+        return ada
+
+    def stop(self):
+        self._stopped.set()
+        self._refill_needed.set()
+        if self._thread and self._thread.is_alive():
+            self._thread.join(timeout=5)
+        with self._lock:
+            self._idle.clear()
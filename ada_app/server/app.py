@@ -1,13 +1,14 @@
-# app.py (Revised for Client-Side STT, CORS, Logging, AND VIDEO FRAMES)
+# app.py (Revised for Client-Side STT, CORS, Logging, VIDEO FRAMES AND PER-CLIENT SESSIONS)
 import os
 from dotenv import load_dotenv
-import asyncio
-import threading
-from flask import Flask, render_template, request # Make sure request is imported
+from flask import Flask, Response, render_template, request # Make sure request is imported
 from flask_socketio import SocketIO, emit
 
 load_dotenv()
 from ADA_Online import ADA # Make sure filename matches ADA_Online.py
+from session_manager import SessionManager
+from ada_pool import ADAPool
+import metrics
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = os.getenv('FLASK_SECRET_KEY', 'a_default_fallback_secret_key!')
@@ -15,115 +16,69 @@ app.config['SECRET_KEY'] = os.getenv('FLASK_SECRET_KEY', 'a_default_fallback_sec
 REACT_APP_PORT = os.getenv('REACT_APP_PORT', '5173')
 REACT_APP_ORIGIN = f"http://localhost:{REACT_APP_PORT}"
 REACT_APP_ORIGIN_IP = f"http://127.0.0.1:{REACT_APP_PORT}"
+ADA_SERVER_PORT = int(os.getenv('ADA_SERVER_PORT', '5000'))
+
+# --- Multi-worker mode (see multiworker.py) ---
+# With a message queue every worker's emits reach the client no matter which worker holds
+# its connection. 'localbroker://host:port' uses the bundled local_broker.py; any other URL
+# (redis://, amqp://, ...) is handed to Flask-SocketIO as usual.
+ADA_MESSAGE_QUEUE = os.getenv('ADA_MESSAGE_QUEUE')
+message_queue_options = {}
+if ADA_MESSAGE_QUEUE and ADA_MESSAGE_QUEUE.startswith('localbroker://'):
+    from local_broker import LocalBrokerManager
+    message_queue_options['client_manager'] = LocalBrokerManager(ADA_MESSAGE_QUEUE)
+elif ADA_MESSAGE_QUEUE:
+    message_queue_options['message_queue'] = ADA_MESSAGE_QUEUE
 
 socketio = SocketIO(
     app,
     async_mode='threading',
-    cors_allowed_origins=[REACT_APP_ORIGIN, REACT_APP_ORIGIN_IP]
+    cors_allowed_origins=[REACT_APP_ORIGIN, REACT_APP_ORIGIN_IP],
+    **message_queue_options
 )
 
-ada_instance = None
-ada_loop = None
-ada_thread = None
+ada_pool = ADAPool(ADA)
+session_manager = SessionManager(ada_pool.claim, metrics.MeteredEmitter(socketio))
 
-def run_asyncio_loop(loop):
-    """ Function to run the asyncio event loop in a separate thread """
-    asyncio.set_event_loop(loop)
-    try:
-        print("Asyncio event loop started...")
-        loop.run_forever()
-    finally:
-        print("Asyncio event loop stopping...")
-        tasks = asyncio.all_tasks(loop=loop)
-        for task in tasks:
-            if not task.done():
-                task.cancel()
-        try:
-            loop.run_until_complete(asyncio.gather(*[t for t in tasks if not t.done()], return_exceptions=True))
-            loop.run_until_complete(loop.shutdown_asyncgens())
-        except RuntimeError as e:
-             print(f"RuntimeError during loop cleanup (might be expected if loop stopped abruptly): {e}")
-        except Exception as e:
-            print(f"Exception during loop cleanup: {e}")
-        finally:
-            if not loop.is_closed():
-                loop.close()
-        print("Asyncio event loop stopped.")
+# --- Metrics (Prometheus text format at /metrics) ---
+metrics.QUEUE_DEPTH.set_callback(lambda: metrics.queue_depths(session.ada for session in session_manager.all_sessions()))
+metrics.ACTIVE_SESSIONS.set_callback(session_manager.active_count)
+
+@app.route('/metrics')
+def metrics_endpoint():
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
 
 @socketio.on('connect')
-def handle_connect():
-    """ Handles new client connections """
-    global ada_instance, ada_loop, ada_thread
+def handle_connect(auth=None):
+    """ Handles new client connections. `auth` carries client capabilities (e.g. binary_audio). """
     client_sid = request.sid
     print(f"\n--- handle_connect called for SID: {client_sid} ---")
 
-    if ada_thread is None or not ada_thread.is_alive():
-        print(f"    Asyncio thread not running. Starting new loop and thread.")
-        ada_loop = asyncio.new_event_loop()
-        ada_thread = threading.Thread(target=run_asyncio_loop, args=(ada_loop,), daemon=True)
-        ada_thread.start()
-        print("    Started asyncio thread.")
-        socketio.sleep(0.1)
-
-    if ada_instance is None:
-        print(f"    Creating NEW ADA instance for SID: {client_sid}")
-        if not ada_loop or not ada_loop.is_running():
-             print(f"    ERROR: Cannot create ADA instance, asyncio loop not ready for SID {client_sid}.")
-             emit('error', {'message': 'Assistant initialization error (loop).'}, room=client_sid)
-             return
-
-        try:
-            ada_instance = ADA(socketio_instance=socketio, client_sid=client_sid)
-            future = asyncio.run_coroutine_threadsafe(ada_instance.start_all_tasks(), ada_loop)
-            print("    ADA instance created and tasks scheduled.")
-        except ValueError as e:
-            print(f"    ERROR initializing ADA (ValueError) for SID {client_sid}: {e}")
-            emit('error', {'message': f'Failed to initialize assistant: {e}'}, room=client_sid)
-            ada_instance = None
-            return
-        except Exception as e:
-            print(f"    ERROR initializing ADA (Unexpected) for SID {client_sid}: {e}")
-            emit('error', {'message': f'Unexpected error initializing assistant: {e}'}, room=client_sid)
-            ada_instance = None
-            return
-    else:
-        print(f"    ADA instance already exists. Updating SID from {ada_instance.client_sid} to {client_sid}")
-        ada_instance.client_sid = client_sid
-
-    if ada_instance:
-        emit('status', {'message': 'Connected to ADA Assistant'}, room=client_sid)
+    print(f"    Creating NEW ADA instance for SID: {client_sid}")
+    try:
+        session = session_manager.create_session(client_sid, binary_audio=bool((auth or {}).get('binary_audio')))
+        print("    ADA instance created and tasks scheduled.")
+    except ValueError as e:
+        print(f"    ERROR initializing ADA (ValueError) for SID {client_sid}: {e}")
+        emit('error', {'message': f'Failed to initialize assistant: {e}'}, room=client_sid)
+        return
+    except Exception as e:
+        print(f"    ERROR initializing ADA (Unexpected) for SID {client_sid}: {e}")
+        emit('error', {'message': f'Unexpected error initializing assistant: {e}'}, room=client_sid)
+        return
+
+    emit('status', {'message': 'Connected to ADA Assistant'}, room=client_sid)
     print(f"--- handle_connect finished for SID: {client_sid} ---\n")
 
 
 @socketio.on('disconnect')
 def handle_disconnect():
     """ Handles client disconnections """
-    global ada_instance
     client_sid = request.sid
     print(f"\n--- handle_disconnect called for SID: {client_sid} ---")
 
-    if ada_instance and ada_instance.client_sid == client_sid:
-        print(f"    Designated client {client_sid} disconnected. Attempting to stop ADA.")
-        if ada_loop and ada_loop.is_running():
-            future = asyncio.run_coroutine_threadsafe(ada_instance.stop_all_tasks(), ada_loop)
-            try:
-                future.result(timeout=10)
-                print("    ADA tasks stopped successfully.")
-            except TimeoutError:
-                print("    Timeout waiting for ADA tasks to stop.")
-            except Exception as e:
-                print(f"    Exception during ADA task stop: {e}")
-            finally:
-                 pass # Keep loop running
-
-        else:
-             print(f"    Cannot stop ADA tasks: asyncio loop not available or not running.")
-
-        ada_instance = None
-        print("    ADA instance cleared.")
-
-    elif ada_instance:
-         print(f"    Disconnecting client {client_sid} is NOT the designated client ({ada_instance.client_sid}). ADA remains active.")
+    if session_manager.end_session(client_sid):
+        print(f"    ADA instance cleared for SID: {client_sid}.")
     else:
          print(f"    Client {client_sid} disconnected, but no active ADA instance found.")
 
@@ -136,16 +91,17 @@ def handle_text_message(data):
     client_sid = request.sid
     message = data.get('message', '')
     print(f"Received text from {client_sid}: {message}")
-    if ada_instance and ada_instance.client_sid == client_sid:
-        if ada_loop and ada_loop.is_running():
+    session = session_manager.get(client_sid)
+    if session:
+        if session.is_ready():
             # Process text with end_of_turn=True implicitly handled in process_input -> run_gemini_session
-            asyncio.run_coroutine_threadsafe(ada_instance.process_input(message, is_final_turn_input=True), ada_loop)
+            session.submit(session.ada.process_input(message, is_final_turn_input=True))
             print(f"    Text message forwarded to ADA for SID: {client_sid}")
         else:
             print(f"    Cannot process text message for SID {client_sid}: asyncio loop not ready.")
             emit('error', {'message': 'Assistant busy or loop error.'}, room=client_sid)
     else:
-        print(f"    ADA instance not ready or SID mismatch for text message from {client_sid}.")
+        print(f"    ADA instance not ready for text message from {client_sid}.")
         emit('error', {'message': 'Assistant not ready or session mismatch.'}, room=client_sid)
 
 
@@ -155,10 +111,11 @@ def handle_transcribed_text(data):
     client_sid = request.sid
     transcript = data.get('transcript', '')
     print(f"Received transcript from {client_sid}: {transcript}")
-    if transcript and ada_instance and ada_instance.client_sid == client_sid:
-         if ada_loop and ada_loop.is_running():
+    session = session_manager.get(client_sid)
+    if transcript and session:
+         if session.is_ready():
             # Process transcript with end_of_turn=True implicitly handled in process_input -> run_gemini_session
-            asyncio.run_coroutine_threadsafe(ada_instance.process_input(transcript, is_final_turn_input=True), ada_loop)
+            session.submit(session.ada.process_input(transcript, is_final_turn_input=True))
             print(f"    Transcript forwarded to ADA for SID: {client_sid}")
          else:
              print(f"    Cannot process transcript for SID {client_sid}: asyncio loop not ready.")
@@ -166,7 +123,7 @@ def handle_transcribed_text(data):
     elif not transcript:
          print("    Received empty transcript.")
     else:
-         print(f"    ADA instance not ready or SID mismatch for transcript from {client_sid}.")
+         print(f"    ADA instance not ready for transcript from {client_sid}.")
 
 
 # **** ADD VIDEO FRAME HANDLER ****
@@ -175,56 +132,46 @@ def handle_video_frame(data):
     """ Receives base64 video frame data from client """
     client_sid = request.sid
     frame_data_url = data.get('frame') # Expecting data URL like 'data:image/jpeg;base64,xxxxx'
+    session = session_manager.get(client_sid)
+
+    if frame_data_url and session and session.is_ready():
+        print(f"Received video frame from {client_sid}, forwarding...") # Optional: very verbose
+        session.submit(session.ada.process_video_frame(frame_data_url))
+
+@socketio.on('send_video_frame_binary')
+def handle_video_frame_binary(frame_bytes):
+    """ Receives a raw JPEG frame as a binary attachment (no data URL, no base64) """
+    client_sid = request.sid
+    session = session_manager.get(client_sid)
 
-    if frame_data_url and ada_instance and ada_instance.client_sid == client_sid:
-        if ada_loop and ada_loop.is_running():
-            print(f"Received video frame from {client_sid}, forwarding...") # Optional: very verbose
-            asyncio.run_coroutine_threadsafe(ada_instance.process_video_frame(frame_data_url), ada_loop)
-        pass
+    if frame_bytes and session and session.is_ready():
+        session.submit(session.ada.process_video_frame_bytes(frame_bytes))
 
 @socketio.on('video_feed_stopped')
 def handle_video_feed_stopped():
     """ Client signaled that the video feed has stopped. """
     client_sid = request.sid
     print(f"Received video_feed_stopped signal from {client_sid}.")
-    if ada_instance and ada_instance.client_sid == client_sid:
-        if ada_loop and ada_loop.is_running():
+    session = session_manager.get(client_sid)
+    if session:
+        if session.is_ready():
             # Call a method on ADA instance to clear its video queue
-            asyncio.run_coroutine_threadsafe(ada_instance.clear_video_queue(), ada_loop)
+            session.submit(session.ada.clear_video_queue())
             print(f"    Video frame queue clearing requested for SID: {client_sid}")
         else:
             print(f"    Cannot clear video queue for SID {client_sid}: asyncio loop not ready.")
     else:
-        print(f"    ADA instance not ready or SID mismatch for video_feed_stopped from {client_sid}.")
+        print(f"    ADA instance not ready for video_feed_stopped from {client_sid}.")
 
 
 if __name__ == '__main__':
-    print("Starting Flask-SocketIO server...")
+    print(f"Starting Flask-SocketIO server on port {ADA_SERVER_PORT}...")
+    ada_pool.start()
     try:
-        socketio.run(app, debug=True, host='0.0.0.0', port=5000, use_reloader=False)
+        socketio.run(app, debug=True, host='0.0.0.0', port=ADA_SERVER_PORT, use_reloader=False)
     finally:
         print("\nServer shutting down...")
-        if ada_instance:
-             print("Attempting to stop active ADA instance on server shutdown...")
-             if ada_loop and ada_loop.is_running():
-                 future = asyncio.run_coroutine_threadsafe(ada_instance.stop_all_tasks(), ada_loop)
-                 try:
-                     future.result(timeout=5)
-                     print("ADA tasks stopped.")
-                 except TimeoutError:
-                     print("Timeout stopping ADA tasks during shutdown.")
-                 except Exception as e:
-                     print(f"Exception stopping ADA tasks during shutdown: {e}")
-             else:
-                 print("Cannot stop ADA instance: asyncio loop not available.")
-             ada_instance = None
-
-        if ada_loop and ada_loop.is_running():
-             print("Stopping asyncio loop from main thread...")
-             ada_loop.call_soon_threadsafe(ada_loop.stop)
-             if ada_thread and ada_thread.is_alive():
-                 ada_thread.join(timeout=5)
-                 if ada_thread.is_alive():
-                     print("Warning: Asyncio thread did not exit cleanly.")
-             print("Asyncio loop/thread stop initiated.")
+        print(f"Attempting to stop {session_manager.active_count()} active ADA session(s) on server shutdown...")
+        session_manager.shutdown(timeout=5)
+        ada_pool.stop()
         print("Shutdown complete.")
\ No newline at end of file
@@ -0,0 +1,188 @@
+# app_async.py (Native asyncio Socket.IO server: handlers and ADA coroutines share ONE event loop)
+#
+# Alternative to app.py. app.py runs Flask-SocketIO in 'threading' mode and bridges every
+# inbound event into an ADA loop thread with run_coroutine_threadsafe, and every outbound
+# emit back out again. Here python-socketio's AsyncServer runs on aiohttp, so socket
+# handlers await ADA coroutines directly and ADA's emits are queued on the same loop.
+#
+# Run with:  python app_async.py
+import asyncio
+import os
+import time
+from dotenv import load_dotenv
+from aiohttp import web
+import socketio
+
+load_dotenv()
+from ADA_Online import ADA # Make sure filename matches ADA_Online.py
+from ada_pool import ADAPool
+import metrics
+
+REACT_APP_PORT = os.getenv('REACT_APP_PORT', '5173')
+REACT_APP_ORIGIN = f"http://localhost:{REACT_APP_PORT}"
+REACT_APP_ORIGIN_IP = f"http://127.0.0.1:{REACT_APP_PORT}"
+
+sio = socketio.AsyncServer(
+    async_mode='aiohttp',
+    cors_allowed_origins=[REACT_APP_ORIGIN, REACT_APP_ORIGIN_IP]
+)
+app = web.Application()
+sio.attach(app)
+
+async def metrics_endpoint(request):
+    """ Prometheus text format, same registry as app.py's /metrics. """
+    return web.Response(text=metrics.render(), content_type='text/plain', charset='utf-8')
+
+app.router.add_get('/metrics', metrics_endpoint)
+
+
+class AsyncEmitter:
+    """
+    Gives ADA the synchronous `emit(event, data, room=...)` it expects from Flask-SocketIO.
+    Emits are queued and sent in order by one pump task on the running loop.
+    """
+    def __init__(self, server):
+        self.server = server
+        self.queue = None
+        self.pump_task = None
+
+    def emit(self, event, data=None, room=None, **kwargs):
+        if self.pump_task is None or self.pump_task.done():
+            self.queue = asyncio.Queue()
+            self.pump_task = asyncio.get_running_loop().create_task(self._pump())
+        self.queue.put_nowait((event, data, room, kwargs))
+
+    async def _pump(self):
+        while True:
+            event, data, room, kwargs = await self.queue.get()
+            try:
+                await self.server.emit(event, data, room=room, **kwargs)
+            except Exception as e:
+                print(f"Error emitting '{event}' to {room}: {e}")
+
+    async def close(self):
+        if self.pump_task and not self.pump_task.done():
+            self.pump_task.cancel()
+            await asyncio.gather(self.pump_task, return_exceptions=True)
+        self.pump_task = None
+
+
+emitter = metrics.MeteredEmitter(AsyncEmitter(sio))
+ada_sessions = {}
+metrics.QUEUE_DEPTH.set_callback(lambda: metrics.queue_depths(list(ada_sessions.values())))
+metrics.ACTIVE_SESSIONS.set_callback(lambda: len(ada_sessions))
+ada_pool = ADAPool(lambda **kwargs: ADA(**kwargs)) # Late-bound so ADA can be swapped (e.g. by benchmarks)
+
+@sio.event
+async def connect(sid, environ, auth=None):
+    """ Handles new client connections. `auth` carries client capabilities (e.g. binary_audio). """
+    print(f"\n--- connect called for SID: {sid} ---")
+    connected_at = time.perf_counter()
+    try:
+        ada = ada_pool.claim(socketio_instance=emitter, client_sid=sid)
+        ada.binary_audio = bool((auth or {}).get('binary_audio'))
+        await ada.start_all_tasks()
+        ada_sessions[sid] = ada
+        print("    ADA instance created and tasks started.")
+        ready_latency = time.perf_counter() - connected_at
+        metrics.SESSION_READY.observe(ready_latency)
+        print(f"    Connect-to-ready latency for SID {sid}: {ready_latency * 1000:.1f} ms")
+    except ValueError as e:
+        print(f"    ERROR initializing ADA (ValueError) for SID {sid}: {e}")
+        await sio.emit('error', {'message': f'Failed to initialize assistant: {e}'}, room=sid)
+        return
+    except Exception as e:
+        print(f"    ERROR initializing ADA (Unexpected) for SID {sid}: {e}")
+        await sio.emit('error', {'message': f'Unexpected error initializing assistant: {e}'}, room=sid)
+        return
+    await sio.emit('status', {'message': 'Connected to ADA Assistant'}, room=sid)
+    print(f"--- connect finished for SID: {sid} ---\n")
+
+@sio.event
+async def disconnect(sid):
+    """ Handles client disconnections """
+    print(f"\n--- disconnect called for SID: {sid} ---")
+    ada = ada_sessions.pop(sid, None)
+    if ada:
+        try:
+            await asyncio.wait_for(ada.stop_all_tasks(), timeout=10)
+            print("    ADA tasks stopped successfully.")
+        except asyncio.TimeoutError:
+            print("    Timeout waiting for ADA tasks to stop.")
+        except Exception as e:
+            print(f"    Exception during ADA task stop: {e}")
+    else:
+        print(f"    Client {sid} disconnected, but no active ADA instance found.")
+    print(f"--- disconnect finished for SID: {sid} ---\n")
+
+@sio.event
+async def send_text_message(sid, data):
+    """ Receives text message from client's input box """
+    message = data.get('message', '')
+    print(f"Received text from {sid}: {message}")
+    ada = ada_sessions.get(sid)
+    if ada:
+        await ada.process_input(message, is_final_turn_input=True)
+    else:
+        print(f"    ADA instance not ready for text message from {sid}.")
+        await sio.emit('error', {'message': 'Assistant not ready or session mismatch.'}, room=sid)
+
+@sio.event
+async def send_transcribed_text(sid, data):
+    """ Receives final transcribed text from client's Web Speech API """
+    transcript = data.get('transcript', '')
+    print(f"Received transcript from {sid}: {transcript}")
+    ada = ada_sessions.get(sid)
+    if transcript and ada:
+        await ada.process_input(transcript, is_final_turn_input=True)
+    elif not transcript:
+        print("    Received empty transcript.")
+    else:
+        print(f"    ADA instance not ready for transcript from {sid}.")
+
+@sio.event
+async def send_video_frame(sid, data):
+    """ Receives base64 video frame data from client """
+    frame_data_url = data.get('frame') # Expecting data URL like 'data:image/jpeg;base64,xxxxx'
+    ada = ada_sessions.get(sid)
+    if frame_data_url and ada:
+        await ada.process_video_frame(frame_data_url)
+
+@sio.event
+async def send_video_frame_binary(sid, frame_bytes):
+    """ Receives a raw JPEG frame as a binary attachment (no data URL, no base64) """
+    ada = ada_sessions.get(sid)
+    if frame_bytes and ada:
+        await ada.process_video_frame_bytes(frame_bytes)
+
+@sio.event
+async def video_feed_stopped(sid):
+    """ Client signaled that the video feed has stopped. """
+    print(f"Received video_feed_stopped signal from {sid}.")
+    ada = ada_sessions.get(sid)
+    if ada:
+        await ada.clear_video_queue()
+        print(f"    Video frame queue cleared for SID: {sid}")
+
+async def on_shutdown(app):
+    print(f"\nServer shutting down, stopping {len(ada_sessions)} active ADA session(s)...")
+    for sid, ada in list(ada_sessions.items()):
+        try:
+            await asyncio.wait_for(ada.stop_all_tasks(), timeout=5)
+        except Exception as e:
+            print(f"Exception stopping ADA tasks for {sid} during shutdown: {e}")
+    ada_sessions.clear()
+    await emitter.close()
+    ada_pool.stop()
+    print("Shutdown complete.")
+
+async def on_startup(app):
+    ada_pool.start()
+
+app.on_startup.append(on_startup)
+app.on_shutdown.append(on_shutdown)
+
+
+if __name__ == '__main__':
+    print("Starting asyncio Socket.IO server (aiohttp)...")
+    web.run_app(app, host='0.0.0.0', port=int(os.getenv('ADA_SERVER_PORT', '5000')))
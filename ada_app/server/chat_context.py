@@ -0,0 +1,174 @@
+# server/chat_context.py (Keeps the web chat's history bounded: stale images/tool payloads out, old turns summarized)
+#
+# The google-genai chat object resends its whole history with every send_message_stream.
+# After each turn ChatContextManager.compact() looks at that history and, when needed,
+# recreates the chat with a smaller one:
+#   - image parts other than the newest one are replaced by a short placeholder (the
+#     newest stays because unchanged webcam frames are not resent, see frame_preprocess.py),
+#   - function responses older than the last CONTEXT_KEEP_RECENT_TURNS turns are cut down,
+#   - once the estimated size is still over CONTEXT_TOKEN_BUDGET, every turn except the
+#     most recent ones is rolled into a single summary exchange.
+# Turns are only ever dropped whole, so function_call/function_response pairs stay intact.
+import json
+import os
+
+from google.genai import types
+
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "24000"))
+CONTEXT_KEEP_RECENT_TURNS = int(os.getenv("CONTEXT_KEEP_RECENT_TURNS", "4"))
+CONTEXT_SUMMARY_MODEL = os.getenv("CONTEXT_SUMMARY_MODEL") # Defaults to the chat model
+CONTEXT_TOOL_PAYLOAD_CHARS = 300 # What is kept of an old function response
+IMAGE_TOKEN_ESTIMATE = 258 # Gemini's token cost for one image part
+CHARS_PER_TOKEN = 4
+IMAGE_PLACEHOLDER = "[webcam image from an earlier turn omitted]"
+SUMMARY_PREFIX = "Summary of our earlier conversation:"
+
+SUMMARY_PROMPT = (
+    "Summarize the conversation below for your own future reference. Keep names, facts the "
+    "user shared, preferences, decisions, open questions and results of tool calls that may "
+    "matter later. Be concise; plain prose, no preamble.\n\n"
+)
+
+
+def estimate_part_tokens(part):
+    if part.inline_data is not None or part.file_data is not None:
+        return IMAGE_TOKEN_ESTIMATE
+    if part.text:
+        return len(part.text) // CHARS_PER_TOKEN + 1
+    if part.function_call is not None:
+        return len(json.dumps(part.function_call.args or {}, default=str)) // CHARS_PER_TOKEN + 8
+    if part.function_response is not None:
+        return len(json.dumps(part.function_response.response or {}, default=str)) // CHARS_PER_TOKEN + 8
+    return 1
+
+
+def estimate_tokens(contents):
+    """ Rough token count of a list of Contents (~4 characters per token, fixed cost per image). """
+    return sum(estimate_part_tokens(part) for content in contents for part in (content.parts or []))
+
+
+def _has_image(content):
+    return any(p.inline_data is not None or p.file_data is not None for p in content.parts or [])
+
+
+def split_turns(history):
+    """ Groups history into turns; a turn starts at each user message that is not a function response. """
+    turns = []
+    for content in history:
+        parts = content.parts or []
+        starts_turn = content.role == "user" and not any(p.function_response is not None for p in parts)
+        if starts_turn or not turns:
+            turns.append([])
+        turns[-1].append(content)
+    return turns
+
+
+def _transcript(turns):
+    lines = []
+    for turn in turns:
+        for content in turn:
+            for part in content.parts or []:
+                if part.text:
+                    lines.append(f"{content.role}: {part.text}")
+                elif part.function_call is not None:
+                    lines.append(f"{content.role} called {part.function_call.name}({json.dumps(part.function_call.args or {}, default=str)})")
+                elif part.function_response is not None:
+                    payload = json.dumps(part.function_response.response or {}, default=str)
+                    lines.append(f"tool {part.function_response.name} returned: {payload[:CONTEXT_TOOL_PAYLOAD_CHARS * 3]}")
+    return "\n".join(lines)
+
+
+class ChatContextManager:
+    """ Per-session history trimmer. compact(chat) returns the chat to use for the next turn. """
+    def __init__(self, client, model, config, token_budget=CONTEXT_TOKEN_BUDGET,
+                 keep_recent_turns=CONTEXT_KEEP_RECENT_TURNS, summary_model=CONTEXT_SUMMARY_MODEL):
+        self.client = client
+        self.model = model
+        self.config = config
+        self.token_budget = token_budget
+        self.keep_recent_turns = max(1, keep_recent_turns)
+        self.summary_model = summary_model or model
+        self.last_token_estimate = 0
+        self.image_in_history = False
+
+    def _strip_turn(self, turn, drop_images, trim_tool_payloads):
+        """ Returns (contents, changed) with stale images and/or tool payloads replaced. """
+        changed = False
+        stripped = []
+        for content in turn:
+            parts = []
+            for part in content.parts or []:
+                if drop_images and (part.inline_data is not None or part.file_data is not None):
+                    parts.append(types.Part(text=IMAGE_PLACEHOLDER))
+                    changed = True
+                elif trim_tool_payloads and part.function_response is not None:
+                    payload = json.dumps(part.function_response.response or {}, default=str)
+                    if len(payload) > CONTEXT_TOOL_PAYLOAD_CHARS:
+                        parts.append(types.Part.from_function_response(
+                            name=part.function_response.name,
+                            response={"truncated_result": payload[:CONTEXT_TOOL_PAYLOAD_CHARS] + "..."}))
+                        changed = True
+                    else:
+                        parts.append(part)
+                else:
+                    parts.append(part)
+            stripped.append(types.Content(role=content.role, parts=parts))
+        return stripped, changed
+
+    async def _summarize(self, turns):
+        response = await self.client.aio.models.generate_content(
+            model=self.summary_model,
+            contents=[SUMMARY_PROMPT + _transcript(turns)],
+        )
+        return (response.text or "").strip()
+
+    def discard_unanswered_call(self, chat):
+        """
+        After an interrupted turn: if the history ends in a function call that never got its
+        response, drops that whole turn (the API rejects a call without a response).
+        """
+        history = chat.get_history(curated=True)
+        if not history or not any(p.function_call is not None for p in history[-1].parts or []):
+            return chat
+        kept = [c for turn in split_turns(history)[:-1] for c in turn]
+        return self.client.aio.chats.create(model=self.model, config=self.config, history=kept)
+
+    async def compact(self, chat):
+        """ Recreates `chat` with a trimmed history if anything is stale or over budget; else returns it unchanged. """
+        history = chat.get_history(curated=True)
+        turns = split_turns(history)
+        changed = False
+        trimmed_turns = []
+        image_turns = [i for i, turn in enumerate(turns) if any(_has_image(c) for c in turn)]
+        newest_image_turn = image_turns[-1] if image_turns else None
+        for index, turn in enumerate(turns):
+            age = len(turns) - 1 - index # 0 = the turn that just finished
+            turn, turn_changed = self._strip_turn(
+                turn, drop_images=index != newest_image_turn, trim_tool_payloads=age >= self.keep_recent_turns)
+            changed = changed or turn_changed
+            trimmed_turns.append(turn)
+
+        total = estimate_tokens([c for turn in trimmed_turns for c in turn])
+        if total > self.token_budget and len(trimmed_turns) > self.keep_recent_turns:
+            older, recent = trimmed_turns[:-self.keep_recent_turns], trimmed_turns[-self.keep_recent_turns:]
+            try:
+                summary = await self._summarize(older)
+            except Exception as e:
+                print(f"Context: summarization failed ({e}); dropping the oldest turns instead.")
+                summary = ""
+            summary_turn = []
+            if summary:
+                summary_turn = [[
+                    types.Content(role="user", parts=[types.Part(text=f"{SUMMARY_PREFIX}\n{summary}")]),
+                    types.Content(role="model", parts=[types.Part(text="Understood, I'll keep that in mind.")]),
+                ]]
+            print(f"Context: ~{total} tokens over budget {self.token_budget}; rolled {len(older)} turn(s) into a summary.")
+            trimmed_turns = summary_turn + recent
+            changed = True
+
+        new_history = [c for turn in trimmed_turns for c in turn]
+        self.last_token_estimate = estimate_tokens(new_history)
+        self.image_in_history = any(_has_image(c) for c in new_history)
+        if not changed:
+            return chat
+        return self.client.aio.chats.create(model=self.model, config=self.config, history=new_history)
@@ -0,0 +1,204 @@
+# server/elevenlabs_stream.py (One long-lived ElevenLabs TTS websocket per session, one context per turn)
+#
+# Uses ElevenLabs' multi-stream-input endpoint: a single websocket carries several
+# independent "contexts", so each turn opens a fresh context_id on the connection that is
+# already open instead of paying TLS + websocket handshake + voice setup before the first
+# audio of every turn. The connection is opened when the session starts, kept open with
+# a long inactivity timeout, and re-established in the background with exponential
+# backoff whenever it fails or drops; the backoff only resets once a connection has
+# proven itself (stayed up TTS_STABLE_CONNECTION_SECONDS or delivered audio). Audio is only delivered for the current turn's context, so
+# audio still in flight for an abandoned turn is discarded.
+import asyncio
+import itertools
+import json
+import os
+
+import websockets
+
+ELEVENLABS_WS_BASE = os.getenv("ELEVENLABS_WS_BASE", "wss://api.elevenlabs.io") # Point at a local fake for benchmarks
+ELEVENLABS_MODEL_ID = os.getenv("ELEVENLABS_MODEL_ID", "eleven_flash_v2_5")
+ELEVENLABS_INACTIVITY_TIMEOUT = int(os.getenv("ELEVENLABS_INACTIVITY_TIMEOUT", "180")) # Seconds; 180 is the service maximum
+TTS_RECONNECT_INITIAL_DELAY = 0.5
+TTS_RECONNECT_MAX_DELAY = 10.0
+TTS_CONNECT_WAIT_SECONDS = 5.0 # How long a turn waits for a (re)connect before giving up on its audio
+TTS_STABLE_CONNECTION_SECONDS = 30.0 # A connection up this long counts as healthy and resets the backoff
+
+DEFAULT_VOICE_SETTINGS = {"stability": 0.4, "similarity_boost": 0.8, "speed": 1.1}
+DEFAULT_GENERATION_CONFIG = {"chunk_length_schedule": [120, 160, 250, 290]}
+
+
+def multi_stream_uri(voice_id, base=None, model_id=ELEVENLABS_MODEL_ID, output_format="pcm_24000"):
+    base = base or ELEVENLABS_WS_BASE
+    return (f"{base}/v1/text-to-speech/{voice_id}/multi-stream-input"
+            f"?model_id={model_id}&output_format={output_format}&inactivity_timeout={ELEVENLABS_INACTIVITY_TIMEOUT}")
+
+
+async def _open_websocket(uri, api_key):
+    headers = {"xi-api-key": api_key} if api_key else {}
+    try:
+        return await websockets.connect(uri, additional_headers=headers) # websockets >= 14
+    except TypeError:
+        return await websockets.connect(uri, extra_headers=headers) # Older websockets releases
+
+
+class ElevenLabsConnection:
+    """
+    Persistent multi-context TTS connection. on_audio(audio_b64) is called for every audio
+    message of the active context. Must be used from a single event loop.
+    """
+    def __init__(self, uri, api_key, on_audio, voice_settings=None, generation_config=None):
+        self.uri = uri
+        self.api_key = api_key
+        self.on_audio = on_audio
+        self.voice_settings = voice_settings or DEFAULT_VOICE_SETTINGS
+        self.generation_config = generation_config or DEFAULT_GENERATION_CONFIG
+        self.websocket = None
+        self.active_context = None
+        self.connects = 0
+        self._connected = asyncio.Event()
+        self._initialized_contexts = set() # Contexts set up on the current websocket
+        self._cancelled_contexts = set() # Interrupted turns: late text for them is dropped
+        self._context_ids = itertools.count(1)
+        self._runner = None
+        self._closing = False
+
+    # --- Connection lifecycle ---
+    async def start(self):
+        """ Opens the connection in the background and waits (briefly) until it is ready. """
+        if self._runner is None or self._runner.done():
+            self._closing = False
+            self._runner = asyncio.create_task(self._run())
+        try:
+            await asyncio.wait_for(self._connected.wait(), timeout=TTS_CONNECT_WAIT_SECONDS)
+        except asyncio.TimeoutError:
+            print("ElevenLabs connection not ready yet; will keep retrying in the background.")
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        delay = TTS_RECONNECT_INITIAL_DELAY
+        while not self._closing:
+            try:
+                websocket = await _open_websocket(self.uri, self.api_key)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"ElevenLabs connect failed ({e}). Retrying in {delay:.1f}s...")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, TTS_RECONNECT_MAX_DELAY)
+                continue
+
+            self.websocket = websocket
+            self._initialized_contexts = set()
+            self.connects += 1
+            self._connected.set()
+            connected_at = loop.time()
+            delivered_audio = False
+            print("ElevenLabs WebSocket connected (persistent, multi-context).")
+            try:
+                async for message in websocket:
+                    delivered_audio = self._handle_message(message) or delivered_audio
+            except asyncio.CancelledError:
+                raise
+            except websockets.exceptions.ConnectionClosed as e:
+                print(f"ElevenLabs WebSocket closed ({e}).")
+            except Exception as e:
+                print(f"Error in ElevenLabs listener: {e}")
+            finally:
+                self._connected.clear()
+                self.websocket = None
+                try: await websocket.close()
+                except Exception: pass
+            if self._closing:
+                break
+            # A connection that is accepted and then dropped straight away must not turn into a tight loop
+            if delivered_audio or loop.time() - connected_at >= TTS_STABLE_CONNECTION_SECONDS:
+                delay = TTS_RECONNECT_INITIAL_DELAY
+            print(f"Reconnecting ElevenLabs WebSocket in {delay:.1f}s...")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, TTS_RECONNECT_MAX_DELAY)
+
+    def _handle_message(self, message):
+        """ Routes audio to on_audio; returns True if the message carried audio (for any context). """
+        data = json.loads(message)
+        context_id = data.get("contextId") or data.get("context_id")
+        if not data.get("audio"):
+            return False
+        if context_id == self.active_context:
+            self.on_audio(data["audio"])
+        return True
+
+    async def close(self):
+        self._closing = True
+        websocket = self.websocket
+        if websocket is not None:
+            try:
+                await websocket.send(json.dumps({"close_socket": True}))
+            except Exception:
+                pass
+        if self._runner and not self._runner.done():
+            self._runner.cancel()
+            await asyncio.gather(self._runner, return_exceptions=True)
+        self._runner = None
+
+    # --- Per-turn contexts ---
+    async def _send(self, payload):
+        """ Sends on the current websocket, waiting for a reconnect if it is down. Returns False if it gave up. """
+        if payload.get("context_id") in self._cancelled_contexts:
+            return False
+        for _ in range(2):
+            try:
+                await asyncio.wait_for(self._connected.wait(), timeout=TTS_CONNECT_WAIT_SECONDS)
+            except asyncio.TimeoutError:
+                print("ElevenLabs connection unavailable; dropping TTS text for this turn.")
+                return False
+            websocket = self.websocket
+            if websocket is None:
+                continue
+            context_id = payload.get("context_id")
+            try:
+                if context_id and context_id not in self._initialized_contexts and not payload.get("close_context"):
+                    await websocket.send(json.dumps({
+                        "text": " ", "context_id": context_id,
+                        "voice_settings": self.voice_settings, "generation_config": self.generation_config,
+                    }))
+                    self._initialized_contexts.add(context_id)
+                await websocket.send(json.dumps(payload))
+                return True
+            except websockets.exceptions.ConnectionClosed:
+                if self.websocket is websocket: # Not yet replaced by a reconnect: wait for the next one
+                    self._connected.clear()
+        return False
+
+    async def new_context(self):
+        """ Starts a new turn: closes the previous turn's context and routes audio to the new one. """
+        previous = self.active_context
+        self.active_context = f"turn-{next(self._context_ids)}"
+        # Only the turn's own sender can still use a cancelled id, and it has moved on to this one
+        self._cancelled_contexts.clear()
+        if previous and previous in self._initialized_contexts and self.websocket is not None:
+            self._initialized_contexts.discard(previous)
+            try:
+                await self.websocket.send(json.dumps({"context_id": previous, "close_context": True}))
+            except Exception:
+                pass
+        return self.active_context
+
+    async def send_text(self, context_id, text):
+        return await self._send({"text": text, "context_id": context_id})
+
+    async def flush(self, context_id):
+        """ End of the turn's text: generate whatever is still buffered for the context. """
+        if context_id in self._initialized_contexts:
+            await self._send({"text": "", "context_id": context_id, "flush": True})
+
+    async def cancel_context(self, context_id):
+        """ Stops a context immediately (used to interrupt speech); its remaining audio is discarded. """
+        if self.active_context == context_id:
+            self.active_context = None
+        self._cancelled_contexts.add(context_id)
+        if context_id in self._initialized_contexts and self.websocket is not None:
+            self._initialized_contexts.discard(context_id)
+            try:
+                await self.websocket.send(json.dumps({"context_id": context_id, "close_context": True}))
+            except Exception:
+                pass
@@ -0,0 +1,130 @@
+# server/frame_preprocess.py (Downscale, re-encode and de-duplicate webcam frames before they go to Gemini)
+#
+# Frames arrive at the client's capture resolution. Before one is attached to a turn it is
+# resized to FRAME_MAX_DIMENSION, re-encoded at FRAME_JPEG_QUALITY and given a 64-bit
+# difference hash (dHash). A frame whose hash is within FRAME_DEDUP_DISTANCE bits of the
+# last frame the model was sent is skipped: the scene hasn't changed and that image is
+# still in the chat history. Prepared frames are cached by their raw bytes, so the same
+# frame is never decoded twice. Pillow is optional; without it frames pass through
+# unchanged and only byte-identical frames are de-duplicated.
+import asyncio
+import collections
+import hashlib
+import io
+import os
+import threading
+
+import metrics
+
+FRAME_MAX_DIMENSION = int(os.getenv("FRAME_MAX_DIMENSION", "768"))
+FRAME_JPEG_QUALITY = int(os.getenv("FRAME_JPEG_QUALITY", "70"))
+FRAME_DEDUP_DISTANCE = int(os.getenv("FRAME_DEDUP_DISTANCE", "4")) # Max differing dHash bits for "same scene"
+FRAME_CACHE_SIZE = 8
+
+VIDEO_FRAMES = metrics.Counter(
+    "ada_video_frames_total",
+    "Webcam frames considered for a turn, by outcome (sent, duplicate).", labelnames=("result",))
+VIDEO_FRAME_BYTES = metrics.Counter(
+    "ada_video_frame_bytes_total",
+    "Webcam frame bytes before (raw) and after (sent) preprocessing.", labelnames=("stage",))
+
+_pil = None
+_pil_checked = False
+_pil_lock = threading.Lock()
+
+def _load_pillow():
+    """ PIL.Image, or None if Pillow is not installed. Imported on first use only. """
+    global _pil, _pil_checked
+    with _pil_lock:
+        if not _pil_checked:
+            _pil_checked = True
+            try:
+                from PIL import Image
+                _pil = Image
+            except ImportError:
+                print("Pillow not installed: webcam frames are sent unresized, only exact duplicates are skipped.")
+        return _pil
+
+
+def dhash(image, hash_size=8):
+    """ 64-bit difference hash of a PIL image: brightness gradient of a 9x8 grayscale thumbnail. """
+    small = image.convert("L").resize((hash_size + 1, hash_size))
+    pixels = list(small.getdata())
+    value = 0
+    for row in range(hash_size):
+        for col in range(hash_size):
+            left = pixels[row * (hash_size + 1) + col]
+            right = pixels[row * (hash_size + 1) + col + 1]
+            value = (value << 1) | (left > right)
+    return value
+
+
+def hamming(a, b):
+    return bin(a ^ b).count("1")
+
+
+def prepare_frame(frame_bytes, mime_type, max_dimension=FRAME_MAX_DIMENSION, quality=FRAME_JPEG_QUALITY):
+    """ Returns (jpeg_bytes, mime_type, fingerprint). Blocking: run it off the event loop. """
+    Image = _load_pillow()
+    if Image is None:
+        return frame_bytes, mime_type, hashlib.sha1(frame_bytes).hexdigest()
+    with Image.open(io.BytesIO(frame_bytes)) as image:
+        image = image.convert("RGB")
+        fingerprint = dhash(image)
+        if max(image.size) > max_dimension:
+            image.thumbnail((max_dimension, max_dimension))
+        out = io.BytesIO()
+        image.save(out, format="JPEG", quality=quality, optimize=True)
+    prepared = out.getvalue()
+    if len(prepared) >= len(frame_bytes) and mime_type == "image/jpeg":
+        prepared = frame_bytes # Already small enough; keep the original
+    return prepared, "image/jpeg", fingerprint
+
+
+class FramePreprocessor:
+    """ Per-session state: cache of prepared frames and the fingerprint of the last frame sent. """
+    def __init__(self, dedup_distance=FRAME_DEDUP_DISTANCE):
+        self.dedup_distance = dedup_distance
+        self.cache = collections.OrderedDict() # sha1(raw bytes) -> (bytes, mime, fingerprint)
+        self.last_sent_fingerprint = None
+
+    def _is_duplicate(self, fingerprint):
+        previous = self.last_sent_fingerprint
+        if previous is None:
+            return False
+        if isinstance(fingerprint, int) and isinstance(previous, int):
+            return hamming(fingerprint, previous) <= self.dedup_distance
+        return fingerprint == previous
+
+    async def prepare(self, frame_bytes, mime_type="image/jpeg", force=False):
+        """
+        Returns (bytes, mime_type) to attach, or None when the model has already seen this
+        scene. force=True skips the duplicate check (e.g. a periodic refresh).
+        """
+        key = hashlib.sha1(frame_bytes).digest()
+        cached = self.cache.get(key)
+        if cached is None:
+            try:
+                cached = await asyncio.to_thread(prepare_frame, frame_bytes, mime_type)
+            except Exception as e:
+                print(f"Frame preprocessing failed ({e}); sending the frame as received.")
+                cached = (frame_bytes, mime_type, key.hex())
+            self.cache[key] = cached
+            while len(self.cache) > FRAME_CACHE_SIZE:
+                self.cache.popitem(last=False)
+        else:
+            self.cache.move_to_end(key)
+
+        prepared, prepared_mime, fingerprint = cached
+        VIDEO_FRAME_BYTES.inc(len(frame_bytes), stage="raw")
+        if not force and self._is_duplicate(fingerprint):
+            VIDEO_FRAMES.inc(result="duplicate")
+            return None
+        self.last_sent_fingerprint = fingerprint
+        VIDEO_FRAMES.inc(result="sent")
+        VIDEO_FRAME_BYTES.inc(len(prepared), stage="sent")
+        return prepared, prepared_mime
+
+    def forget(self):
+        """ The model no longer has the last frame (e.g. history was reset): send the next one regardless. """
+        self.last_sent_fingerprint = None
@@ -0,0 +1,188 @@
+# server/html_extract.py (Incremental title / meta description / paragraph extraction for search results)
+#
+# Fed chunk by chunk while the page downloads. Only the first max_text_chars of paragraph
+# text are kept, so once that budget is filled `done` is set and the caller stops reading
+# the body: no full download, no full DOM. Built on the stdlib HTMLParser, which tolerates
+# the same broken markup real pages are full of.
+#
+# Parsing is CPU work, so extract_from_response runs it on a small shared pool of parser
+# threads (HTML_PARSE_WORKERS, default 2) instead of the ADA loop thread. This keeps the
+# loop responsive; it does not parse in parallel: HTMLParser is pure Python and holds the
+# GIL, so more threads would only add contention with the loops, hence the small pool.
+# Threads rather than processes because the parser state must live across chunks for the
+# early stop to work. Downloaded chunks are batched into HTML_FEED_BYTES per pool hop.
+import asyncio
+import codecs
+import concurrent.futures
+import os
+import threading
+from html.parser import HTMLParser
+
+HTML_MAX_BYTES = int(os.getenv("HTML_MAX_BYTES", str(512 * 1024))) # Hard cap on bytes read per page
+HTML_CHUNK_SIZE = 16 * 1024
+HTML_FEED_BYTES = 64 * 1024 # Bytes handed to the parser pool per hop (early stop granularity)
+PAGE_TEXT_MAX_CHARS = 1500 # Paragraph text returned per page
+HTML_CONTENT_TYPES = ("text/html", "application/xhtml+xml")
+HTML_PARSE_WORKERS = int(os.getenv("HTML_PARSE_WORKERS", "2")) # GIL-bound: see above
+
+NO_TITLE = "No Title Found"
+NO_DESCRIPTION = "No Description Found"
+NO_PARAGRAPH_TEXT = "No paragraph text found on page."
+
+
+_parse_executor = None
+_parse_executor_lock = threading.Lock()
+
+def get_parse_executor():
+    """ Process-wide parser pool shared by every session and loop shard (off-loop, not CPU-parallel). """
+    global _parse_executor
+    with _parse_executor_lock:
+        if _parse_executor is None:
+            _parse_executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=max(1, HTML_PARSE_WORKERS), thread_name_prefix="html-parse")
+        return _parse_executor
+
+
+def is_html(content_type):
+    """ True for HTML responses (and for a missing Content-Type, which is usually HTML too). """
+    return not content_type or content_type.split(";")[0].strip().lower() in HTML_CONTENT_TYPES
+
+
+class SnippetExtractor(HTMLParser):
+    """ Streaming extractor. feed() text chunks until `done`, then call result(url). """
+    SKIP_TAGS = {"script", "style", "noscript", "template", "svg"}
+
+    def __init__(self, max_text_chars=PAGE_TEXT_MAX_CHARS):
+        super().__init__(convert_charrefs=True)
+        self.max_text_chars = max_text_chars
+        self.title_parts = []
+        self.in_title = False
+        self.title_seen = False
+        self.meta_description = None
+        self.paragraphs = []
+        self.current_paragraph = None
+        self.text_chars = 0
+        self.skip_depth = 0
+        self.done = False
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIP_TAGS:
+            self.skip_depth += 1
+        elif tag == "title" and not self.title_seen:
+            self.in_title = True
+        elif tag == "meta" and self.meta_description is None:
+            attributes = dict(attrs)
+            if (attributes.get("name") or "").lower() == "description" and attributes.get("content"):
+                self.meta_description = attributes["content"].strip()
+        elif tag == "p":
+            self._close_paragraph()
+            self.current_paragraph = []
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIP_TAGS:
+            self.skip_depth = max(0, self.skip_depth - 1)
+        elif tag == "title" and self.in_title:
+            self.in_title = False
+            self.title_seen = True
+        elif tag == "p":
+            self._close_paragraph()
+
+    def handle_data(self, data):
+        if self.skip_depth:
+            return
+        if self.in_title:
+            self.title_parts.append(data)
+        elif self.current_paragraph is not None:
+            self.current_paragraph.append(data)
+
+    def _close_paragraph(self):
+        if self.current_paragraph is None:
+            return
+        text = " ".join("".join(self.current_paragraph).split())
+        self.current_paragraph = None
+        if text:
+            self.paragraphs.append(text)
+            self.text_chars += len(text) + 1
+            if self.text_chars > self.max_text_chars:
+                self.done = True
+
+    def feed(self, data):
+        if not self.done:
+            super().feed(data)
+
+    def close(self):
+        if not self.done:
+            super().close()
+        self._close_paragraph()
+
+    def result(self, url):
+        title = " ".join("".join(self.title_parts).split()) or NO_TITLE
+        full_page_text = " ".join(self.paragraphs)
+        if len(full_page_text) > self.max_text_chars:
+            page_text_summary = full_page_text[:self.max_text_chars] + "..."
+        else:
+            page_text_summary = full_page_text or NO_PARAGRAPH_TEXT
+        return {
+            "url": url,
+            "title": title,
+            "meta_snippet": self.meta_description or NO_DESCRIPTION,
+            "page_content_summary": page_text_summary,
+        }
+
+
+def extract_snippet(html_content, url, max_text_chars=PAGE_TEXT_MAX_CHARS):
+    """ One-shot extraction from an already downloaded page (str or bytes). """
+    if isinstance(html_content, bytes):
+        html_content = html_content.decode("utf-8", errors="replace")
+    extractor = SnippetExtractor(max_text_chars)
+    for start in range(0, len(html_content), HTML_CHUNK_SIZE):
+        extractor.feed(html_content[start:start + HTML_CHUNK_SIZE])
+        if extractor.done:
+            break
+    extractor.close()
+    return extractor.result(url)
+
+
+def _feed(extractor, decoder, chunk, final=False):
+    extractor.feed(decoder.decode(chunk, final=final))
+    if final:
+        extractor.close()
+    return extractor.done
+
+
+async def extract_from_response(response, url, max_bytes=HTML_MAX_BYTES, max_text_chars=PAGE_TEXT_MAX_CHARS):
+    """
+    Streams an aiohttp response body through a SnippetExtractor, stopping at max_bytes or
+    as soon as the paragraph budget is filled. Decoding and parsing run on the parser
+    pool, never on the calling loop, one hop per HTML_FEED_BYTES downloaded.
+    Returns (result, bytes_read).
+    """
+    loop = asyncio.get_running_loop()
+    executor = get_parse_executor()
+    decoder = codecs.getincrementaldecoder(_codec(response.charset))(errors="replace")
+    extractor = SnippetExtractor(max_text_chars)
+    bytes_read = 0
+    pending = []
+    pending_bytes = 0
+    async for chunk in response.content.iter_chunked(HTML_CHUNK_SIZE):
+        chunk = chunk[:max_bytes - bytes_read]
+        bytes_read += len(chunk)
+        pending.append(chunk)
+        pending_bytes += len(chunk)
+        if bytes_read >= max_bytes:
+            break
+        if pending_bytes >= HTML_FEED_BYTES:
+            done = await loop.run_in_executor(executor, _feed, extractor, decoder, b"".join(pending))
+            pending, pending_bytes = [], 0
+            if done:
+                break
+    # Whatever is still pending plus end of input, in one hop
+    await loop.run_in_executor(executor, _feed, extractor, decoder, b"".join(pending), True)
+    return extractor.result(url), bytes_read
+
+
+def _codec(charset):
+    try:
+        return codecs.lookup(charset or "utf-8").name
+    except LookupError:
+        return "utf-8"
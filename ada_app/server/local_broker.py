@@ -0,0 +1,161 @@
+# server/local_broker.py (Socket-based stand-in for Redis/RabbitMQ as the Socket.IO message queue)
+#
+# A tiny fan-out pub/sub broker: every frame a client publishes is delivered to every
+# connected client, the publisher included (python-socketio's PubSubManager relies on
+# receiving its own messages). Frames are length-prefixed; payloads are pickled by the
+# manager, so the broker only ever listens on localhost. Meant for development, tests
+# and single-host multi-worker runs, not as a production broker.
+#
+# Run standalone with:  python local_broker.py [--port 5600]
+import argparse
+import asyncio
+import os
+import pickle
+import socket
+import struct
+import threading
+import time
+from urllib.parse import urlparse
+
+import socketio
+
+LOCAL_BROKER_HOST = "127.0.0.1"
+LOCAL_BROKER_PORT = int(os.getenv("LOCAL_BROKER_PORT", "5600"))
+LOCAL_BROKER_RETRY_INITIAL_SECONDS = 1.0
+LOCAL_BROKER_RETRY_MAX_SECONDS = 60.0
+_HEADER = struct.Struct("!I")
+
+def _pack(channel, payload):
+    channel_bytes = channel.encode("utf-8")
+    body = _HEADER.pack(len(channel_bytes)) + channel_bytes + payload
+    return _HEADER.pack(len(body)) + body
+
+def _unpack(body):
+    (channel_len,) = _HEADER.unpack_from(body)
+    channel = body[_HEADER.size:_HEADER.size + channel_len].decode("utf-8")
+    return channel, body[_HEADER.size + channel_len:]
+
+
+class LocalBroker:
+    """ asyncio TCP fan-out broker. """
+    def __init__(self, host=LOCAL_BROKER_HOST, port=LOCAL_BROKER_PORT):
+        self.host = host
+        self.port = port
+        self.writers = set()
+        self.server = None
+
+    async def _handle(self, reader, writer):
+        self.writers.add(writer)
+        try:
+            while True:
+                header = await reader.readexactly(_HEADER.size)
+                (length,) = _HEADER.unpack(header)
+                frame = header + await reader.readexactly(length)
+                for peer in list(self.writers):
+                    try:
+                        peer.write(frame)
+                    except Exception:
+                        self.writers.discard(peer)
+                await asyncio.gather(*(peer.drain() for peer in list(self.writers)), return_exceptions=True)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self.writers.discard(writer)
+            writer.close()
+
+    async def start(self):
+        self.server = await asyncio.start_server(self._handle, self.host, self.port)
+        print(f"Local Socket.IO broker listening on {self.host}:{self.port}")
+
+    async def serve_forever(self):
+        await self.start()
+        async with self.server:
+            await self.server.serve_forever()
+
+
+def start_broker_thread(host=LOCAL_BROKER_HOST, port=LOCAL_BROKER_PORT):
+    """ Runs a LocalBroker on its own loop thread in this process (handy for tests). Returns the thread. """
+    ready = threading.Event()
+    def run():
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        broker = LocalBroker(host, port)
+        loop.run_until_complete(broker.start())
+        ready.set()
+        loop.run_forever()
+    thread = threading.Thread(target=run, daemon=True, name="local-broker")
+    thread.start()
+    ready.wait(timeout=5)
+    return thread
+
+
+class LocalBrokerManager(socketio.PubSubManager):
+    """
+    python-socketio client manager that talks to LocalBroker.
+    Use with a URL like 'localbroker://127.0.0.1:5600'.
+    """
+    name = 'localbroker'
+
+    def __init__(self, url='localbroker://127.0.0.1:5600', channel='socketio', write_only=False, logger=None):
+        parsed = urlparse(url)
+        self.broker_address = (parsed.hostname or LOCAL_BROKER_HOST, parsed.port or LOCAL_BROKER_PORT)
+        self.publish_socket = None
+        self.publish_lock = threading.Lock()
+        super().__init__(channel=channel, write_only=write_only, logger=logger)
+
+    def _connect(self):
+        return socket.create_connection(self.broker_address, timeout=5)
+
+    def _publish(self, data):
+        frame = _pack(self.channel, pickle.dumps(data))
+        with self.publish_lock:
+            for attempt in range(2):
+                try:
+                    if self.publish_socket is None:
+                        self.publish_socket = self._connect()
+                    self.publish_socket.sendall(frame)
+                    return
+                except OSError:
+                    self.publish_socket = None
+                    if attempt:
+                        raise
+
+    def _listen(self):
+        retry_sleep = LOCAL_BROKER_RETRY_INITIAL_SECONDS
+        while True:
+            conn = None
+            try:
+                conn = self._connect()
+                conn.settimeout(None)
+                retry_sleep = LOCAL_BROKER_RETRY_INITIAL_SECONDS # Connected: the next outage starts over
+                stream = conn.makefile("rb")
+                while True:
+                    header = stream.read(_HEADER.size)
+                    if len(header) < _HEADER.size:
+                        break
+                    (length,) = _HEADER.unpack(header)
+                    body = stream.read(length)
+                    if len(body) < length:
+                        break
+                    channel, payload = _unpack(body)
+                    if channel == self.channel:
+                        yield payload
+                reason = "closed by the broker"
+            except OSError as e:
+                reason = e
+            finally:
+                if conn is not None:
+                    conn.close()
+            # Capped exponential backoff (as RedisManager does), so a broker that is down
+            # or restarting costs one attempt every few seconds, not a spinning thread
+            print(f"Local broker connection lost ({reason}). Reconnecting in {retry_sleep:.0f}s...")
+            time.sleep(retry_sleep)
+            retry_sleep = min(retry_sleep * 2, LOCAL_BROKER_RETRY_MAX_SECONDS)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default=LOCAL_BROKER_HOST)
+    parser.add_argument("--port", type=int, default=LOCAL_BROKER_PORT)
+    args = parser.parse_args()
+    asyncio.run(LocalBroker(args.host, args.port).serve_forever())
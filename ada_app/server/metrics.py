@@ -0,0 +1,245 @@
+# server/metrics.py (Minimal Prometheus text-format metrics: counters, gauges and histograms)
+#
+# Dependency-free on purpose: ADA sessions record into process-wide metrics from their
+# loop threads, and app.py serves render() at /metrics. Every metric is thread-safe.
+import math
+import threading
+
+# Seconds. Covers sub-10 ms emits up to long TTS/tool calls.
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_registry = []
+_registry_lock = threading.Lock()
+
+def _register(metric):
+    with _registry_lock:
+        _registry.append(metric)
+    return metric
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)] + [f'{n}="{_escape(v)}"' for n, v in extra]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        _register(self)
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def _header(self):
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    """ Monotonic counter. """
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        lines = self._header()
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+class Gauge(_Metric):
+    """
+    Point-in-time value. Either set() it, or give it a callback that is evaluated at
+    scrape time and returns a number (no labels) or a {label_values_tuple: number} dict.
+    """
+    kind = "gauge"
+
+    def __init__(self, name, documentation, labelnames=(), callback=None):
+        super().__init__(name, documentation, labelnames)
+        self.callback = callback
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def set_callback(self, callback):
+        self.callback = callback
+
+    def render(self):
+        lines = self._header()
+        if self.callback is not None:
+            try:
+                result = self.callback()
+            except Exception as e:
+                print(f"Metrics: error evaluating gauge {self.name}: {e}")
+                return lines
+            values = result if isinstance(result, dict) else {(): result}
+        else:
+            with self._lock:
+                values = dict(self._values)
+        for key, value in sorted(values.items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+class Histogram(_Metric):
+    """ Cumulative-bucket histogram (seconds by default). """
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            counts, _, _ = state
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            state[1] += value
+            state[2] += 1
+
+    def totals(self):
+        """ {label_values: (count, sum)} recorded so far. """
+        with self._lock:
+            return {key: (state[2], state[1]) for key, state in self._values.items()}
+
+    def render(self):
+        lines = self._header()
+        with self._lock:
+            items = sorted((key, (list(s[0]), s[1], s[2])) for key, s in self._values.items())
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labelnames, key, extra=(("le", _format_value(bound)),))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+def render():
+    """ All registered metrics in Prometheus text exposition format (version 0.0.4). """
+    with _registry_lock:
+        metrics = list(_registry)
+    lines = []
+    for metric in metrics:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+def payload_size(data):
+    """ Approximate wire size of an emit payload: raw bytes, UTF-8 text, containers summed. """
+    if data is None:
+        return 0
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        return len(data)
+    if isinstance(data, str):
+        return len(data.encode("utf-8"))
+    if isinstance(data, dict):
+        return sum(payload_size(k) + payload_size(v) for k, v in data.items())
+    if isinstance(data, (list, tuple)):
+        return sum(payload_size(v) for v in data)
+    return len(str(data))
+
+
+class MeteredEmitter:
+    """ Wraps a Socket.IO server (or AsyncEmitter) and counts emitted events and payload bytes. """
+    def __init__(self, server):
+        self.server = server
+
+    def emit(self, event, data=None, *args, **kwargs):
+        EMIT_BYTES.inc(payload_size(data), event=event)
+        EMITS.inc(event=event)
+        return self.server.emit(event, data, *args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self.server, name)
+
+
+# --- ADA pipeline metrics ---
+INPUT_TO_FIRST_CHUNK = Histogram(
+    "ada_input_to_first_chunk_seconds",
+    "Time from a final user input being received to the first Gemini response chunk.")
+TOOL_DURATION = Histogram(
+    "ada_tool_duration_seconds",
+    "Execution time of each tool (function) call.", labelnames=("tool",))
+INPUT_TO_TTS_REQUEST = Histogram(
+    "ada_input_to_tts_request_seconds",
+    "Time from a final user input being received to the first TTS request of the turn.")
+TTS_REQUEST_DURATION = Histogram(
+    "ada_tts_request_seconds",
+    "Duration of a single TTS synthesis request.")
+INPUT_TO_FIRST_AUDIO = Histogram(
+    "ada_input_to_first_audio_seconds",
+    "Time from a final user input being received to the first audio chunk emitted.")
+BARGE_IN_TO_SILENCE = Histogram(
+    "ada_barge_in_to_silence_seconds",
+    "Time from a user input that interrupts ADA to stop_audio being emitted (generation and TTS cancelled).")
+CHAT_CONTEXT_TOKENS = Histogram(
+    "ada_chat_context_tokens",
+    "Estimated tokens in a web chat's history after each turn's compaction.",
+    buckets=(500, 1000, 2000, 4000, 8000, 16000, 24000, 32000, 64000, 128000))
+QUEUE_DEPTH = Gauge(
+    "ada_queue_depth",
+    "Items waiting in each ADA queue, summed over active sessions.", labelnames=("queue",))
+ACTIVE_SESSIONS = Gauge(
+    "ada_active_sessions",
+    "Connected clients with a running ADA session.")
+
+ADA_POOL_CLAIMS = Counter(
+    "ada_pool_claims_total",
+    "Connects served from the pre-warmed ADA pool (hit) or built inline because it was empty (miss).",
+    labelnames=("result",))
+ADA_POOL_IDLE = Gauge(
+    "ada_pool_idle_instances",
+    "Pre-built ADA instances waiting in the pool.")
+SESSION_READY = Histogram(
+    "ada_session_ready_seconds",
+    "Time from a client connecting to its ADA session's tasks running.")
+EMITS = Counter(
+    "ada_socketio_emits_total",
+    "Socket.IO events emitted to clients.", labelnames=("event",))
+EMIT_BYTES = Counter(
+    "ada_socketio_emit_bytes_total",
+    "Approximate payload bytes emitted to clients.", labelnames=("event",))
+
+
+def queue_depths(adas):
+    """ QUEUE_DEPTH callback values for the given ADA instances (both servers use this). """
+    depths = {("input_queue",): 0, ("response_queue",): 0, ("video_frame_queue",): 0}
+    for ada in adas:
+        for name in ("input_queue", "response_queue", "video_frame_queue"):
+            queue = getattr(ada, name, None)
+            if queue is not None:
+                depths[(name,)] += queue.qsize()
+        if getattr(ada, "latest_video_frame", None) is not None:
+            depths[("video_frame_queue",)] += 1 # Single-frame slot used instead of a queue
+    return depths
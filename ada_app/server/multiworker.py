@@ -0,0 +1,159 @@
+# server/multiworker.py (Runs app.py as several worker processes behind a sticky TCP proxy)
+#
+# Each worker is a normal `python app.py` on its own port. The proxy listens on the public
+# port and hands each new TCP connection to the worker with the fewest open connections.
+# The web client uses the websocket transport only, so a Socket.IO session (and the ADA
+# instance for its SID) lives on one connection and needs no stickiness beyond it; many
+# sessions from one host or NAT (e.g. a local load test) still spread over every worker.
+# With long-polling clients, whose requests arrive on separate connections, pass
+# --affinity ip (ADA_PROXY_AFFINITY=ip) to pin each client IP to one worker instead.
+# Workers share a Socket.IO message queue so emits from any worker reach the right
+# client: ADA_MESSAGE_QUEUE if set, otherwise a local_broker.py started here.
+#
+# Usage (from ada_app/server):  python multiworker.py [--workers 4] [--port 5000] [--affinity ip]
+import argparse
+import asyncio
+import hashlib
+import os
+import signal
+import subprocess
+import sys
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+ADA_WORKERS = int(os.getenv("ADA_WORKERS", str(os.cpu_count() or 1)))
+ADA_PUBLIC_PORT = int(os.getenv("ADA_PUBLIC_PORT", "5000"))
+ADA_WORKER_BASE_PORT = int(os.getenv("ADA_WORKER_BASE_PORT", "5001"))
+ADA_PROXY_AFFINITY = os.getenv("ADA_PROXY_AFFINITY", "connection") # "connection" (least loaded) or "ip"
+PROXY_BUFFER_SIZE = 64 * 1024
+
+SERVER_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def worker_for(client_ip, worker_ports):
+    """ Stable client IP -> worker port mapping (same IP always lands on the same worker); used with affinity "ip". """
+    digest = hashlib.blake2b(client_ip.encode("utf-8"), digest_size=8).digest()
+    return worker_ports[int.from_bytes(digest, "big") % len(worker_ports)]
+
+
+async def _pipe(reader, writer):
+    try:
+        while True:
+            data = await reader.read(PROXY_BUFFER_SIZE)
+            if not data:
+                break
+            writer.write(data)
+            await writer.drain()
+    except (ConnectionError, asyncio.CancelledError):
+        pass
+    finally:
+        try:
+            writer.close()
+        except Exception:
+            pass
+
+
+class StickyProxy:
+    """
+    TCP proxy in front of the workers. affinity="connection" sends each connection to the
+    least-loaded worker; affinity="ip" pins client IPs. Falls over to the next worker if
+    the chosen one refuses.
+    """
+    def __init__(self, worker_ports, host="0.0.0.0", port=ADA_PUBLIC_PORT, affinity=ADA_PROXY_AFFINITY):
+        self.worker_ports = list(worker_ports)
+        self.host = host
+        self.port = port
+        self.affinity = affinity
+        self.open_connections = {p: 0 for p in self.worker_ports}
+        self._next = 0 # Round-robin tie break between equally loaded workers
+
+    def _first_choice(self, client_ip):
+        if self.affinity == "ip":
+            return self.worker_ports.index(worker_for(client_ip, self.worker_ports))
+        count = len(self.worker_ports)
+        start = self._next
+        self._next = (self._next + 1) % count
+        order = [(start + i) % count for i in range(count)]
+        return min(order, key=lambda i: self.open_connections[self.worker_ports[i]])
+
+    async def _handle(self, client_reader, client_writer):
+        client_ip = (client_writer.get_extra_info("peername") or ("unknown",))[0]
+        first = self._first_choice(client_ip)
+        for offset in range(len(self.worker_ports)):
+            port = self.worker_ports[(first + offset) % len(self.worker_ports)]
+            try:
+                upstream_reader, upstream_writer = await asyncio.open_connection("127.0.0.1", port)
+                break
+            except OSError:
+                continue
+        else:
+            print(f"Sticky proxy: no worker available for {client_ip}.")
+            client_writer.close()
+            return
+        self.open_connections[port] += 1
+        try:
+            await asyncio.gather(_pipe(client_reader, upstream_writer), _pipe(upstream_reader, client_writer))
+        finally:
+            self.open_connections[port] -= 1
+
+    async def serve_forever(self):
+        server = await asyncio.start_server(self._handle, self.host, self.port)
+        print(f"Sticky proxy on {self.host}:{self.port} -> workers {self.worker_ports} (affinity: {self.affinity})")
+        async with server:
+            await server.serve_forever()
+
+
+def spawn_workers(count, base_port, message_queue):
+    """ Starts `count` app.py processes on consecutive ports. Loop threads are split across them unless set explicitly. """
+    loop_threads = os.getenv("ADA_LOOP_THREADS") or str(max(1, (os.cpu_count() or 1) // count))
+    workers = []
+    for i in range(count):
+        env = dict(os.environ,
+                   ADA_SERVER_PORT=str(base_port + i),
+                   ADA_MESSAGE_QUEUE=message_queue,
+                   ADA_LOOP_THREADS=loop_threads)
+        workers.append(subprocess.Popen([sys.executable, "app.py"], cwd=SERVER_DIR, env=env))
+        print(f"Started worker {i} (pid {workers[-1].pid}) on port {base_port + i}")
+    return workers
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=ADA_WORKERS)
+    parser.add_argument("--port", type=int, default=ADA_PUBLIC_PORT)
+    parser.add_argument("--base-port", type=int, default=ADA_WORKER_BASE_PORT)
+    parser.add_argument("--affinity", choices=("connection", "ip"), default=ADA_PROXY_AFFINITY,
+                        help="'ip' pins client IPs to a worker (needed for long-polling clients)")
+    args = parser.parse_args()
+
+    children = []
+    message_queue = os.getenv("ADA_MESSAGE_QUEUE")
+    if not message_queue:
+        from local_broker import LOCAL_BROKER_HOST, LOCAL_BROKER_PORT
+        children.append(subprocess.Popen([sys.executable, "local_broker.py", "--port", str(LOCAL_BROKER_PORT)], cwd=SERVER_DIR))
+        message_queue = f"localbroker://{LOCAL_BROKER_HOST}:{LOCAL_BROKER_PORT}"
+
+    workers = spawn_workers(max(1, args.workers), args.base_port, message_queue)
+    children.extend(workers)
+    proxy = StickyProxy([args.base_port + i for i in range(len(workers))], port=args.port, affinity=args.affinity)
+    try:
+        asyncio.run(proxy.serve_forever())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print("\nStopping workers...")
+        for child in children:
+            if child.poll() is None:
+                child.send_signal(signal.SIGINT)
+        for child in children:
+            try:
+                child.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                child.kill()
+        print("All workers stopped.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+# server/page_cache.py (Persistent cache of extracted search-result pages, revalidated with ETag/Last-Modified)
+#
+# Stores only what _fetch_and_extract_snippet produces (title, meta snippet, paragraph
+# summary) plus the response validators, in a small SQLite file shared by every session
+# and worker. Entries validated within PAGE_CACHE_FRESH_SECONDS are served without any
+# network; older ones are revalidated with a conditional GET (a 304 skips download and
+# parsing). Entries older than PAGE_CACHE_MAX_AGE are evicted, and the file is kept to
+# PAGE_CACHE_MAX_ENTRIES rows, least recently validated first.
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+
+import metrics
+
+PAGE_CACHE_PATH = os.getenv("PAGE_CACHE_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".page_cache.sqlite3"))
+PAGE_CACHE_FRESH_SECONDS = float(os.getenv("PAGE_CACHE_FRESH_SECONDS", "3600"))
+PAGE_CACHE_MAX_AGE = float(os.getenv("PAGE_CACHE_MAX_AGE", str(7 * 24 * 3600)))
+PAGE_CACHE_MAX_ENTRIES = int(os.getenv("PAGE_CACHE_MAX_ENTRIES", "5000"))
+PAGE_CACHE_EVICT_EVERY = 100 # Writes between eviction passes
+
+PAGE_CACHE_REQUESTS = metrics.Counter(
+    "ada_page_cache_requests_total",
+    "Search page cache lookups by outcome (fresh, revalidated, stale, miss).", labelnames=("result",))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    url TEXT PRIMARY KEY,
+    title TEXT,
+    meta_snippet TEXT,
+    page_content_summary TEXT,
+    etag TEXT,
+    last_modified TEXT,
+    fetched_at REAL NOT NULL,
+    validated_at REAL NOT NULL
+)
+"""
+
+
+class PageCache:
+    """ SQLite-backed cache. All methods are coroutines; the blocking work runs in a worker thread. """
+    def __init__(self, path=PAGE_CACHE_PATH, fresh_seconds=PAGE_CACHE_FRESH_SECONDS,
+                 max_age=PAGE_CACHE_MAX_AGE, max_entries=PAGE_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.fresh_seconds = fresh_seconds
+        self.max_age = max_age
+        self.max_entries = max_entries
+        self._conn = None
+        self._lock = threading.Lock()
+        self._writes = 0
+
+    def _connection(self):
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(_SCHEMA)
+        return self._conn
+
+    def _sync_get(self, url):
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT title, meta_snippet, page_content_summary, etag, last_modified, validated_at FROM pages WHERE url = ?",
+                (url,)).fetchone()
+        if row is None:
+            return None
+        title, meta_snippet, summary, etag, last_modified, validated_at = row
+        return {
+            "result": {"url": url, "title": title, "meta_snippet": meta_snippet, "page_content_summary": summary},
+            "etag": etag,
+            "last_modified": last_modified,
+            "fresh": time.time() - validated_at < self.fresh_seconds,
+        }
+
+    def _sync_put(self, result, etag, last_modified):
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (result["url"], result["title"], result["meta_snippet"], result["page_content_summary"],
+                 etag, last_modified, now, now))
+            self._writes += 1
+            if self._writes % PAGE_CACHE_EVICT_EVERY == 1:
+                self._evict(conn, now)
+
+    def _sync_touch(self, url):
+        with self._lock:
+            self._connection().execute("UPDATE pages SET validated_at = ? WHERE url = ?", (time.time(), url))
+
+    def _evict(self, conn, now):
+        conn.execute("DELETE FROM pages WHERE fetched_at < ?", (now - self.max_age,))
+        conn.execute(
+            "DELETE FROM pages WHERE url IN (SELECT url FROM pages ORDER BY validated_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,))
+
+    async def get(self, url):
+        """
+        Returns None on a miss, else {"result", "etag", "last_modified", "fresh"}. A fresh
+        entry can be used as-is; a stale one should be revalidated with conditional_headers().
+        """
+        try:
+            return await asyncio.to_thread(self._sync_get, url)
+        except sqlite3.Error as e:
+            print(f"Page cache read error for {url}: {e}")
+            return None
+
+    async def put(self, result, etag=None, last_modified=None):
+        try:
+            await asyncio.to_thread(self._sync_put, result, etag, last_modified)
+        except sqlite3.Error as e:
+            print(f"Page cache write error for {result.get('url')}: {e}")
+
+    async def touch(self, url):
+        """ Marks an entry as just revalidated (after a 304). """
+        try:
+            await asyncio.to_thread(self._sync_touch, url)
+        except sqlite3.Error as e:
+            print(f"Page cache write error for {url}: {e}")
+
+    def record(self, outcome):
+        """ Counts a lookup outcome: fresh, revalidated, stale or miss. """
+        PAGE_CACHE_REQUESTS.inc(result=outcome)
+
+    @staticmethod
+    def conditional_headers(entry):
+        headers = {}
+        if entry and entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry and entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+
+page_cache = PageCache()
@@ -0,0 +1,23 @@
+# server/playback.py (Server-side estimate of whether the client is still playing ADA's audio)
+#
+# Audio is emitted faster than real time and buffered by the client, so "the server has
+# finished sending" is not "ADA has stopped talking". Every emitted PCM chunk extends the
+# estimated end of playback by its duration; barge-in uses this to decide whether a new
+# user input has to silence the client.
+import time
+
+class PlaybackTracker:
+    """ Per-session estimate of when the client's queued audio runs out. """
+    def __init__(self, sample_rate=24000, sample_width=2):
+        self.bytes_per_second = sample_rate * sample_width
+        self.playing_until = 0.0
+
+    def on_audio(self, num_bytes):
+        now = time.monotonic()
+        self.playing_until = max(now, self.playing_until) + num_bytes / self.bytes_per_second
+
+    def is_playing(self):
+        return time.monotonic() < self.playing_until
+
+    def reset(self):
+        self.playing_until = 0.0
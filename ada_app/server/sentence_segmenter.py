@@ -0,0 +1,78 @@
+# server/sentence_segmenter.py (Incremental sentence/clause splitter for streaming LLM text into TTS)
+import os
+import re
+
+TTS_SEGMENT_MIN_CHARS = int(os.getenv("TTS_SEGMENT_MIN_CHARS", "12"))
+TTS_SEGMENT_MAX_CHARS = int(os.getenv("TTS_SEGMENT_MAX_CHARS", "220"))
+
+# Sentence end: terminal punctuation (optionally followed by closing quotes/brackets) then whitespace, or a newline.
+_SENTENCE_END = re.compile(r'[.!?…]+["\')\]]*\s+|\n+')
+# Clause break used only when a sentence runs past max_chars.
+_CLAUSE_END = re.compile(r'[,;:—–]\s+')
+_ABBREVIATIONS = {"mr", "mrs", "ms", "dr", "prof", "sr", "jr", "st", "vs", "etc", "e.g", "i.e", "approx", "no", "fig"}
+
+
+class SentenceSegmenter:
+    """
+    Buffers streamed text and returns complete sentences as soon as their end is seen.
+    Sentences shorter than min_chars are merged into the next one (avoids a TTS request
+    per "Yes."), except for the first segment of a turn, which goes out as early as
+    possible. Runs past max_chars are cut at the last clause break, or at a space.
+    """
+    def __init__(self, min_chars=TTS_SEGMENT_MIN_CHARS, max_chars=TTS_SEGMENT_MAX_CHARS):
+        self.min_chars = min_chars
+        self.max_chars = max_chars
+        self.buffer = ""
+        self.emitted_any = False
+
+    def _is_abbreviation(self, text, end):
+        """ True if the '.' at text[end] closes an abbreviation, initial or decimal rather than a sentence. """
+        if text[end] != ".":
+            return False
+        word = re.search(r"([\w.]+)\.$", text[:end + 1])
+        if not word:
+            return False
+        token = word.group(1).lower()
+        return token in _ABBREVIATIONS or len(token) == 1 or token.replace(".", "").isdigit()
+
+    def _cut(self, end):
+        segment = self.buffer[:end].strip()
+        self.buffer = self.buffer[end:]
+        return segment
+
+    def feed(self, text):
+        """ Adds streamed text; returns the list of segments that are now complete (possibly empty). """
+        self.buffer += text
+        segments = []
+        start = 0
+        pending_end = 0
+        for match in _SENTENCE_END.finditer(self.buffer):
+            if self._is_abbreviation(self.buffer, match.start()):
+                continue
+            pending_end = match.end()
+            candidate = self.buffer[start:pending_end].strip()
+            if len(candidate) >= self.min_chars or (not self.emitted_any and not segments and candidate):
+                segments.append(candidate)
+                start = pending_end
+        self.buffer = self.buffer[start:]
+
+        while len(self.buffer) > self.max_chars:
+            window = self.buffer[:self.max_chars]
+            breaks = list(_CLAUSE_END.finditer(window))
+            if breaks:
+                end = breaks[-1].end()
+            else:
+                end = window.rfind(" ") + 1 or self.max_chars
+            segments.append(self._cut(end))
+
+        segments = [s for s in segments if s]
+        if segments:
+            self.emitted_any = True
+        return segments
+
+    def flush(self):
+        """ Returns whatever is left at end of turn (or None) and resets for the next turn. """
+        segment = self.buffer.strip()
+        self.buffer = ""
+        self.emitted_any = False
+        return segment or None
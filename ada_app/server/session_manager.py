@@ -0,0 +1,177 @@
+# server/session_manager.py (One isolated ADA per client SID, sharded over asyncio loop threads)
+import asyncio
+import os
+import threading
+import time
+
+import metrics
+
+ADA_LOOP_THREADS = int(os.getenv("ADA_LOOP_THREADS", os.cpu_count() or 1))
+
+def run_asyncio_loop(loop):
+    """ Function to run the asyncio event loop in a separate thread """
+    asyncio.set_event_loop(loop)
+    try:
+        print("Asyncio event loop started...")
+        loop.run_forever()
+    finally:
+        print("Asyncio event loop stopping...")
+        tasks = asyncio.all_tasks(loop=loop)
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+        try:
+            loop.run_until_complete(asyncio.gather(*[t for t in tasks if not t.done()], return_exceptions=True))
+            loop.run_until_complete(loop.shutdown_asyncgens())
+        except RuntimeError as e:
+             print(f"RuntimeError during loop cleanup (might be expected if loop stopped abruptly): {e}")
+        except Exception as e:
+            print(f"Exception during loop cleanup: {e}")
+        finally:
+            if not loop.is_closed():
+                loop.close()
+        print("Asyncio event loop stopped.")
+
+
+class LoopShard:
+    """ One asyncio event loop running in its own daemon thread. Hosts many ADA sessions. """
+    def __init__(self, index):
+        self.index = index
+        self.loop = None
+        self.thread = None
+        self.session_count = 0
+
+    def is_running(self):
+        return bool(self.loop and self.loop.is_running() and self.thread and self.thread.is_alive())
+
+    def start(self):
+        if self.is_running():
+            return
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=run_asyncio_loop, args=(self.loop,), daemon=True, name=f"ada-loop-{self.index}")
+        self.thread.start()
+        started = threading.Event()
+        self.loop.call_soon_threadsafe(started.set)
+        started.wait(timeout=5) # Loop is running once its first callback fires
+        print(f"    Started asyncio loop shard {self.index}.")
+
+    def submit(self, coro):
+        """ Schedules a coroutine on this shard's loop from any thread. Returns a concurrent Future. """
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def stop(self, timeout=5):
+        if self.loop and self.loop.is_running():
+            self.loop.call_soon_threadsafe(self.loop.stop)
+        if self.thread and self.thread.is_alive():
+            self.thread.join(timeout=timeout)
+            if self.thread.is_alive():
+                print(f"Warning: Asyncio loop shard {self.index} did not exit cleanly.")
+
+
+class Session:
+    """ A client's ADA instance together with the loop shard it runs on. """
+    def __init__(self, client_sid, ada, shard):
+        self.client_sid = client_sid
+        self.ada = ada
+        self.shard = shard
+        self.ready_latency = None # Seconds from connect to ADA tasks running
+
+    def is_ready(self):
+        return self.shard.is_running()
+
+    def submit(self, coro):
+        return self.shard.submit(coro)
+
+
+class SessionManager:
+    """
+    Creates one isolated ADA per Socket.IO SID and spreads the sessions over
+    a fixed number of asyncio loop threads (least-loaded shard wins).
+    """
+    def __init__(self, ada_factory, socketio_instance, num_loops=ADA_LOOP_THREADS):
+        self.ada_factory = ada_factory
+        self.socketio = socketio_instance
+        self.shards = [LoopShard(i) for i in range(max(1, num_loops))]
+        self.sessions = {}
+        self._lock = threading.Lock()
+        print(f"SessionManager configured with {len(self.shards)} asyncio loop thread(s).")
+
+    def _pick_shard(self):
+        shard = min(self.shards, key=lambda s: s.session_count)
+        if not shard.is_running():
+            shard.start()
+        return shard
+
+    def get(self, client_sid):
+        with self._lock:
+            return self.sessions.get(client_sid)
+
+    def all_sessions(self):
+        with self._lock:
+            return list(self.sessions.values())
+
+    def create_session(self, client_sid, binary_audio=False):
+        """
+        Builds a new ADA for client_sid and starts its tasks on a loop shard. Client
+        capabilities (binary_audio) are applied before the tasks are scheduled, so the
+        first emits already use them. Raises on init failure.
+        """
+        connected_at = time.perf_counter()
+        with self._lock:
+            existing = self.sessions.get(client_sid)
+            if existing:
+                return existing
+            shard = self._pick_shard()
+            shard.session_count += 1
+        try:
+            ada = self.ada_factory(socketio_instance=self.socketio, client_sid=client_sid)
+            ada.binary_audio = binary_audio
+            session = Session(client_sid, ada, shard)
+            future = session.submit(ada.start_all_tasks())
+            future.add_done_callback(lambda f: self._on_ready(session, connected_at, f))
+        except Exception:
+            with self._lock:
+                shard.session_count -= 1
+            raise
+        with self._lock:
+            self.sessions[client_sid] = session
+        print(f"    Session for SID {client_sid} placed on loop shard {shard.index} ({shard.session_count} session(s) on shard).")
+        return session
+
+    def _on_ready(self, session, connected_at, future):
+        if future.cancelled() or future.exception():
+            return
+        session.ready_latency = time.perf_counter() - connected_at
+        metrics.SESSION_READY.observe(session.ready_latency)
+        print(f"    Connect-to-ready latency for SID {session.client_sid}: {session.ready_latency * 1000:.1f} ms")
+
+    def end_session(self, client_sid, timeout=10):
+        """ Stops and forgets the session for client_sid. Returns False if there was none. """
+        with self._lock:
+            session = self.sessions.pop(client_sid, None)
+            if session:
+                session.shard.session_count -= 1
+        if not session:
+            return False
+        if session.is_ready():
+            future = session.submit(session.ada.stop_all_tasks())
+            try:
+                future.result(timeout=timeout)
+                print(f"    ADA tasks stopped successfully for SID {client_sid}.")
+            except TimeoutError:
+                print(f"    Timeout waiting for ADA tasks to stop for SID {client_sid}.")
+            except Exception as e:
+                print(f"    Exception during ADA task stop for SID {client_sid}: {e}")
+        else:
+            print(f"    Cannot stop ADA tasks for SID {client_sid}: asyncio loop not available or not running.")
+        return True
+
+    def active_count(self):
+        with self._lock:
+            return len(self.sessions)
+
+    def shutdown(self, timeout=5):
+        for client_sid in list(self.sessions):
+            self.end_session(client_sid, timeout=timeout)
+        for shard in self.shards:
+            shard.stop(timeout=timeout)
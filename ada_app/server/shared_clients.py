@@ -0,0 +1,88 @@
+# shared_clients.py (Long-lived, pooled HTTP/API clients shared by every ADA session in the process)
+#
+# Tool calls used to build a fresh python_weather.Client, googlemaps.Client or
+# aiohttp.ClientSession per call, paying DNS + TLS every time. These helpers hand out one
+# keep-alive client per event loop (aiohttp sessions are bound to the loop that created
+# them) and one googlemaps client per process. Sessions call acquire() when they start and
+# release() when they stop; the last session on a loop closes that loop's clients.
+import asyncio
+import os
+import threading
+
+HTTP_LIMIT_TOTAL = int(os.getenv("HTTP_LIMIT_TOTAL", "100"))
+HTTP_LIMIT_PER_HOST = int(os.getenv("HTTP_LIMIT_PER_HOST", "8"))
+HTTP_DNS_CACHE_TTL = int(os.getenv("HTTP_DNS_CACHE_TTL", "300"))
+HTTP_KEEPALIVE_TIMEOUT = float(os.getenv("HTTP_KEEPALIVE_TIMEOUT", "30"))
+
+class _LoopClients:
+    def __init__(self):
+        self.users = 0
+        self.http_session = None
+        self.weather_client = None
+
+_loop_clients = {}
+_maps_client = None
+_maps_lock = threading.Lock()
+
+def _current():
+    loop = asyncio.get_running_loop()
+    clients = _loop_clients.get(loop)
+    if clients is None:
+        clients = _loop_clients[loop] = _LoopClients()
+    return clients
+
+def acquire():
+    """ Registers one more user (ADA session) of the running loop's shared clients. """
+    _current().users += 1
+
+async def release():
+    """ Drops one user; closes the running loop's clients once nobody uses them. """
+    clients = _current()
+    clients.users = max(0, clients.users - 1)
+    if clients.users == 0:
+        await close()
+
+async def get_http_session():
+    """ Shared aiohttp session: keep-alive, cached DNS and per-host connection limits. """
+    clients = _current()
+    if clients.http_session is None or clients.http_session.closed:
+        import aiohttp
+        connector = aiohttp.TCPConnector(
+            limit=HTTP_LIMIT_TOTAL,
+            limit_per_host=HTTP_LIMIT_PER_HOST,
+            use_dns_cache=True,
+            ttl_dns_cache=HTTP_DNS_CACHE_TTL,
+            keepalive_timeout=HTTP_KEEPALIVE_TIMEOUT,
+        )
+        clients.http_session = aiohttp.ClientSession(connector=connector)
+    return clients.http_session
+
+async def get_weather_client():
+    """ Shared python_weather client (imperial units), kept open between calls. """
+    clients = _current()
+    if clients.weather_client is None:
+        import python_weather # Deferred: only loaded on the first weather request
+        clients.weather_client = python_weather.Client(unit=python_weather.IMPERIAL)
+    return clients.weather_client
+
+def get_maps_client(api_key):
+    """ Process-wide googlemaps client (its requests.Session keeps connections alive). Thread-safe. """
+    global _maps_client
+    with _maps_lock:
+        if _maps_client is None or _maps_client.key != api_key:
+            import googlemaps # Deferred: only loaded on the first directions request
+            _maps_client = googlemaps.Client(key=api_key)
+        return _maps_client
+
+async def close():
+    """ Closes the running loop's shared clients. Safe to call more than once. """
+    loop = asyncio.get_running_loop()
+    clients = _loop_clients.pop(loop, None)
+    if clients is None:
+        return
+    if clients.weather_client is not None:
+        try: await clients.weather_client.close()
+        except Exception as e: print(f"Error closing shared weather client: {e}")
+    if clients.http_session is not None and not clients.http_session.closed:
+        try: await clients.http_session.close()
+        except Exception as e: print(f"Error closing shared HTTP session: {e}")
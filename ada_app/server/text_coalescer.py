@@ -0,0 +1,59 @@
+# server/text_coalescer.py (Batches model text parts into fewer receive_text_chunk emits)
+import asyncio
+import os
+
+TEXT_COALESCE_WINDOW_MS = float(os.getenv("TEXT_COALESCE_WINDOW_MS", "60"))
+TEXT_COALESCE_MAX_CHARS = int(os.getenv("TEXT_COALESCE_MAX_CHARS", "256"))
+TEXT_FIRST_CHUNK_MAX_HOLD_MS = float(os.getenv("TEXT_FIRST_CHUNK_MAX_HOLD_MS", "20"))
+
+class TextCoalescer:
+    """
+    Per-session buffer in front of receive_text_chunk. Text is flushed when the buffer
+    reaches max_chars, when window_ms has passed since the first buffered part, or at
+    end of turn. The first flush of a turn waits at most first_hold_ms so the user sees
+    the answer start as quickly as before. Must be used from the session's event loop.
+    """
+    def __init__(self, emit_fn, window_ms=TEXT_COALESCE_WINDOW_MS, max_chars=TEXT_COALESCE_MAX_CHARS,
+                 first_hold_ms=TEXT_FIRST_CHUNK_MAX_HOLD_MS):
+        self.emit_fn = emit_fn
+        self.window = window_ms / 1000
+        self.max_chars = max_chars
+        self.first_hold = first_hold_ms / 1000
+        self.parts = []
+        self.size = 0
+        self.flushed_in_turn = False
+        self.timer = None
+        self.emit_count = 0
+
+    def add(self, text):
+        if not text:
+            return
+        self.parts.append(text)
+        self.size += len(text)
+        if self.size >= self.max_chars:
+            self.flush()
+            return
+        if self.timer is None:
+            delay = self.window if self.flushed_in_turn else min(self.window, self.first_hold)
+            if delay <= 0:
+                self.flush()
+                return
+            self.timer = asyncio.get_running_loop().call_later(delay, self.flush)
+
+    def flush(self):
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        if not self.parts:
+            return
+        text = "".join(self.parts)
+        self.parts = []
+        self.size = 0
+        self.flushed_in_turn = True
+        self.emit_count += 1
+        self.emit_fn(text)
+
+    def end_turn(self):
+        """ Flushes whatever is buffered and resets the first-chunk hold for the next turn. """
+        self.flush()
+        self.flushed_in_turn = False
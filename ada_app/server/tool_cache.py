@@ -0,0 +1,138 @@
+# server/tool_cache.py (Process-wide TTL + LRU cache for tool results, shared by every ADA session)
+#
+# Weather, directions and search results are the same for everyone for a few minutes,
+# so identical calls (same city, same commute, same query) are answered from memory.
+# Entries expire after a per-tool TTL and the least recently used entry is evicted once
+# a tool's cache is full. Concurrent identical misses on one loop share a single fetch;
+# if that fetch is cancelled (its caller was interrupted or timed out), one of the waiters
+# takes over and fetches again.
+import asyncio
+import collections
+import os
+import threading
+import time
+
+import metrics
+
+WEATHER_CACHE_TTL = float(os.getenv("WEATHER_CACHE_TTL", "600"))
+WEATHER_CACHE_SIZE = int(os.getenv("WEATHER_CACHE_SIZE", "256"))
+TRAVEL_CACHE_TTL = float(os.getenv("TRAVEL_CACHE_TTL", "180")) # Traffic changes quickly
+TRAVEL_CACHE_SIZE = int(os.getenv("TRAVEL_CACHE_SIZE", "256"))
+SEARCH_CACHE_TTL = float(os.getenv("SEARCH_CACHE_TTL", "3600"))
+SEARCH_CACHE_SIZE = int(os.getenv("SEARCH_CACHE_SIZE", "128"))
+
+CACHE_REQUESTS = metrics.Counter(
+    "ada_tool_cache_requests_total",
+    "Tool result cache lookups by outcome (hit, miss, coalesced with an in-flight miss).", labelnames=("tool", "result"))
+CACHE_ENTRIES = metrics.Gauge(
+    "ada_tool_cache_entries",
+    "Entries currently held in each tool result cache.", labelnames=("tool",))
+
+
+class _FetchCancelled(Exception):
+    """ Set on an in-flight future whose owning fetch was cancelled: its waiters retry. """
+
+
+def normalize(*args):
+    """ Cache key from tool arguments: case-folded, whitespace-collapsed strings; None/'' are equal. """
+    key = []
+    for value in args:
+        if isinstance(value, str):
+            value = " ".join(value.split()).casefold()
+        key.append(value or "")
+    return tuple(key)
+
+
+class TTLCache:
+    """ Thread-safe TTL + LRU map. Usable from any session loop. """
+    def __init__(self, name, ttl, max_entries):
+        self.name = name
+        self.ttl = ttl
+        self.max_entries = max(1, max_entries)
+        self._entries = collections.OrderedDict() # key -> (expires_at, value)
+        self._inflight = {} # key -> (loop, future) for misses being fetched right now
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def get(self, key):
+        """ Returns (True, value) for a fresh entry, otherwise (False, None). """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False, None
+            if entry[0] <= now:
+                del self._entries[key]
+                return False, None
+            self._entries.move_to_end(key)
+            return True, entry[1]
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    async def get_or_fetch(self, key, fetch, cacheable=lambda value: True):
+        """
+        Returns the cached value for key, or awaits fetch() and caches its result if
+        cacheable(result) is true (errors and empty results are usually not).
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            hit, value = self.get(key)
+            if hit:
+                CACHE_REQUESTS.inc(tool=self.name, result="hit")
+                return value
+            with self._lock:
+                inflight = self._inflight.get(key)
+                owner = inflight is None or inflight[0] is not loop
+                if owner:
+                    future = loop.create_future()
+                    self._inflight[key] = (loop, future)
+                else:
+                    future = inflight[1]
+            if owner:
+                break
+            CACHE_REQUESTS.inc(tool=self.name, result="coalesced")
+            try:
+                return await asyncio.shield(future)
+            except _FetchCancelled:
+                continue # The owner gave up, not the fetch: look again and maybe become the owner
+        CACHE_REQUESTS.inc(tool=self.name, result="miss")
+
+        try:
+            value = await fetch()
+        except BaseException as e:
+            self._forget(key, future)
+            if not future.done():
+                # A cancelled owner (barge-in, tool deadline) says nothing about the fetch itself
+                future.set_exception(_FetchCancelled() if isinstance(e, asyncio.CancelledError) else e)
+                future.exception() # Mark retrieved: waiters re-raise it, nobody else needs to
+            raise
+        self._forget(key, future)
+        if cacheable(value):
+            self.set(key, value)
+        if not future.done():
+            future.set_result(value)
+        return value
+
+    def _forget(self, key, future):
+        with self._lock:
+            if self._inflight.get(key, (None, None))[1] is future:
+                del self._inflight[key]
+
+
+weather_cache = TTLCache("get_weather", WEATHER_CACHE_TTL, WEATHER_CACHE_SIZE)
+travel_cache = TTLCache("get_travel_duration", TRAVEL_CACHE_TTL, TRAVEL_CACHE_SIZE)
+search_cache = TTLCache("get_search_results", SEARCH_CACHE_TTL, SEARCH_CACHE_SIZE)
+
+CACHE_ENTRIES.set_callback(lambda: {(c.name,): len(c) for c in (weather_cache, travel_cache, search_cache)})
@@ -0,0 +1,343 @@
+# server/tool_registry.py (Gemini tool declarations from typed methods, run under deadlines and concurrency caps)
+#
+# Tools are ordinary typed methods marked with @tool(...). ToolRegistry.for_instance(ada)
+# builds each one's types.FunctionDeclaration from its signature (str/int/float/bool/list/
+# dict hints, parameters without a default are required) and runs calls through call():
+#   - every call has a deadline (TOOL_TIMEOUT_SECONDS unless the tool sets its own),
+#   - at most TOOL_MAX_CONCURRENT calls run at once across all sessions and loops, and a
+#     tool can set a lower max_concurrency of its own (e.g. to stay under an API quota),
+#   - blocking work (googlemaps, googlesearch) runs on one bounded thread pool of
+#     TOOL_EXECUTOR_WORKERS threads instead of the loop's default executor, so a hung
+#     client library can only tie up that pool, never the threads the loops need,
+#   - each call's latency and outcome are recorded in metrics (latency_summary() for the CLI).
+# execute() and answer_tool_call() turn the model's function calls into responses, and the
+# declarations of ADA's own tools (weather_tool, ...) are defined once here for every variant.
+# The CLI assistants in ADA/ import this same module (main_online.py puts this directory on sys.path).
+# A call that misses its deadline is abandoned: the model gets an error at once, while a
+# blocked thread finishes in the background and frees its pool slot when it returns.
+import asyncio
+import collections
+import concurrent.futures
+import functools
+import inspect
+import os
+import threading
+import time
+import types as pytypes
+import typing
+
+from google.genai import types
+
+import metrics
+
+TOOL_TIMEOUT_SECONDS = float(os.getenv("TOOL_TIMEOUT_SECONDS", "20")) # Default per-call deadline
+TOOL_MAX_CONCURRENT = int(os.getenv("TOOL_MAX_CONCURRENT", "16")) # Tool calls in flight, whole process
+TOOL_EXECUTOR_WORKERS = int(os.getenv("TOOL_EXECUTOR_WORKERS", "8")) # Threads for blocking tool work
+
+TOOL_CALLS = metrics.Counter(
+    "ada_tool_calls_total",
+    "Tool calls by outcome (ok, error, timeout, cancelled).", labelnames=("tool", "result"))
+TOOL_SLOTS_IN_USE = metrics.Gauge(
+    "ada_tool_slots_in_use",
+    "Tool calls currently holding one of the TOOL_MAX_CONCURRENT slots.")
+
+_SCHEMA_TYPES = {
+    str: types.Type.STRING,
+    int: types.Type.INTEGER,
+    float: types.Type.NUMBER,
+    bool: types.Type.BOOLEAN,
+    list: types.Type.ARRAY,
+    dict: types.Type.OBJECT,
+}
+
+
+# --- Blocking work ---
+_executor = None
+_executor_lock = threading.Lock()
+
+def get_executor():
+    """ The process-wide bounded pool for blocking tool work, created on first use. """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = concurrent.futures.ThreadPoolExecutor(max_workers=TOOL_EXECUTOR_WORKERS,
+                                                              thread_name_prefix="ada-tool")
+        return _executor
+
+async def run_blocking(fn, *args, **kwargs):
+    """ Runs a blocking function on the tool pool; use instead of asyncio.to_thread inside tools. """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(), functools.partial(fn, *args, **kwargs))
+
+
+# --- Concurrency caps ---
+class _Limit:
+    """
+    Counting semaphore shared by every event loop in the process (sessions run on several
+    loop shards, and asyncio.Semaphore is bound to one loop). Waiters are served in order.
+    """
+    def __init__(self, size):
+        self.size = max(1, size)
+        self.in_use = 0
+        self._waiters = collections.deque() # (loop, future)
+        self._lock = threading.Lock()
+
+    async def acquire(self):
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self.in_use < self.size and not self._waiters:
+                self.in_use += 1
+                return
+            waiter = (loop, loop.create_future())
+            self._waiters.append(waiter)
+        try:
+            await waiter[1]
+        except asyncio.CancelledError:
+            with self._lock:
+                try:
+                    self._waiters.remove(waiter)
+                    granted = False
+                except ValueError:
+                    granted = True # release() already handed this waiter the slot
+            if granted:
+                self.release()
+            raise
+
+    def release(self):
+        with self._lock:
+            while self._waiters:
+                loop, future = self._waiters.popleft()
+                try:
+                    loop.call_soon_threadsafe(_grant, future) # The slot passes straight to the waiter
+                    return
+                except RuntimeError:
+                    continue # Waiter's loop is closed
+            self.in_use -= 1
+
+def _grant(future):
+    if not future.done():
+        future.set_result(None)
+
+_global_limit = _Limit(TOOL_MAX_CONCURRENT)
+TOOL_SLOTS_IN_USE.set_callback(lambda: _global_limit.in_use)
+_tool_limits = {}
+_tool_limits_lock = threading.Lock()
+
+def _limit_for(name, max_concurrency):
+    """ Per-tool cap, shared by every session that registers a tool under this name. """
+    if max_concurrency is None:
+        return None
+    with _tool_limits_lock:
+        if name not in _tool_limits:
+            _tool_limits[name] = _Limit(max_concurrency)
+        return _tool_limits[name]
+
+
+# --- Declarations ---
+def tool(description=None, params=None, name=None, timeout=None, max_concurrency=None):
+    """
+    Marks a method as a Gemini tool. description defaults to the first paragraph of the
+    docstring; params maps parameter names to their descriptions for the model.
+    """
+    def mark(fn):
+        fn.__ada_tool__ = dict(description=description, params=params or {}, name=name,
+                               timeout=timeout, max_concurrency=max_concurrency)
+        return fn
+    return mark
+
+
+def _schema_for(annotation, description=None):
+    if typing.get_origin(annotation) in (typing.Union, pytypes.UnionType):
+        args = [a for a in typing.get_args(annotation) if a is not type(None)]
+        annotation = args[0] if len(args) == 1 else str # Optional[X] -> X
+    origin = typing.get_origin(annotation) or annotation
+    schema_type = _SCHEMA_TYPES.get(origin, types.Type.STRING)
+    schema = types.Schema(type=schema_type, description=description)
+    if schema_type == types.Type.ARRAY:
+        item = (typing.get_args(annotation) or (str,))[0]
+        schema.items = _schema_for(item)
+    return schema
+
+
+def build_declaration(fn, name=None, description=None, params=None):
+    """ types.FunctionDeclaration for a (bound) function from its signature and type hints. """
+    params = params or {}
+    hints = typing.get_type_hints(fn)
+    properties = {}
+    required = []
+    for param in inspect.signature(fn).parameters.values():
+        if param.name == "self" or param.kind in (param.VAR_POSITIONAL, param.VAR_KEYWORD):
+            continue
+        properties[param.name] = _schema_for(hints.get(param.name, str), params.get(param.name))
+        if param.default is inspect.Parameter.empty:
+            required.append(param.name)
+    if description is None:
+        description = inspect.cleandoc(fn.__doc__ or "").split("\n\n")[0].replace("\n", " ")
+    return types.FunctionDeclaration(
+        name=name or fn.__name__,
+        description=description,
+        parameters=types.Schema(type=types.Type.OBJECT, properties=properties, required=required),
+    )
+
+
+class Tool:
+    def __init__(self, function, declaration, timeout, limit):
+        self.function = function
+        self.declaration = declaration
+        self.timeout = timeout
+        self.limit = limit
+
+    @property
+    def name(self):
+        return self.declaration.name
+
+
+# --- ADA's tools (the same declaration in every variant) ---
+weather_tool = tool(
+    description="Get the current weather conditions (temperature, precipitation, description) for a specified city and state/country (e.g., 'Vinings, GA', 'London, UK').",
+    params={"location": "The city and state, e.g., San Francisco, CA or Vinings, GA"},
+    timeout=10.0,
+)
+travel_duration_tool = tool(
+    description="Calculates the estimated travel duration between a specified origin and destination using Google Maps. Considers current traffic for driving mode.",
+    params={
+        "origin": "The starting address or place name.",
+        "destination": "The destination address or place name.",
+        "mode": "Optional: Mode of transport ('driving', 'walking', etc.). Defaults to 'driving'.",
+    },
+    timeout=10.0,
+    max_concurrency=4, # Each call holds a tool executor thread while googlemaps blocks
+)
+search_tool = tool(
+    description="Performs a Google search for the given query and returns a list of top result URLs.",
+    params={"query": "The search term or question to search Google for."},
+    timeout=25.0,
+    max_concurrency=4, # googlesearch scrapes Google: bursts get rate limited
+)
+
+
+def latency_summary():
+    """ {tool: (calls, mean_seconds)} over every call recorded in this process. """
+    return {labels[0]: (count, total / count)
+            for labels, (count, total) in metrics.TOOL_DURATION.totals().items() if count}
+
+
+# --- Registry ---
+class ToolRegistry:
+    """ The tools one ADA session offers the model, in declaration order. """
+    def __init__(self):
+        self.tools = {}
+
+    @classmethod
+    def for_instance(cls, obj):
+        """ Registers every @tool method of obj (bound, so tools can emit to the session's client). """
+        registry = cls()
+        seen = set()
+        for klass in reversed(type(obj).__mro__):
+            for attr, member in vars(klass).items():
+                options = getattr(member, "__ada_tool__", None)
+                if options is not None and attr not in seen:
+                    seen.add(attr)
+                    registry.add(getattr(obj, attr), **options)
+        return registry
+
+    def add(self, function, description=None, params=None, name=None, timeout=None, max_concurrency=None):
+        declaration = build_declaration(function, name=name, description=description, params=params)
+        if timeout is not None and timeout <= 0:
+            raise ValueError(f"{declaration.name}: timeout must be positive, got {timeout!r}")
+        if max_concurrency is not None and max_concurrency < 1:
+            raise ValueError(f"{declaration.name}: max_concurrency must be at least 1, got {max_concurrency!r}")
+        self.tools[declaration.name] = Tool(
+            function, declaration,
+            timeout=TOOL_TIMEOUT_SECONDS if timeout is None else timeout,
+            limit=_limit_for(declaration.name, max_concurrency),
+        )
+        return self.tools[declaration.name]
+
+    def override(self, name, function):
+        """ Swaps a tool's implementation, keeping its declaration and limits (offline stand-ins). """
+        self.tools[name].function = function
+
+    def get(self, name):
+        return self.tools.get(name)
+
+    def __contains__(self, name):
+        return name in self.tools
+
+    def declarations(self):
+        return [t.declaration for t in self.tools.values()]
+
+    async def _invoke(self, entry, args):
+        if inspect.iscoroutinefunction(entry.function):
+            return await entry.function(**args)
+        return await run_blocking(entry.function, **args) # Plain (blocking) functions go to the tool pool
+
+    async def call(self, name, args):
+        """
+        Runs one call under the global and per-tool caps and the tool's deadline. Raises
+        KeyError for an unknown tool, asyncio.TimeoutError past the deadline, or whatever
+        the tool raised. Time spent waiting for a slot counts towards the deadline.
+        """
+        entry = self.tools[name]
+        started_at = time.perf_counter()
+        result = "error"
+
+        async def run():
+            await _global_limit.acquire()
+            try:
+                if entry.limit is not None:
+                    await entry.limit.acquire()
+                try:
+                    return await self._invoke(entry, args)
+                finally:
+                    if entry.limit is not None:
+                        entry.limit.release()
+            finally:
+                _global_limit.release()
+
+        try:
+            value = await asyncio.wait_for(run(), timeout=entry.timeout)
+            result = "ok"
+            return value
+        except asyncio.TimeoutError:
+            result = "timeout"
+            raise
+        except asyncio.CancelledError:
+            result = "cancelled" # Barge-in
+            raise
+        finally:
+            metrics.TOOL_DURATION.observe(time.perf_counter() - started_at, tool=name)
+            TOOL_CALLS.inc(tool=name, result=result)
+
+    async def execute(self, function_call):
+        """
+        Runs one types.FunctionCall from the model and returns its response payload. Failures
+        (unknown tool, timeout, exception) come back as {"error": ...} for the model to
+        explain instead of being dropped; only cancellation (barge-in) propagates.
+        """
+        name = function_call.name
+        args = dict(function_call.args or {}) # Struct to dict
+        entry = self.tools.get(name)
+        if entry is None:
+            print(f"!!! Error: Function '{name}' is not available. !!!")
+            return {"error": f"Function {name} not found or implemented."}
+        print(f"Executing function: {name} with args: {args}")
+        try:
+            result = await self.call(name, args)
+        except asyncio.TimeoutError:
+            print(f"!!! Function {name} timed out after {entry.timeout}s !!!")
+            return {"error": f"Function {name} timed out after {entry.timeout} seconds."}
+        except Exception as e:
+            print(f"!!! Error calling function {name}: {e} !!!")
+            return {"error": f"Failed to execute function {name}: {e}"}
+        print(f"Function {name} returned: {result}")
+        return result if isinstance(result, dict) else {"result": result}
+
+    async def answer_tool_call(self, session, tool_call):
+        """ Live API: runs every call of a tool_call message concurrently and sends all responses back in one message. """
+        calls = tool_call.function_calls or []
+        payloads = await asyncio.gather(*(self.execute(call) for call in calls))
+        if calls:
+            print(f"--- Sending {len(calls)} Tool Response(s) ---")
+            await session.send(input=[types.FunctionResponse(id=call.id, name=call.name, response=payload)
+                                      for call, payload in zip(calls, payloads)], end_of_turn=False)
@@ -0,0 +1,86 @@
+# server/video_rate.py (Adaptive pacing for Live API webcam frames)
+#
+# The Live API session gets a frame only when it is useful: at most VIDEO_MAX_FPS while
+# the user is active, VIDEO_STREAMING_FPS while the model is answering (it isn't looking
+# at new frames mid-answer), and VIDEO_IDLE_FPS after VIDEO_IDLE_AFTER_SECONDS without
+# user input. Frames that are near-duplicates of the last one sent are dropped. Whenever
+# the target rate changes the client is told, via 'video_capture_rate', to capture at that
+# rate, so frames that would be dropped are never encoded or uploaded in the first place.
+import os
+import time
+
+VIDEO_MAX_FPS = float(os.getenv("VIDEO_MAX_FPS", "1.0"))
+VIDEO_STREAMING_FPS = float(os.getenv("VIDEO_STREAMING_FPS", "0.33"))
+VIDEO_IDLE_FPS = float(os.getenv("VIDEO_IDLE_FPS", "0.2"))
+VIDEO_IDLE_AFTER_SECONDS = float(os.getenv("VIDEO_IDLE_AFTER_SECONDS", "20"))
+RATE_TOLERANCE = 0.9 # Client timers jitter: accept frames slightly early so 1 fps in is 1 fps out
+VIDEO_KEYFRAME_SECONDS = float(os.getenv("VIDEO_KEYFRAME_SECONDS", "10")) # Resend an unchanged scene this often
+
+
+class AdaptiveFrameRate:
+    """ Per-session rate controller. All methods run on the session's event loop. """
+    def __init__(self, notify_fn=None, max_fps=VIDEO_MAX_FPS, streaming_fps=VIDEO_STREAMING_FPS,
+                 idle_fps=VIDEO_IDLE_FPS, idle_after=VIDEO_IDLE_AFTER_SECONDS, keyframe_seconds=VIDEO_KEYFRAME_SECONDS):
+        self.notify_fn = notify_fn # Called with the new target fps when it changes
+        self.max_fps = max_fps
+        self.streaming_fps = streaming_fps
+        self.idle_fps = idle_fps
+        self.idle_after = idle_after
+        self.keyframe_seconds = keyframe_seconds
+        self.last_activity = time.monotonic()
+        self.streaming = False
+        self.last_sent_at = 0.0
+        self.announced_fps = None
+        self.sent = 0
+        self.dropped_rate = 0
+        self.dropped_duplicate = 0
+
+    def target_fps(self, now=None):
+        now = time.monotonic() if now is None else now
+        if self.streaming:
+            return self.streaming_fps
+        if now - self.last_activity >= self.idle_after:
+            return self.idle_fps
+        return self.max_fps
+
+    def _update(self, now=None):
+        fps = self.target_fps(now)
+        if fps != self.announced_fps:
+            self.announced_fps = fps
+            if self.notify_fn:
+                self.notify_fn(fps)
+        return fps
+
+    def on_user_activity(self):
+        self.last_activity = time.monotonic()
+        self._update()
+
+    def on_turn_started(self):
+        self.streaming = True
+        self._update()
+
+    def on_turn_finished(self):
+        self.streaming = False
+        self.last_activity = time.monotonic() # The user usually reacts to an answer
+        self._update()
+
+    def allow(self, now=None):
+        """ Rate gate: True if a frame may be sent now under the current target rate. """
+        now = time.monotonic() if now is None else now
+        fps = self._update(now)
+        if fps <= 0 or now - self.last_sent_at < RATE_TOLERANCE / fps:
+            self.dropped_rate += 1
+            return False
+        return True
+
+    def is_keyframe_due(self, now=None):
+        """ True if the last frame sent is old enough that an unchanged scene should be resent anyway. """
+        now = time.monotonic() if now is None else now
+        return now - self.last_sent_at >= self.keyframe_seconds
+
+    def mark_sent(self, now=None):
+        self.last_sent_at = time.monotonic() if now is None else now
+        self.sent += 1
+
+    def mark_duplicate(self):
+        self.dropped_duplicate += 1
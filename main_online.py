@@ -7,19 +7,29 @@ Before running this script, ensure the `GOOGLE_API_KEY` environment
 variable is set to the api-key you obtained from Google AI Studio.
 '''
 
-from ADA.ADA_Online import ADA
 import asyncio
+import os
+import sys
+
+# The CLI imports shared_clients and tool_registry from the web server's directory, the way
+# the server does; first on the path so an installed package of the same name can't shadow them
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "ada_app", "server"))
+
+from ADA.ADA_Online import ADA
 
 async def main():
     ada = ADA()
-    async with asyncio.TaskGroup() as tg:
-        tg.create_task(ada.stt())
-        input_message = tg.create_task(ada.input_message())
-        tg.create_task(ada.send_prompt())
-        tg.create_task(ada.tts())
-        tg.create_task(ada.play_audio())
+    try:
+        async with asyncio.TaskGroup() as tg:
+            tg.create_task(ada.stt())
+            input_message = tg.create_task(ada.input_message())
+            tg.create_task(ada.send_prompt())
+            tg.create_task(ada.tts())
+            tg.create_task(ada.play_audio())
 
-        await input_message
+            await input_message
+    finally:
+        await ada.shutdown() # Closes the pooled clients (no "Unclosed client session" on exit)
 
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
@@ -0,0 +1,313 @@
+'''
+Offline stand-ins for the services ADA_Live_API talks to, with configurable latency and jitter.
+
+  FakeGenaiClient      : drop-in for genai.Client as far as ADA uses it (client.aio.live.connect).
+                         Its session plays a script of turns: streamed text, tool calls (it waits
+                         for the FunctionResponse before continuing) and executable code.
+  FakeElevenLabsServer : a local websocket server speaking the parts of ElevenLabs'
+                         stream-input / multi-stream-input protocol ADA uses, answering with
+                         base64 PCM (24 kHz, 16-bit mono) sized to the text it was given.
+
+The Live API is faked at the SDK session boundary rather than on the wire: its websocket
+protocol is internal to google-genai and changes between releases, while the session
+interface ADA calls (send / receive / LiveServerMessage) is stable.
+
+Used by test/live_pipeline_benchmark.py; can also be imported on its own.
+'''
+import asyncio
+import base64
+import contextlib
+import itertools
+import json
+import math
+import random
+import struct
+import types as pytypes
+
+from google.genai import types
+
+
+class Latency:
+    """ A base delay in milliseconds plus uniform jitter of +/- jitter_ms. """
+    def __init__(self, base_ms, jitter_ms=0.0, rng=None):
+        self.base_ms = base_ms
+        self.jitter_ms = jitter_ms
+        self.rng = rng or random.Random()
+
+    def seconds(self):
+        return max(0.0, self.base_ms + self.rng.uniform(-self.jitter_ms, self.jitter_ms)) / 1000
+
+    async def sleep(self):
+        await asyncio.sleep(self.seconds())
+
+
+# --- Scripted Gemini Live ---
+# A turn is a list of steps:
+#   ("text", "...")                 streamed as several messages of a few words each
+#   ("tool_call", name, {args})     the session waits for ADA's FunctionResponse
+#   ("tool_calls", [(name, {args})]) several calls in one tool_call message, answered together
+#   ("code", "print(1)")            an executable_code part
+DEFAULT_SCRIPT = [
+    [("text", "Good afternoon, Sir. The prototype looks solid from here. "
+              "I would tighten the tolerances on the bracket before the next print, though.")],
+    [("tool_call", "get_weather", {"location": "London, UK"}),
+     ("text", "It is currently fourteen degrees and overcast in London, with light rain expected this evening. "
+              "An umbrella would be wise, Sir.")],
+    [("code", "import math\nprint(math.sqrt(2) * 10)"),
+     ("text", "The diagonal comes out to roughly fourteen point one centimetres. "
+              "That leaves about two millimetres of clearance on each side.")],
+    [("tool_call", "get_travel_duration", {"origin": "Vinings, GA", "destination": "Atlanta, GA"}),
+     ("text", "Traffic is moderate, so the drive should take about twenty minutes.")],
+    [("tool_calls", [("get_weather", {"location": "Atlanta, GA"}),
+                     ("get_travel_duration", {"origin": "Vinings, GA", "destination": "Atlanta, GA"})]),
+     ("text", "It is sunny in Atlanta and the drive takes about twenty minutes. A fine day for it, Sir.")],
+]
+
+
+def _text_message(text):
+    return types.LiveServerMessage(server_content=types.LiveServerContent(
+        model_turn=types.Content(role="model", parts=[types.Part(text=text)])))
+
+
+def _code_message(code):
+    return types.LiveServerMessage(server_content=types.LiveServerContent(
+        model_turn=types.Content(role="model", parts=[types.Part(
+            executable_code=types.ExecutableCode(code=code, language=types.Language.PYTHON))])))
+
+
+def _tool_call_message(calls):
+    """ calls: [(call_id, name, args)] """
+    return types.LiveServerMessage(tool_call=types.LiveServerToolCall(
+        function_calls=[types.FunctionCall(id=call_id, name=name, args=args) for call_id, name, args in calls]))
+
+
+def _turn_complete_message():
+    return types.LiveServerMessage(server_content=types.LiveServerContent(turn_complete=True))
+
+
+def _split_words(text, words_per_message):
+    words = text.split(" ")
+    for i in range(0, len(words), words_per_message):
+        piece = " ".join(words[i:i + words_per_message])
+        yield piece + (" " if i + words_per_message < len(words) else "")
+
+
+class FakeLiveSession:
+    """
+    Plays one scripted turn per final text input, in order, looping over the script. As in
+    the real session all turns share one message stream: receive() yields messages up to
+    the next turn_complete, and whatever a reader abandons stays queued for the next
+    receive(). A new input while a turn is still playing interrupts it: the rest of that
+    turn is replaced by a single interrupted + turn_complete message.
+    """
+    def __init__(self, script, first_chunk, next_chunk, words_per_message=4, tool_response_timeout=30.0):
+        self.script = script
+        self.first_chunk = first_chunk # Latency before the first message of a turn
+        self.next_chunk = next_chunk   # Latency between messages
+        self.words_per_message = words_per_message
+        self.tool_response_timeout = tool_response_timeout
+        self.turn_index = 0
+        self.frames_received = 0
+        self.completed_turns = 0 # turn_complete messages read through receive()
+        self.interrupted_turns = 0
+        self.tool_response_messages = 0 # send() calls carrying function responses
+        self._pending_turns = asyncio.Queue()
+        self._tool_responses = asyncio.Queue()
+        self._messages = asyncio.Queue()
+        self._call_ids = itertools.count(1)
+        self._producer = None
+        self._playing = None
+
+    async def send(self, input=None, end_of_turn=False):
+        responses = input if isinstance(input, list) else [input]
+        if responses and all(isinstance(r, types.FunctionResponse) for r in responses):
+            self.tool_response_messages += 1
+            for response in responses:
+                self._tool_responses.put_nowait(response)
+        elif isinstance(input, str):
+            if end_of_turn:
+                if self._playing is not None and not self._playing.done():
+                    self._playing.cancel() # New client content interrupts the answer being generated
+                self._pending_turns.put_nowait(input)
+                if self._producer is None:
+                    self._producer = asyncio.create_task(self._produce())
+        else:
+            self.frames_received += 1 # Video frames and anything else are accepted and ignored
+
+    async def _produce(self):
+        while True:
+            await self._pending_turns.get()
+            steps = self.script[self.turn_index % len(self.script)]
+            self.turn_index += 1
+            self._playing = asyncio.create_task(self._play(steps))
+            await asyncio.wait({self._playing})
+            if self._playing.cancelled():
+                self.interrupted_turns += 1
+                self._messages.put_nowait(types.LiveServerMessage(server_content=types.LiveServerContent(
+                    interrupted=True, turn_complete=True)))
+
+    async def _play(self, steps):
+        first = True
+        while not self._tool_responses.empty(): # Late responses to an interrupted turn's calls
+            self._tool_responses.get_nowait()
+        for step in steps:
+            await (self.first_chunk if first else self.next_chunk).sleep()
+            first = False
+            kind = step[0]
+            if kind == "text":
+                pieces = list(_split_words(step[1], self.words_per_message))
+                for i, piece in enumerate(pieces):
+                    if i:
+                        await self.next_chunk.sleep()
+                    self._messages.put_nowait(_text_message(piece))
+            elif kind == "code":
+                self._messages.put_nowait(_code_message(step[1]))
+            elif kind in ("tool_call", "tool_calls"):
+                calls = [(step[1], step[2])] if kind == "tool_call" else step[1]
+                self._messages.put_nowait(_tool_call_message(
+                    [(f"call-{next(self._call_ids)}", name, args) for name, args in calls]))
+                for _ in calls:
+                    await asyncio.wait_for(self._tool_responses.get(), timeout=self.tool_response_timeout)
+                first = True # The model "thinks" again after the tool results
+        self._messages.put_nowait(_turn_complete_message())
+
+    async def receive(self):
+        while True:
+            message = await self._messages.get()
+            yield message
+            if message.server_content and message.server_content.turn_complete:
+                self.completed_turns += 1
+                return
+
+    async def close(self):
+        for task in (self._playing, self._producer):
+            if task is not None and not task.done():
+                task.cancel()
+
+
+class FakeGenaiClient:
+    """ Exposes client.aio.live.connect(model=..., config=...) like genai.Client. """
+    def __init__(self, script=None, first_chunk_ms=450.0, next_chunk_ms=60.0, jitter_ms=0.0, seed=None):
+        rng = random.Random(seed)
+        self.script = script or DEFAULT_SCRIPT
+        self.first_chunk = Latency(first_chunk_ms, jitter_ms, rng)
+        self.next_chunk = Latency(next_chunk_ms, min(jitter_ms, next_chunk_ms), rng)
+        self.sessions = []
+        self.aio = pytypes.SimpleNamespace(live=pytypes.SimpleNamespace(connect=self._connect))
+
+    @contextlib.asynccontextmanager
+    async def _connect(self, model=None, config=None):
+        session = FakeLiveSession(self.script, self.first_chunk, self.next_chunk)
+        self.sessions.append(session)
+        try:
+            yield session
+        finally:
+            await session.close()
+
+
+# --- ElevenLabs-compatible TTS websocket ---
+def _pcm_tone(seconds, sample_rate=24000, frequency=220.0):
+    """ A quiet sine tone as 16-bit little-endian mono PCM. """
+    count = int(seconds * sample_rate)
+    return struct.pack(f"<{count}h", *(int(3000 * math.sin(2 * math.pi * frequency * i / sample_rate)) for i in range(count)))
+
+
+class FakeElevenLabsServer:
+    """
+    Buffers text per context and "synthesizes" it once a sentence ends, the buffer reaches
+    generate_at_chars, or the context is flushed. Each generation waits first_audio
+    (+ jitter) and then streams chunk_ms PCM chunks, speaking at chars_per_second.
+    """
+    def __init__(self, host="127.0.0.1", port=0, first_audio_ms=180.0, jitter_ms=0.0, chars_per_second=15.0,
+                 chunk_ms=100, generate_at_chars=120, sample_rate=24000, seed=None):
+        self.host = host
+        self.port = port
+        self.first_audio = Latency(first_audio_ms, jitter_ms, random.Random(seed))
+        self.chars_per_second = chars_per_second
+        self.chunk_ms = chunk_ms
+        self.generate_at_chars = generate_at_chars
+        self.sample_rate = sample_rate
+        self.connections = 0
+        self.generations = 0
+        self._server = None
+        self._chunk = _pcm_tone(chunk_ms / 1000, sample_rate)
+
+    @property
+    def base_url(self):
+        return f"ws://{self.host}:{self.port}"
+
+    async def start(self):
+        import websockets
+        self._server = await websockets.serve(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def _generate(self, websocket, context_id, text):
+        await self.first_audio.sleep()
+        self.generations += 1
+        chunks = max(1, math.ceil(len(text) / self.chars_per_second * 1000 / self.chunk_ms))
+        audio = base64.b64encode(self._chunk).decode("ascii")
+        for _ in range(chunks):
+            message = {"audio": audio, "isFinal": False}
+            if context_id is not None:
+                message["contextId"] = context_id
+            await websocket.send(json.dumps(message))
+            await asyncio.sleep(0) # Faster than real time, like the real service
+
+    async def _context_worker(self, websocket, context_id, jobs):
+        while True:
+            text = await jobs.get()
+            if text is None:
+                final = {"isFinal": True}
+                if context_id is not None:
+                    final["contextId"] = context_id
+                await websocket.send(json.dumps(final))
+                return
+            await self._generate(websocket, context_id, text)
+
+    async def _handle(self, websocket, path=None):
+        self.connections += 1
+        buffers = {}
+        workers = {} # context_id -> (jobs queue, task)
+
+        def context(context_id):
+            if context_id not in workers:
+                jobs = asyncio.Queue()
+                workers[context_id] = (jobs, asyncio.create_task(self._context_worker(websocket, context_id, jobs)))
+                buffers[context_id] = ""
+            return workers[context_id][0]
+
+        try:
+            async for raw in websocket:
+                data = json.loads(raw)
+                if data.get("close_socket"):
+                    break
+                context_id = data.get("context_id")
+                if data.get("close_context"):
+                    entry = workers.pop(context_id, None)
+                    if entry:
+                        entry[1].cancel()
+                    buffers.pop(context_id, None)
+                    continue
+                jobs = context(context_id)
+                text = data.get("text", "")
+                if text.strip():
+                    buffers[context_id] += text
+                buffered = buffers[context_id]
+                sentence_end = buffered.rstrip().endswith((".", "!", "?"))
+                flush = data.get("flush") or (text == "" and context_id is None) # Legacy stream-input: "" ends the stream
+                if buffered.strip() and (flush or sentence_end or len(buffered) >= self.generate_at_chars):
+                    jobs.put_nowait(buffered)
+                    buffers[context_id] = ""
+                if text == "" and context_id is None:
+                    jobs.put_nowait(None)
+        except Exception:
+            pass # Client went away
+        finally:
+            for _, task in workers.values():
+                task.cancel()
@@ -0,0 +1,101 @@
+'''
+Microbenchmark: search-result snippet extraction, old vs streaming.
+
+"full soup" is what _fetch_and_extract_snippet used to do: parse the whole page with
+BeautifulSoup/lxml and join every <p> before keeping 1500 characters (skipped if bs4 or
+lxml is not installed). "streaming" is ada_app/server/html_extract.py, fed in 16 KiB
+chunks and stopping once the paragraph budget is filled, the way it reads the network.
+"no early stop" is the same parser run over the whole page, isolating the early exit.
+speedup is against full soup when available, otherwise against no early stop.
+
+Usage (from the project root):
+    python test/html_extract_benchmark.py [--pages DIR_WITH_SAVED_HTML] [--runs 20]
+Without --pages a synthetic article page (~400 KB, long head, many paragraphs) is used.
+'''
+import argparse
+import glob
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, os.path.join(ROOT, "ada_app", "server"))
+
+from html_extract import HTML_CHUNK_SIZE, HTML_MAX_BYTES, SnippetExtractor # noqa: E402
+
+
+def synthetic_page():
+    head = "<head><title>Benchmark Article</title><meta name='description' content='A synthetic page.'>"
+    head += "<script>" + "var x = 1;\n" * 4000 + "</script><style>" + ".c{color:red}\n" * 2000 + "</style></head>"
+    paragraph = "<p>Lorem ipsum dolor sit amet, <b>consectetur</b> adipiscing elit, sed do eiusmod tempor incididunt ut labore.</p>\n"
+    nav = "<div class='nav'>" + "<a href='/x'>link</a> " * 500 + "</div>"
+    return "<html>" + head + "<body>" + nav + paragraph * 3000 + "</body></html>"
+
+
+def full_soup(html, url):
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html, "lxml")
+    title_tag = soup.find("title")
+    title = title_tag.string.strip() if title_tag and title_tag.string else "No Title Found"
+    description_tag = soup.find("meta", attrs={"name": "description"})
+    snippet = description_tag["content"].strip() if description_tag and description_tag.get("content") else "No Description Found"
+    text = " ".join(p.get_text(strip=True) for p in soup.find_all("p") if p.get_text(strip=True))
+    return {"url": url, "title": title, "meta_snippet": snippet, "page_content_summary": text[:1500]}
+
+
+def streaming(html_bytes, url, max_text_chars=1500):
+    extractor = SnippetExtractor(max_text_chars)
+    read = 0
+    for start in range(0, min(len(html_bytes), HTML_MAX_BYTES), HTML_CHUNK_SIZE):
+        chunk = html_bytes[start:start + HTML_CHUNK_SIZE]
+        read += len(chunk)
+        extractor.feed(chunk.decode("utf-8", errors="replace"))
+        if extractor.done:
+            break
+    extractor.close()
+    return extractor.result(url), read
+
+
+def time_ms(fn, runs):
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", help="directory of saved .html pages")
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    if args.pages:
+        pages = [(os.path.basename(p), open(p, "rb").read()) for p in sorted(glob.glob(os.path.join(args.pages, "*.htm*")))]
+    else:
+        pages = [("synthetic", synthetic_page().encode("utf-8"))]
+    if not pages:
+        sys.exit("No .html files found.")
+
+    try:
+        import bs4, lxml # noqa: F401,E401
+        have_soup = True
+    except ImportError:
+        have_soup = False
+        print("bs4/lxml not installed: skipping the full-soup baseline.\n")
+
+    print(f"{'page':<32} {'KB':>7} {'read KB':>8} {'full soup ms':>13} {'no early stop ms':>17} {'streaming ms':>13} {'speedup':>8}")
+    for name, html_bytes in pages:
+        result, read = streaming(html_bytes, name)
+        stream_ms = time_ms(lambda: streaming(html_bytes, name), args.runs)
+        whole_ms = time_ms(lambda: streaming(html_bytes, name, max_text_chars=sys.maxsize), args.runs)
+        soup_ms = time_ms(lambda: full_soup(html_bytes.decode("utf-8", errors="replace"), name), args.runs) if have_soup else None
+        speedup = f"{(soup_ms or whole_ms) / stream_ms:>7.1f}x"
+        soup_col = f"{soup_ms:>13.2f}" if soup_ms else f"{'-':>13}"
+        print(f"{name[:32]:<32} {len(html_bytes) / 1024:>7.0f} {read / 1024:>8.0f} {soup_col} {whole_ms:>17.2f} {stream_ms:>13.2f} {speedup}")
+
+
+if __name__ == "__main__":
+    main()
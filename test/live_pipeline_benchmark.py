@@ -0,0 +1,185 @@
+'''
+End-to-end latency of the Live API variant (ada_app/server/ADA_Live_API.py) without live services.
+
+ADA's real run_gemini_session, run_tts_and_audio_out and tool dispatch are driven through
+the offline stand-ins in test/fake_services.py: a scripted Gemini Live session (text, tool
+calls, executable code) and a local ElevenLabs-compatible websocket returning PCM. Tools
+answer after --tool-ms. For every turn the runner measures, from the final user input:
+
+  TTFT : time to the first receive_text_chunk emit
+  TTFA : time to the first receive_audio_chunk emit
+
+and reports percentiles overall and per kind of turn. With --barge-in-ms every answer but
+the last is interrupted that long after its first audio, and the runner also reports
+
+  barge-in : time from the interrupting input to the stop_audio emit
+
+The client is assumed to finish playing as soon as the last audio chunk has arrived.
+Fixed --seed makes runs comparable.
+
+Usage (from the project root):
+    python test/live_pipeline_benchmark.py [--turns 40] [--gemini-first-ms 450] [--jitter-ms 80] [--barge-in-ms 300]
+'''
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, os.path.join(ROOT, "ada_app", "server"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_services import DEFAULT_SCRIPT, FakeElevenLabsServer, FakeGenaiClient # noqa: E402
+
+QUIET_SECONDS = 0.3 # A turn is over once no audio has arrived for this long
+
+
+class TurnTiming:
+    def __init__(self, kind):
+        self.kind = kind
+        self.started_at = time.perf_counter()
+        self.first_text = None
+        self.first_audio = None
+        self.last_audio = None
+        self.audio_chunks = 0
+        self.stop_audio = None # When this turn's input silenced the previous answer (barge-in)
+
+
+class RecordingEmitter:
+    """ Stands in for the Socket.IO server: timestamps the events of the current turn. """
+    def __init__(self):
+        self.turn = None
+        self.last_audio = 0.0
+        self.last_stop_audio = 0.0
+
+    def emit(self, event, data=None, room=None, **kwargs):
+        now = time.perf_counter()
+        if event == 'receive_audio_chunk':
+            self.last_audio = now
+        elif event == 'stop_audio':
+            self.last_stop_audio = now
+        turn = self.turn
+        if turn is None:
+            return
+        if event == 'receive_text_chunk' and turn.first_text is None:
+            turn.first_text = now
+        elif event == 'receive_audio_chunk':
+            if turn.first_audio is None:
+                turn.first_audio = now
+            turn.last_audio = now
+            turn.audio_chunks += 1
+
+
+def fake_tools(tool_seconds):
+    async def get_weather(location):
+        await asyncio.sleep(tool_seconds)
+        return {"location": location, "current_temp_f": 57, "precipitation": 0.1, "description": "Overcast"}
+
+    async def get_travel_duration(origin, destination, mode="driving"):
+        await asyncio.sleep(tool_seconds)
+        return {"duration_result": f"Estimated travel duration ({mode}): 20 mins"}
+
+    return {"get_weather": get_weather, "get_travel_duration": get_travel_duration}
+
+
+def turn_kind(steps):
+    kinds = [step[0] for step in steps]
+    if "tool_calls" in kinds:
+        return "multi-tool"
+    return "tool" if "tool_call" in kinds else "code" if "code" in kinds else "text"
+
+
+async def wait_until_quiet(emitter):
+    while time.perf_counter() - emitter.last_audio < QUIET_SECONDS:
+        await asyncio.sleep(QUIET_SECONDS / 3)
+
+
+async def run(args):
+    tts = await FakeElevenLabsServer(first_audio_ms=args.tts_first_ms, jitter_ms=args.jitter_ms, seed=args.seed).start()
+    os.environ["ELEVENLABS_WS_BASE"] = tts.base_url # Read when ADA_Live_API is imported
+    os.environ.setdefault("ELEVENLABS_API_KEY", "offline")
+    from ADA_Live_API import ADA
+
+    gemini = FakeGenaiClient(first_chunk_ms=args.gemini_first_ms, next_chunk_ms=args.gemini_next_ms,
+                             jitter_ms=args.jitter_ms, seed=args.seed)
+    emitter = RecordingEmitter()
+    ada = ADA(socketio_instance=emitter, client_sid="benchmark", client=gemini)
+    for name, function in fake_tools(args.tool_ms / 1000).items():
+        ada.tools.override(name, function) # Keeps the registry's deadlines and concurrency caps
+    await ada.start_all_tasks()
+    while not gemini.sessions or ada.gemini_session is None:
+        await asyncio.sleep(0.01)
+    session = gemini.sessions[0]
+
+    turns = []
+    try:
+        for i in range(args.turns):
+            timing = TurnTiming(turn_kind(DEFAULT_SCRIPT[i % len(DEFAULT_SCRIPT)]))
+            emitter.turn = None # Late audio of an interrupted answer is not this turn's
+            await ada.process_input(f"Benchmark prompt {i}", is_final_turn_input=True)
+            if emitter.last_stop_audio >= timing.started_at:
+                timing.stop_audio = emitter.last_stop_audio
+            emitter.turn = timing
+            turns.append(timing)
+            deadline = time.perf_counter() + 30
+            while timing.first_audio is None and time.perf_counter() < deadline:
+                await asyncio.sleep(0.005)
+            if args.barge_in_ms is not None and i < args.turns - 1:
+                await asyncio.sleep(args.barge_in_ms / 1000) # The next input interrupts this answer
+                continue
+            while session.completed_turns < i + 1 and time.perf_counter() < deadline:
+                await asyncio.sleep(0.005)
+            await wait_until_quiet(emitter)
+            ada.playback.reset() # Playback is assumed to end with the last chunk
+            emitter.turn = None
+    finally:
+        await ada.stop_all_tasks()
+        await tts.stop()
+    print(f"TTS connections opened: {tts.connections} for {len(turns)} turns; "
+          f"Live turns interrupted: {session.interrupted_turns}; tool response messages: {session.tool_response_messages}")
+    return turns
+
+
+def report(label, values):
+    if not values:
+        print(f"{label:>14}: no samples")
+        return
+    values = sorted(values)
+    def pct(p):
+        return values[min(len(values) - 1, int(p / 100 * len(values)))] * 1000
+    print(f"{label:>14}: n={len(values)}  mean={statistics.mean(values)*1000:.1f} ms  "
+          f"p50={pct(50):.1f} ms  p90={pct(90):.1f} ms  p99={pct(99):.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--turns", type=int, default=40)
+    parser.add_argument("--gemini-first-ms", type=float, default=450.0, help="delay before the first message of a turn")
+    parser.add_argument("--gemini-next-ms", type=float, default=60.0, help="delay between streamed messages")
+    parser.add_argument("--tts-first-ms", type=float, default=180.0, help="delay before each generation's first audio")
+    parser.add_argument("--tool-ms", type=float, default=150.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="uniform +/- jitter on every delay")
+    parser.add_argument("--barge-in-ms", type=float, default=None,
+                        help="interrupt each answer this long after its first audio")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    turns = asyncio.run(run(args))
+    missing_audio = sum(1 for t in turns if t.first_audio is None)
+    if missing_audio:
+        print(f"Warning: {missing_audio} turn(s) produced no audio")
+    print("--- all turns ---")
+    report("TTFT", [t.first_text - t.started_at for t in turns if t.first_text])
+    report("TTFA", [t.first_audio - t.started_at for t in turns if t.first_audio])
+    if args.barge_in_ms is not None:
+        report("barge-in", [t.stop_audio - t.started_at for t in turns if t.stop_audio])
+    for kind in sorted({t.kind for t in turns}):
+        print(f"--- {kind} turns ---")
+        report("TTFT", [t.first_text - t.started_at for t in turns if t.kind == kind and t.first_text])
+        report("TTFA", [t.first_audio - t.started_at for t in turns if t.kind == kind and t.first_audio])
+
+
+if __name__ == "__main__":
+    main()
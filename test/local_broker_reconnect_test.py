@@ -0,0 +1,116 @@
+'''
+Kills and restarts the local Socket.IO broker (ada_app/server/local_broker.py) under a
+listening LocalBrokerManager and checks that the listener
+
+  - backs off while the broker is down (a handful of connect attempts, not a busy loop),
+  - reconnects on its own once the broker is back, and
+  - delivers messages published after the restart.
+
+The broker runs as a separate process on a free port, as it does in multi-worker mode.
+
+Usage (from the project root):
+    python test/local_broker_reconnect_test.py [--down-seconds 4]
+'''
+import argparse
+import os
+import pickle
+import queue
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+SERVER_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "ada_app", "server")
+sys.path.insert(0, SERVER_DIR)
+
+import local_broker # noqa: E402
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_broker(port):
+    process = subprocess.Popen([sys.executable, os.path.join(SERVER_DIR, "local_broker.py"), "--port", str(port)])
+    deadline = time.time() + 10
+    while time.time() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return process
+        except OSError:
+            time.sleep(0.05)
+    process.kill()
+    raise RuntimeError("broker did not start")
+
+
+class CountingManager(local_broker.LocalBrokerManager):
+    """ Counts connect attempts; the listener is driven directly, without a Socket.IO server. """
+    def __init__(self, *args, **kwargs):
+        self.connect_attempts = 0
+        super().__init__(*args, **kwargs)
+
+    def _connect(self):
+        self.connect_attempts += 1
+        return super()._connect()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--down-seconds", type=float, default=4.0)
+    args = parser.parse_args()
+
+    port = free_port()
+    broker = start_broker(port)
+    manager = CountingManager(url=f"localbroker://127.0.0.1:{port}")
+    received = queue.Queue()
+
+    def listen():
+        for payload in manager._listen():
+            received.put(pickle.loads(payload))
+    threading.Thread(target=listen, daemon=True, name="listener").start()
+
+    def publish_until_received(message, timeout):
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            try:
+                manager._publish(message)
+                return received.get(timeout=0.5) == message
+            except (OSError, queue.Empty):
+                time.sleep(0.2)
+        return False
+
+    failures = []
+    if not publish_until_received({"n": 1}, 5):
+        failures.append("message before the restart was not delivered")
+
+    broker.kill()
+    broker.wait()
+    attempts_before = manager.connect_attempts
+    time.sleep(args.down_seconds)
+    attempts_while_down = manager.connect_attempts - attempts_before
+    # 1 + 2 + 4 s backoff: about log2(down_seconds) + 1 attempts; a spinning listener makes thousands
+    if attempts_while_down > args.down_seconds + 2:
+        failures.append(f"{attempts_while_down} connect attempts in {args.down_seconds}s while the broker was down")
+
+    broker = start_broker(port)
+    try:
+        manager.publish_socket = None # The publisher reconnects on its own on the next failure
+        if not publish_until_received({"n": 2}, 15):
+            failures.append("listener did not reconnect and deliver after the broker restarted")
+    finally:
+        broker.kill()
+        broker.wait()
+
+    print(f"Connect attempts while the broker was down for {args.down_seconds:.0f}s: {attempts_while_down}")
+    if failures:
+        for failure in failures:
+            print(f"FAIL: {failure}")
+        sys.exit(1)
+    print("PASS: listener backed off while the broker was down and recovered after the restart")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+'''
+Per-event round-trip overhead of the two web server modes:
+
+  threading : ada_app/server/app.py        (Flask-SocketIO threading mode + loop-thread bridge)
+  async     : ada_app/server/app_async.py  (python-socketio AsyncServer, one shared event loop)
+
+The real ADA is swapped for an echo stub, so the numbers are pure server plumbing:
+client emit -> handler -> ADA coroutine -> ADA emit -> client.
+
+Usage:
+    python test/socketio_roundtrip_benchmark.py [--events 500] [--clients 1]
+'''
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+SERVER_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "ada_app", "server")
+
+
+class EchoADA:
+    """ Stand-in for ADA that answers every input with a single text chunk. """
+    def __init__(self, socketio_instance=None, client_sid=None):
+        self.socketio = socketio_instance
+        self.client_sid = client_sid
+
+    async def start_all_tasks(self):
+        pass
+
+    async def stop_all_tasks(self):
+        pass
+
+    async def process_input(self, message, is_final_turn_input=False):
+        self.socketio.emit('receive_text_chunk', {'text': message}, room=self.client_sid)
+
+    async def process_video_frame(self, frame_data_url):
+        pass
+
+
+def serve(mode, port):
+    sys.path.insert(0, SERVER_DIR)
+    if mode == "threading":
+        import app as server
+        server.session_manager.ada_factory = EchoADA
+        server.socketio.run(server.app, host='127.0.0.1', port=port, use_reloader=False, log_output=False, allow_unsafe_werkzeug=True)
+    else:
+        from aiohttp import web
+        import app_async as server
+        server.ADA = EchoADA
+        web.run_app(server.app, host='127.0.0.1', port=port, print=None)
+
+
+async def run_client(url, n_events, latencies):
+    import socketio
+    client = socketio.AsyncClient()
+    pending = {}
+
+    @client.on('receive_text_chunk')
+    async def on_chunk(data):
+        sent_at = pending.pop(data['text'], None)
+        if sent_at is not None:
+            latencies.append(time.perf_counter() - sent_at[0])
+            sent_at[1].set()
+
+    await client.connect(url, transports=['websocket'])
+    for i in range(n_events):
+        token = f"{client.get_sid()}-{i}"
+        done = asyncio.Event()
+        pending[token] = (time.perf_counter(), done)
+        await client.emit('send_text_message', {'message': token})
+        await asyncio.wait_for(done.wait(), timeout=10)
+    await client.disconnect()
+
+
+async def measure(url, n_events, n_clients):
+    latencies = []
+    started = time.perf_counter()
+    await asyncio.gather(*(run_client(url, n_events, latencies) for _ in range(n_clients)))
+    return latencies, time.perf_counter() - started
+
+
+def report(mode, latencies, elapsed):
+    latencies = sorted(latencies)
+    def pct(p):
+        return latencies[min(len(latencies) - 1, int(p / 100 * len(latencies)))] * 1000
+    print(f"{mode:>10}: n={len(latencies)}  mean={statistics.mean(latencies)*1000:.3f} ms  "
+          f"p50={pct(50):.3f} ms  p95={pct(95):.3f} ms  p99={pct(99):.3f} ms  "
+          f"throughput={len(latencies)/elapsed:.0f} events/s")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--events", type=int, default=500, help="events per client")
+    parser.add_argument("--clients", type=int, default=1)
+    parser.add_argument("--port", type=int, default=5055)
+    parser.add_argument("--serve", choices=["threading", "async"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve, args.port)
+        return
+
+    for mode in ("threading", "async"):
+        proc = subprocess.Popen([sys.executable, __file__, "--serve", mode, "--port", str(args.port)],
+                                stdout=subprocess.DEVNULL)
+        try:
+            time.sleep(3) # Give the server time to bind
+            latencies, elapsed = asyncio.run(measure(f"http://127.0.0.1:{args.port}", args.events, args.clients))
+            report(mode, latencies, elapsed)
+        finally:
+            proc.terminate()
+            proc.wait(timeout=10)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+'''
+Cold-start budget check for every entry point.
+
+Each entry point is imported (not run) in a fresh interpreter, which is exactly the
+work done before main() gets control: module imports plus module-level setup. Reports
+wall-clock import time and peak resident memory, and exits non-zero if any entry point
+is over budget.
+
+Usage (from the project root):
+    python test/startup_benchmark.py [--runs 3] [--budget-ms 1500] [--budget-mb 250]
+'''
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+# (label, working directory, module to import)
+ENTRY_POINTS = [
+    ("main_local.py", ROOT, "main_local"),
+    ("main_online.py", ROOT, "main_online"),
+    ("main_online_noelevenlabs.py", ROOT, "main_online_noelevenlabs"),
+    ("ada_app/server/app.py", os.path.join(ROOT, "ada_app", "server"), "app"),
+]
+
+PROBE = r'''
+import contextlib, io, json, resource, sys, time
+sys.path.insert(0, ".")
+started = time.perf_counter()
+with contextlib.redirect_stdout(io.StringIO()):
+    __import__(sys.argv[1])
+elapsed = time.perf_counter() - started
+rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+if sys.platform == "darwin":
+    rss_kb //= 1024 # ru_maxrss is bytes on macOS, KiB on Linux
+heavy = [m for m in ("torch", "RealtimeSTT", "RealtimeTTS", "googlemaps", "python_weather", "bs4") if m in sys.modules]
+print(json.dumps({"import_ms": elapsed * 1000, "rss_mb": rss_kb / 1024, "heavy": heavy}))
+'''
+
+
+def probe(cwd, module):
+    result = subprocess.run([sys.executable, "-c", PROBE, module], cwd=cwd, capture_output=True, text=True)
+    if result.returncode != 0:
+        return {"error": result.stderr.strip().splitlines()[-1] if result.stderr.strip() else f"exit {result.returncode}"}
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--budget-ms", type=float, default=1500.0, help="max median import time per entry point")
+    parser.add_argument("--budget-mb", type=float, default=250.0, help="max peak RSS per entry point")
+    args = parser.parse_args()
+
+    over_budget = False
+    print(f"{'entry point':<30} {'import ms (median)':>19} {'peak RSS MB':>12}  eagerly loaded heavy modules")
+    for label, cwd, module in ENTRY_POINTS:
+        samples = [probe(cwd, module) for _ in range(args.runs)]
+        errors = [s["error"] for s in samples if "error" in s]
+        if errors:
+            print(f"{label:<30} {'ERROR':>19} {'':>12}  {errors[0]}")
+            over_budget = True
+            continue
+        import_ms = statistics.median(s["import_ms"] for s in samples)
+        rss_mb = max(s["rss_mb"] for s in samples)
+        flag = ""
+        if import_ms > args.budget_ms or rss_mb > args.budget_mb:
+            flag = "  <-- OVER BUDGET"
+            over_budget = True
+        print(f"{label:<30} {import_ms:>19.0f} {rss_mb:>12.1f}  {', '.join(samples[0]['heavy']) or '-'}{flag}")
+
+    sys.exit(1 if over_budget else 0)
+
+
+if __name__ == "__main__":
+    main()